@@ -167,8 +167,7 @@ class GlobalInitScriptCrawler(CrawlerBase):
         return self._snapshot(self._try_fetch, self._crawl)
 
     def _try_fetch(self) -> list[GlobalInitScriptInfo]:
-        for row in self._fetch(f"SELECT * FROM {self._schema}.{self._table}"):
-            yield GlobalInitScriptInfo(*row)
+        yield from self._backend.fetch_as(GlobalInitScriptInfo, f"{self._schema}.{self._table}")
 
 
 class AzureServicePrincipalCrawler(CrawlerBase):
@@ -366,8 +365,7 @@ class AzureServicePrincipalCrawler(CrawlerBase):
         return self._snapshot(self._try_fetch, self._crawl)
 
     def _try_fetch(self) -> list[AzureServicePrincipalInfo]:
-        for row in self._fetch(f"SELECT * FROM {self._schema}.{self._table}"):
-            yield AzureServicePrincipalInfo(*row)
+        yield from self._backend.fetch_as(AzureServicePrincipalInfo, f"{self._schema}.{self._table}")
 
 
 class PipelinesCrawler(CrawlerBase):
@@ -397,8 +395,7 @@ class PipelinesCrawler(CrawlerBase):
         return self._snapshot(self._try_fetch, self._crawl)
 
     def _try_fetch(self) -> list[PipelineInfo]:
-        for row in self._fetch(f"SELECT * FROM {self._schema}.{self._table}"):
-            yield PipelineInfo(*row)
+        yield from self._backend.fetch_as(PipelineInfo, f"{self._schema}.{self._table}")
 
 
 class ClustersCrawler(CrawlerBase):
@@ -464,8 +461,7 @@ class ClustersCrawler(CrawlerBase):
         return self._snapshot(self._try_fetch, self._crawl)
 
     def _try_fetch(self) -> list[ClusterInfo]:
-        for row in self._fetch(f"SELECT * FROM {self._schema}.{self._table}"):
-            yield ClusterInfo(*row)
+        yield from self._backend.fetch_as(ClusterInfo, f"{self._schema}.{self._table}")
 
 
 class JobsCrawler(CrawlerBase):
@@ -554,5 +550,4 @@ class JobsCrawler(CrawlerBase):
         return self._snapshot(self._try_fetch, self._crawl)
 
     def _try_fetch(self) -> list[JobInfo]:
-        for row in self._fetch(f"SELECT * FROM {self._schema}.{self._table}"):
-            yield JobInfo(*row)
+        yield from self._backend.fetch_as(JobInfo, f"{self._schema}.{self._table}")
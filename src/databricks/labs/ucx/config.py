@@ -211,6 +211,19 @@ class WorkspaceConfig(_Config["WorkspaceConfig"]):
     # Starting path for notebooks and directories crawler
     workspace_start_path: str = "/"
 
+    # Crawl permissions with asyncio instead of threads for the REST-bound crawlers
+    use_asyncio: bool = False
+
+    # Refresh the tables inventory of the previous run instead of crawling all tables again
+    incremental_table_crawl: bool = False
+
+    # Concurrent metastore calls of the tables crawler, twice the cores of the cluster if not set
+    table_crawl_parallelism: int | None = None
+
+    # Folder on DBFS or in a Unity Catalog volume, like `/Volumes/main/ucx/staging`, for the Parquet files
+    # of large inventory saves through a SQL warehouse, that are loaded with a single `COPY INTO`
+    staging_folder: str | None = None
+
     @classmethod
     def from_dict(cls, raw: dict):
         cls._verify_version(raw)
@@ -224,6 +237,10 @@ class WorkspaceConfig(_Config["WorkspaceConfig"]):
             log_level=raw.get("log_level", "INFO"),
             database_to_catalog_mapping=raw.get("database_to_catalog_mapping", None),
             default_catalog=raw.get("default_catalog", "main"),
+            use_asyncio=raw.get("use_asyncio", False),
+            incremental_table_crawl=raw.get("incremental_table_crawl", False),
+            table_crawl_parallelism=raw.get("table_crawl_parallelism", None),
+            staging_folder=raw.get("staging_folder", None),
         )
 
     def to_workspace_client(self) -> WorkspaceClient:
@@ -0,0 +1,142 @@
+import dataclasses
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from databricks.labs.ucx.framework.crawlers import SqlBackend
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TaskCheckpoint:
+    gather: str
+    key: str
+    status: str
+
+
+class Checkpoint(ABC):
+    """Durable record of completed and failed tasks of long-running gathers, so that a rerun skips completed
+    task keys and retries only failures (see `Threads.gather(..., checkpoint=...)`).
+
+    Records are buffered and persisted every `flush_every` tasks. With `flush_every=None` records are persisted
+    only on explicit `flush()`, which lets callers persist checkpoints only after the results are saved."""
+
+    completed_status = "completed"
+    failed_status = "failed"
+
+    def __init__(self, *, flush_every: int | None = 1000):
+        self._flush_every = flush_every
+        self._lock = threading.Lock()
+        self._pending: list[TaskCheckpoint] = []
+
+    def completed(self, gather: str) -> set[str]:
+        """Returns the keys of tasks, that have completed in the previous runs of the `gather`"""
+        return {r.key for r in self._load(gather) if r.status == self.completed_status}
+
+    def record(self, gather: str, key: str, *, failed: bool = False):
+        status = self.failed_status if failed else self.completed_status
+        with self._lock:
+            self._pending.append(TaskCheckpoint(gather=gather, key=key, status=status))
+            if self._flush_every is None or len(self._pending) < self._flush_every:
+                return
+            pending, self._pending = self._pending, []
+        self._persist(pending)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        logger.debug(f"Persisting {len(pending)} task checkpoints")
+        self._persist(pending)
+
+    def finish(self):
+        """Persists buffered records at the end of a gather, unless they are persisted only on explicit `flush()`"""
+        if self._flush_every is None:
+            return
+        self.flush()
+
+    @abstractmethod
+    def clear(self, gather: str):
+        """Forgets all task checkpoints of the `gather`, usually after it has successfully finished"""
+
+    @abstractmethod
+    def _load(self, gather: str) -> Iterator[TaskCheckpoint]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _persist(self, records: list[TaskCheckpoint]):
+        raise NotImplementedError
+
+
+class FileCheckpoint(Checkpoint):
+    """Keeps task checkpoints as JSON lines in a local file"""
+
+    def __init__(self, path: Path, *, flush_every: int | None = 1000):
+        super().__init__(flush_every=flush_every)
+        self._path = path
+
+    def clear(self, gather: str):
+        if not self._path.exists():
+            return
+        with self._lock:
+            records = [r for r in self._read() if r.gather != gather]
+            with self._path.open("w") as f:
+                for r in records:
+                    f.write(json.dumps(dataclasses.asdict(r)) + "\n")
+
+    def _read(self) -> Iterator[TaskCheckpoint]:
+        with self._path.open() as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                yield TaskCheckpoint(**json.loads(line))
+
+    def _load(self, gather: str) -> Iterator[TaskCheckpoint]:
+        if not self._path.exists():
+            return
+        for r in self._read():
+            if r.gather == gather:
+                yield r
+
+    def _persist(self, records: list[TaskCheckpoint]):
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with self._path.open("a") as f:
+            for r in records:
+                f.write(json.dumps(dataclasses.asdict(r)) + "\n")
+
+
+class TableCheckpoint(Checkpoint):
+    """Keeps task checkpoints in the `$inventory.checkpoints` Delta table"""
+
+    def __init__(self, backend: SqlBackend, schema: str, *, table: str = "checkpoints", flush_every: int | None = 1000):
+        super().__init__(flush_every=flush_every)
+        self._backend = backend
+        self._full_name = f"hive_metastore.{schema}.{table}"
+
+    def clear(self, gather: str):
+        escaped = gather.replace("'", "''")
+        try:
+            self._backend.execute(f"DELETE FROM {self._full_name} WHERE gather = '{escaped}'")
+        except Exception as err:
+            if "TABLE_OR_VIEW_NOT_FOUND" not in str(err):
+                raise err
+
+    def _load(self, gather: str) -> Iterator[TaskCheckpoint]:
+        escaped = gather.replace("'", "''")
+        try:
+            for key, status in self._backend.fetch(
+                f"SELECT key, status FROM {self._full_name} WHERE gather = '{escaped}'"
+            ):
+                yield TaskCheckpoint(gather=gather, key=key, status=status)
+        except Exception as err:
+            if "TABLE_OR_VIEW_NOT_FOUND" not in str(err):
+                raise err
+
+    def _persist(self, records: list[TaskCheckpoint]):
+        self._backend.save_table(self._full_name, records, TaskCheckpoint, mode="append")
@@ -0,0 +1,137 @@
+import dataclasses
+import functools
+import math
+import threading
+from collections.abc import Callable, Sequence
+from typing import Any, NewType
+
+# 64-bit integer fields, like sizes in bytes, that overflow the 32-bit `INT` columns of plain `int` fields
+Long = NewType("Long", int)
+
+_spark_types = {str: "STRING", int: "INT", Long: "BIGINT", bool: "BOOLEAN", float: "FLOAT"}
+
+
+def _float_to_sql(value: float) -> str:
+    if math.isfinite(value):
+        return repr(value)
+    return f"CAST('{value}' AS FLOAT)"
+
+
+def _unknown_type(klass: type):
+    msg = f"unknown type: {klass}"
+    raise ValueError(msg)
+
+
+class RowCodec:
+    """Serialization of inventory dataclass rows, compiled once per dataclass (see `row_codec`).
+
+    Instead of inspecting the fields of every row, the codec generates specialized functions,
+    that access the attributes directly:
+
+    - `first_missing(row)` returns the name of the first non-nullable field, that is None, or None.
+    - `to_sql(row)` renders the row as SQL literals for `INSERT INTO ... VALUES (...)`.
+    - `to_tuple(row)` converts the row into a tuple for `spark.createDataFrame`.
+    - `decoder(columns)` builds the dataclass from a result row by column name (see `SqlBackend.fetch_as`).
+    """
+
+    def __init__(self, klass: type):
+        self.klass = klass
+        self.fields = dataclasses.fields(klass)
+        self.columns = tuple(f.name for f in self.fields)
+        self.nullable = frozenset(f.name for f in self.fields if f.default is None)
+        self.first_missing: Callable[[Any], str | None] = self._compile_first_missing()
+        self.to_sql: Callable[[Any], str] = self._compile_to_sql()
+        self.to_tuple: Callable[[Any], tuple] = self._compile_to_tuple()
+        self._decoders: dict[tuple[str, ...], Callable[[Sequence], Any]] = {}
+        self._lock = threading.Lock()
+
+    @functools.cached_property
+    def schema(self) -> str:
+        """Column definitions for `CREATE TABLE`"""
+        columns = []
+        for f in self.fields:
+            if f.type not in _spark_types:
+                msg = f"Cannot auto-convert {f.type}"
+                raise SyntaxError(msg)
+            not_null = "" if f.name in self.nullable else " NOT NULL"
+            columns.append(f"{f.name} {_spark_types[f.type]}{not_null}")
+        return ", ".join(columns)
+
+    def decoder(self, columns: Sequence[str]) -> Callable[[Sequence], Any]:
+        """Returns a function, that builds the dataclass from a result row with the given `columns`.
+        Fields missing in the result get their defaults or None, result columns unknown to the dataclass
+        are ignored."""
+        columns = tuple(columns)
+        with self._lock:
+            decode = self._decoders.get(columns, None)
+            if decode is None:
+                decode = self._compile_decoder(columns)
+                self._decoders[columns] = decode
+            return decode
+
+    def _compile_decoder(self, columns: tuple[str, ...]):
+        positions = {name: i for i, name in enumerate(columns)}
+        kwargs = []
+        for f in self.fields:
+            if f.name in positions:
+                kwargs.append(f"{f.name}=row[{positions[f.name]}]")
+            elif f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING:
+                kwargs.append(f"{f.name}=None")
+        return self._compile("decode", ["def decode(row):", f"    return _klass({', '.join(kwargs)})"])
+
+    def _compile_first_missing(self):
+        lines = ["def first_missing(row):"]
+        for f in self.fields:
+            if f.name in self.nullable:
+                continue
+            lines.append(f"    if row.{f.name} is None: return {f.name!r}")
+        lines.append("    return None")
+        return self._compile("first_missing", lines)
+
+    def _compile_to_sql(self):
+        lines = ["def to_sql(row):"]
+        literals = []
+        for i, f in enumerate(self.fields):
+            v = f"v{i}"
+            lines.append(f"    {v} = row.{f.name}")
+            if f.type == bool:
+                literal = f"'TRUE' if {v} else 'FALSE'"
+            elif f.type == str:
+                literal = f"\"'\" + str({v}).replace(\"'\", \"''\") + \"'\""
+            elif f.type in (int, Long):
+                literal = f"str({v})"
+            elif f.type == float:
+                literal = f"_float_to_sql({v})"
+            else:
+                literal = f"_unknown_type(_types[{i}])"
+            lines.append(f"    s{i} = 'NULL' if {v} is None else {literal}")
+            literals.append(f"{{s{i}}}")
+        lines.append(f"    return f\"{', '.join(literals)}\"")
+        return self._compile("to_sql", lines)
+
+    def _compile_to_tuple(self):
+        attributes = "".join(f"row.{name}, " for name in self.columns)
+        return self._compile("to_tuple", ["def to_tuple(row):", f"    return ({attributes})"])
+
+    def _compile(self, name: str, lines: list[str]):
+        namespace = {
+            "_float_to_sql": _float_to_sql,
+            "_unknown_type": _unknown_type,
+            "_types": [f.type for f in self.fields],
+            "_klass": self.klass,
+        }
+        code = compile("\n".join(lines), f"<{self.klass.__qualname__}.{name}>", "exec")
+        exec(code, namespace)  # noqa: S102
+        return namespace[name]
+
+
+def row_codec(klass: type) -> RowCodec:
+    """Returns the codec for the dataclass type or instance, compiling it on the first use"""
+    if not isinstance(klass, type):
+        klass = type(klass)
+    return _cached_codec(klass)
+
+
+@functools.cache
+def _cached_codec(klass: type) -> RowCodec:
+    return RowCodec(klass)
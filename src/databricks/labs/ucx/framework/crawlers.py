@@ -1,16 +1,32 @@
 import dataclasses
+import datetime as dt
+import importlib.util
+import io
 import logging
 import os
+import re
+import threading
+import time
+import uuid
+import weakref
 from abc import ABC, abstractmethod
-from collections.abc import Iterator
-from typing import ClassVar
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 
 from databricks.sdk import WorkspaceClient
 
-from databricks.labs.ucx.mixins.sql import StatementExecutionExt
+from databricks.labs.ucx.__about__ import __version__
+from databricks.labs.ucx.framework.codecs import Long, row_codec
+from databricks.labs.ucx.framework.staging import StagingArea
+from databricks.labs.ucx.mixins.sql import Row, StatementExecutionExt
 
 logger = logging.getLogger(__name__)
 
+# threads for `fetch_async` of backends, that block while a query runs, are started on the first use
+_fetch_pool = ThreadPoolExecutor(os.cpu_count() * 2, thread_name_prefix="sql-fetch")
+
 
 class SqlBackend(ABC):
     @abstractmethod
@@ -21,29 +37,121 @@ class SqlBackend(ABC):
     def fetch(self, sql) -> Iterator[any]:
         raise NotImplementedError
 
+    def fetch_async(self, sql) -> Future[Iterator[any]]:
+        """Returns the future of the rows of the query. Backends, that can keep many queries in flight,
+        submit the query and return right away, while others run it on a shared pool of threads."""
+        return _fetch_pool.submit(lambda: iter(list(self.fetch(sql))))
+
+    def fetch_many(
+        self, statements: Iterable[tuple[any, str]], *, max_in_flight: int = 256
+    ) -> Iterator[tuple[any, Iterator[any] | Exception]]:
+        """Runs `(key, sql)` statements with up to `max_in_flight` of them in flight at once through `fetch_async`
+        and yields the key with the rows, or with the error, of every statement in the order of `statements`.
+        Statements are consumed lazily, so that they may be generated while the results are processed."""
+        in_flight = deque()
+        for key, sql in statements:
+            if len(in_flight) >= max_in_flight:
+                yield self._collect_fetch(*in_flight.popleft())
+            in_flight.append((key, self.fetch_async(sql)))
+        while in_flight:
+            yield self._collect_fetch(*in_flight.popleft())
+
+    @staticmethod
+    def _collect_fetch(key: any, future: Future) -> tuple[any, Iterator[any] | Exception]:
+        try:
+            return key, future.result()
+        except Exception as err:
+            return key, err
+
     @abstractmethod
-    def save_table(self, full_name: str, rows: list[any], klass: dataclasses.dataclass, mode: str = "append"):
+    def save_table(
+        self,
+        full_name: str,
+        rows: list[any],
+        klass: dataclasses.dataclass,
+        mode: str = "append",
+        *,
+        keys: list[str] | None = None,
+    ):
+        """Saves rows into the table, creating it if needed. `mode` is one of `append`, `overwrite` or `upsert`.
+        In the `upsert` mode rows replace the rows with the same values of the `keys` columns
+        and the other rows are inserted."""
         raise NotImplementedError
 
+    def fetch_as(
+        self,
+        klass: dataclasses.dataclass,
+        table: str,
+        *,
+        columns: list[str] | None = None,
+        where: str | None = None,
+    ) -> Iterator[any]:
+        """Reads rows of the `table` as instances of the `klass` dataclass, decoding them by column name.
+
+        Args:
+            klass: Dataclass of the inventory table.
+            table: Full name of the table.
+            columns: Fields to fetch, all by default. Fields that are not fetched get their defaults or None.
+            where: SQL predicate to filter rows on the warehouse, like `object_type = 'clusters'`.
+        """
+        codec = row_codec(klass)
+        decode = None
+        for row in self.fetch(self._select_sql(klass, table, columns, where)):
+            if decode is None:
+                decode = codec.decoder(columns or self._result_columns(row) or codec.columns[: len(row)])
+            yield decode(row)
+
+    @staticmethod
+    def _select_sql(klass: dataclasses.dataclass, table: str, columns: list[str] | None, where: str | None) -> str:
+        projection = "*"
+        if columns is not None:
+            unknown = [c for c in columns if c not in row_codec(klass).columns]
+            if unknown:
+                msg = f"{klass.__name__} has no fields: {', '.join(unknown)}"
+                raise ValueError(msg)
+            projection = ", ".join(columns)
+        sql = f"SELECT {projection} FROM {table}"
+        if where is not None:
+            sql = f"{sql} WHERE {where}"
+        return sql
+
+    @staticmethod
+    def _result_columns(row) -> list[str] | None:
+        if isinstance(row, Row):
+            return row.__columns__
+        # PySpark rows
+        return getattr(row, "__fields__", None)
+
     def create_table(self, full_name: str, klass: dataclasses.dataclass):
         ddl = f"CREATE TABLE IF NOT EXISTS {full_name} ({self._schema_for(klass)}) USING DELTA"
         self.execute(ddl)
 
-    _builtin_type_mapping: ClassVar[dict[type, str]] = {str: "STRING", int: "INT", bool: "BOOLEAN", float: "FLOAT"}
-
     @classmethod
     def _schema_for(cls, klass):
-        fields = []
-        for f in dataclasses.fields(klass):
-            if f.type not in cls._builtin_type_mapping:
-                msg = f"Cannot auto-convert {f.type}"
-                raise SyntaxError(msg)
-            not_null = " NOT NULL"
-            if f.default is None:
-                not_null = ""
-            spark_type = cls._builtin_type_mapping[f.type]
-            fields.append(f"{f.name} {spark_type}{not_null}")
-        return ", ".join(fields)
+        return row_codec(klass).schema
+
+    @staticmethod
+    def _upsert_rows(rows: list[any], klass: dataclasses.dataclass, keys: list[str] | None) -> list[any]:
+        """Validates the `keys` and keeps only the last of the rows with the same keys, as MERGE requires"""
+        if not keys:
+            msg = "upsert requires keys"
+            raise ValueError(msg)
+        unknown = [k for k in keys if k not in row_codec(klass).columns]
+        if unknown:
+            msg = f"{klass.__name__} has no fields: {', '.join(unknown)}"
+            raise ValueError(msg)
+        unique = {}
+        for row in rows:
+            unique[tuple(getattr(row, k) for k in keys)] = row
+        return list(unique.values())
+
+    @staticmethod
+    def _merge_sql(full_name: str, source: str, keys: list[str]) -> str:
+        matches = " AND ".join(f"t.{k} <=> s.{k}" for k in keys)
+        return (
+            f"MERGE INTO {full_name} AS t USING {source} AS s ON {matches} "
+            "WHEN MATCHED THEN UPDATE SET * WHEN NOT MATCHED THEN INSERT *"
+        )
 
     @classmethod
     def _filter_none_rows(cls, rows, full_name):
@@ -51,32 +159,45 @@ class SqlBackend(ABC):
             return rows
 
         results = []
-        nullable_fields = set()
-
-        for field in dataclasses.fields(rows[0]):
-            if field.default is None:
-                nullable_fields.add(field.name)
-
+        first_missing = row_codec(rows[0]).first_missing
         for row in rows:
             if row is None:
                 continue
-            row_contains_none = False
-            for column, value in dataclasses.asdict(row).items():
-                if value is None and column not in nullable_fields:
-                    logger.warning(f"[{full_name}] Field {column} is None, filtering row")
-                    row_contains_none = True
-                    break
-
-            if not row_contains_none:
-                results.append(row)
+            column = first_missing(row)
+            if column is not None:
+                logger.warning(f"[{full_name}] Field {column} is None, filtering row")
+                continue
+            results.append(row)
         return results
 
 
 class StatementExecutionBackend(SqlBackend):
-    def __init__(self, ws: WorkspaceClient, warehouse_id, *, max_records_per_batch: int = 1000):
-        self._sql = StatementExecutionExt(ws.api_client)
+    def __init__(
+        self,
+        ws: WorkspaceClient,
+        warehouse_id,
+        *,
+        max_records_per_batch: int = 1000,
+        max_bytes_per_batch: int = 2 * 1024 * 1024,
+        max_concurrent_batches: int = 4,
+        staging: StagingArea | None = None,
+        bulk_load_min_rows: int = 10_000,
+    ):
+        """Rows are inserted with `INSERT INTO` statements of at most `max_records_per_batch` rows and
+        `max_bytes_per_batch` bytes of SQL text, so that wide rows never exceed the statement size limit.
+        Up to `max_concurrent_batches` statements are executed on the warehouse at once.
+
+        With `staging`, saving at least `bulk_load_min_rows` rows writes them into a Parquet file,
+        stages it and loads it with a single `COPY INTO`, instead of the batches of `INSERT INTO` statements.
+        Bulk load requires `pyarrow`, without it the rows are inserted in batches. The `staging_folder` of
+        the configuration file sets up the staging area (see `StagingArea.for_folder`)."""
+        self._sql = StatementExecutionExt(ws.api_client, config=ws.config)
         self._warehouse_id = warehouse_id
         self._max_records_per_batch = max_records_per_batch
+        self._max_bytes_per_batch = max_bytes_per_batch
+        self._max_concurrent_batches = max_concurrent_batches
+        self._staging = staging
+        self._bulk_load_min_rows = bulk_load_min_rows
 
     def execute(self, sql):
         logger.debug(f"[api][execute] {sql}")
@@ -86,40 +207,229 @@ class StatementExecutionBackend(SqlBackend):
         logger.debug(f"[api][fetch] {sql}")
         return self._sql.execute_fetch_all(self._warehouse_id, sql)
 
-    def save_table(self, full_name: str, rows: list[any], klass: dataclasses.dataclass, mode="append"):
-        if mode == "overwrite":
-            msg = "Overwrite mode is not yet supported"
-            raise NotImplementedError(msg)
+    def fetch_columns(self, sql) -> dict[str, list]:
+        """Fetches the result as lists of values by column name, which is cheaper than rows for large results"""
+        logger.debug(f"[api][fetch-columns] {sql}")
+        return self._sql.execute_fetch_columns(self._warehouse_id, sql)
+
+    def fetch_as(
+        self,
+        klass: dataclasses.dataclass,
+        table: str,
+        *,
+        columns: list[str] | None = None,
+        where: str | None = None,
+    ) -> Iterator[any]:
+        """Reads whole tables, like inventory snapshots, as Arrow chunks from external links, that are not limited
+        by the size of inline results, and decodes them a column at a time. Filtered reads, that are small,
+        and reads without `pyarrow` convert inline results a column at a time with `fetch_columns`."""
+        sql = self._select_sql(klass, table, columns, where)
+        codec = row_codec(klass)
+        if where is not None or not self._has_pyarrow():
+            result = self.fetch_columns(sql)
+            decode = codec.decoder(columns or list(result))
+            yield from map(decode, zip(*result.values(), strict=True))
+            return
+        logger.debug(f"[api][fetch-arrow] {sql}")
+        for chunk in self._sql.execute_fetch_arrow(self._warehouse_id, sql):
+            decode = codec.decoder(columns or chunk.column_names)
+            for row in zip(*[column.to_pylist() for column in chunk.columns], strict=True):
+                yield decode(row)
+
+    @staticmethod
+    def _has_pyarrow() -> bool:
+        return importlib.util.find_spec("pyarrow") is not None
+
+    def fetch_async(self, sql) -> Future[Iterator[any]]:
+        logger.debug(f"[api][fetch-async] {sql}")
+        rows = Future()
+
+        def convert(response: Future):
+            if response.cancelled():
+                rows.cancel()
+            elif response.exception() is not None:
+                rows.set_exception(response.exception())
+            else:
+                # rows are converted and next chunks are fetched lazily, by the consumer of the future
+                rows.set_result(self._sql.iterate_rows(response.result()))
+
+        response = self._sql.submit(self._warehouse_id, sql)
+        response.add_done_callback(convert)
+        rows.add_done_callback(lambda f: f.cancelled() and response.cancel())
+        return rows
+
+    def save_table(
+        self,
+        full_name: str,
+        rows: list[any],
+        klass: dataclasses.dataclass,
+        mode="append",
+        *,
+        keys: list[str] | None = None,
+    ):
         rows = self._filter_none_rows(rows, full_name)
+        if mode == "upsert":
+            rows = self._upsert_rows(rows, klass, keys)
         self.create_table(full_name, klass)
+        if mode == "overwrite":
+            self._overwrite(full_name, rows, klass)
+            return
         if len(rows) == 0:
             return
-        fields = dataclasses.fields(klass)
-        field_names = [f.name for f in fields]
-        for i in range(0, len(rows), self._max_records_per_batch):
-            batch = rows[i : i + self._max_records_per_batch]
-            vals = "), (".join(self._row_to_sql(r, fields) for r in batch)
-            sql = f'INSERT INTO {full_name} ({", ".join(field_names)}) VALUES ({vals})'
-            self.execute(sql)
+        if mode == "upsert":
+            self._upsert(full_name, rows, klass, keys)
+            return
+        self._append(full_name, rows, klass)
+
+    def _append(self, full_name: str, rows: list[any], klass: dataclasses.dataclass):
+        if self._should_bulk_load(rows) and self._bulk_load(full_name, rows, klass):
+            return
+        self._insert_batches(full_name, rows, klass)
+
+    def _should_bulk_load(self, rows: list[any]) -> bool:
+        return self._staging is not None and len(rows) >= self._bulk_load_min_rows
+
+    def _overwrite(self, full_name: str, rows: list[any], klass: dataclasses.dataclass):
+        """Replaces the contents of the table in a single Delta commit, so that readers never see a half-written
+        table. Rows are written only once: from the staged Parquet file with bulk load, or from a single statement.
+
+        Otherwise, rows are inserted into a staging table in many commits and copied over with `INSERT OVERWRITE`,
+        which writes them a second time. There is no metadata-only swap for Hive Metastore tables: `RENAME TO` takes
+        two statements, leaving a window without the table, and moves the files of managed tables, while a
+        `SHALLOW CLONE` of the staging table breaks once the staging table is dropped."""
+        if len(rows) == 0:
+            self.execute(f"TRUNCATE TABLE {full_name}")
+            return
+        if self._should_bulk_load(rows) and self._bulk_load(full_name, rows, klass, overwrite=True):
+            return
+        first_row, row_cnt, sql = next(self._batches(full_name, rows, klass, verb="INSERT OVERWRITE"))
+        if row_cnt == len(rows):
+            # rows fit in a single statement, which is a single Delta commit
+            self._insert_batch(first_row, row_cnt, sql)
+            return
+        staging = f"{full_name}_overwrite_{uuid.uuid4().hex[:8]}"
+        self.create_table(staging, klass)
+        try:
+            self._append(staging, rows, klass)
+            columns = ", ".join(row_codec(klass).columns)
+            logger.debug(f"[api][overwrite] {len(rows)} rows into {full_name} from {staging}")
+            self.execute(f"INSERT OVERWRITE {full_name} ({columns}) SELECT {columns} FROM {staging}")
+        finally:
+            self.execute(f"DROP TABLE IF EXISTS {staging}")
+
+    def _upsert(self, full_name: str, rows: list[any], klass: dataclasses.dataclass, keys: list[str]):
+        """Merges rows from a single statement, if they fit, or from a staging table otherwise"""
+        codec = row_codec(klass)
+        source = f'(SELECT * FROM VALUES {{}} AS v({", ".join(codec.columns)}))'
+        overhead = len(self._merge_sql(full_name, source, keys))
+        if not self._should_bulk_load(rows):
+            first_row, row_cnt, values = next(self._values(rows, klass, overhead))
+            if row_cnt == len(rows):
+                self._insert_batch(first_row, row_cnt, self._merge_sql(full_name, source.format(values), keys))
+                return
+        staging = f"{full_name}_upsert_{uuid.uuid4().hex[:8]}"
+        self.create_table(staging, klass)
+        try:
+            self._append(staging, rows, klass)
+            logger.debug(f"[api][merge] {len(rows)} rows into {full_name} from {staging}")
+            self.execute(self._merge_sql(full_name, staging, keys))
+        finally:
+            self.execute(f"DROP TABLE IF EXISTS {staging}")
+
+    def _insert_batches(self, full_name: str, rows: list[any], klass: dataclasses.dataclass):
+        batches = self._batches(full_name, rows, klass)
+        # the first batch runs alone, so that we fail fast on problems common to all batches, like schema mismatch
+        first = next(batches)
+        self._insert_batch(*first)
+        failures = []
+        with ThreadPoolExecutor(self._max_concurrent_batches) as pool:
+            in_flight = deque()
+            for batch in batches:
+                if len(in_flight) >= self._max_concurrent_batches * 2:
+                    self._collect_batch(*in_flight.popleft(), failures)
+                in_flight.append((batch, pool.submit(self._insert_batch, *batch)))
+            while in_flight:
+                self._collect_batch(*in_flight.popleft(), failures)
+        if not failures:
+            return
+        # batches are collected in order of submission, so errors are reported in the order of rows
+        for (first_row, row_cnt, _), err in failures:
+            logger.error(f"[{full_name}] failed to insert rows {first_row}..{first_row + row_cnt - 1}: {err}")
+        (first_row, row_cnt, _), err = failures[0]
+        msg = (
+            f"failed to insert {len(failures)} batches into {full_name}, "
+            f"first failed at rows {first_row}..{first_row + row_cnt - 1}: {err}"
+        )
+        raise RuntimeError(msg) from err
 
     @staticmethod
-    def _row_to_sql(row, fields):
-        data = []
-        for f in fields:
-            value = getattr(row, f.name)
-            if value is None:
-                data.append("NULL")
-            elif f.type == bool:
-                data.append("TRUE" if value else "FALSE")
-            elif f.type == str:
-                value = str(value).replace("'", "''")
-                data.append(f"'{value}'")
-            elif f.type == int:
-                data.append(f"{value}")
+    def _collect_batch(batch: tuple[int, int, str], future, failures: list):
+        try:
+            future.result()
+        except Exception as err:
+            failures.append((batch, err))
+
+    def _insert_batch(self, first_row: int, row_cnt: int, sql: str):
+        logger.debug(f"[api][insert] {row_cnt} rows from #{first_row}, {len(sql)} bytes")
+        self.execute(sql)
+
+    def _batches(
+        self, full_name: str, rows: list[any], klass: dataclasses.dataclass, *, verb: str = "INSERT INTO"
+    ) -> Iterator[tuple[int, int, str]]:
+        """Yields `INSERT INTO` statements with the index of the first row and the number of rows in them"""
+        prefix = f'{verb} {full_name} ({", ".join(row_codec(klass).columns)}) VALUES '
+        for first_row, row_cnt, values in self._values(rows, klass, len(prefix)):
+            yield first_row, row_cnt, prefix + values
+
+    def _values(self, rows: list[any], klass: dataclasses.dataclass, overhead: int) -> Iterator[tuple[int, int, str]]:
+        """Yields batches of rows as SQL `VALUES`, that fit in a statement with `overhead` bytes of other SQL"""
+        codec = row_codec(klass)
+        first_row = 0
+        values = []
+        size = overhead
+        for i, row in enumerate(rows):
+            value = f"({codec.to_sql(row)})"
+            value_size = len(value.encode("utf8")) + 2
+            if values and (len(values) >= self._max_records_per_batch or size + value_size > self._max_bytes_per_batch):
+                yield first_row, len(values), ", ".join(values)
+                first_row, values, size = i, [], overhead
+            values.append(value)
+            size += value_size
+        yield first_row, len(values), ", ".join(values)
+
+    def _bulk_load(self, full_name: str, rows: list[any], klass: dataclasses.dataclass, *, overwrite=False) -> bool:
+        """Loads rows from a staged Parquet file with `COPY INTO`, or replaces the contents of the table with
+        a single `INSERT OVERWRITE` from the file with `overwrite`"""
+        try:
+            data = self._rows_to_parquet(rows, klass)
+        except ImportError:
+            logger.warning("pyarrow is not installed, falling back to INSERT INTO batches")
+            return False
+        location = self._staging.upload(f"{full_name}-{uuid.uuid4().hex}.parquet", data)
+        try:
+            logger.debug(f"[api][bulk-load] {len(rows)} rows into {full_name} from {location}")
+            if overwrite:
+                columns = ", ".join(row_codec(klass).columns)
+                self.execute(f"INSERT OVERWRITE {full_name} ({columns}) SELECT {columns} FROM parquet.`{location}`")
             else:
-                msg = f"unknown type: {f.type}"
-                raise ValueError(msg)
-        return ", ".join(data)
+                self.execute(f"COPY INTO {full_name} FROM '{location}' FILEFORMAT = PARQUET")
+        finally:
+            self._staging.remove(location)
+        return True
+
+    @staticmethod
+    def _rows_to_parquet(rows: list[any], klass: dataclasses.dataclass) -> io.BytesIO:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrow_types = {str: pa.string(), int: pa.int32(), Long: pa.int64(), bool: pa.bool_(), float: pa.float32()}
+        fields = dataclasses.fields(klass)
+        schema = pa.schema([pa.field(f.name, arrow_types[f.type], nullable=f.default is None) for f in fields])
+        columns = [[getattr(row, f.name) for row in rows] for f in fields]
+        buffer = io.BytesIO()
+        pq.write_table(pa.Table.from_arrays(columns, schema=schema), buffer)
+        buffer.seek(0)
+        return buffer
 
 
 class RuntimeBackend(SqlBackend):
@@ -140,15 +450,193 @@ class RuntimeBackend(SqlBackend):
         logger.debug(f"[spark][fetch] {sql}")
         return self._spark.sql(sql).collect()
 
-    def save_table(self, full_name: str, rows: list[any], klass: dataclasses.dataclass, mode: str = "append"):
+    def save_table(
+        self,
+        full_name: str,
+        rows: list[any],
+        klass: dataclasses.dataclass,
+        mode: str = "append",
+        *,
+        keys: list[str] | None = None,
+    ):
         rows = self._filter_none_rows(rows, full_name)
+        if mode == "upsert":
+            rows = self._upsert_rows(rows, klass, keys)
 
         if len(rows) == 0:
             self.create_table(full_name, klass)
+            if mode == "overwrite":
+                self.execute(f"TRUNCATE TABLE {full_name}")
             return
-        # pyspark deals well with lists of dataclass instances, as long as schema is provided
-        df = self._spark.createDataFrame(rows, self._schema_for(rows[0]))
-        df.write.saveAsTable(full_name, mode=mode)
+        codec = row_codec(rows[0])
+        df = self._spark.createDataFrame([codec.to_tuple(row) for row in rows], codec.schema)
+        if mode != "upsert":
+            df.write.saveAsTable(full_name, mode=mode)
+            return
+        self.create_table(full_name, klass)
+        staging = f"ucx_upsert_{uuid.uuid4().hex}"
+        df.createOrReplaceTempView(staging)
+        try:
+            self.execute(self._merge_sql(full_name, staging, keys))
+        finally:
+            self._spark.catalog.dropTempView(staging)
+
+
+_read_tables = re.compile(r"\b(?:FROM|JOIN)\s+([\w`.]+)", re.IGNORECASE)
+_written_table = re.compile(
+    r"^\s*(?:INSERT\s+(?:INTO|OVERWRITE)(?:\s+TABLE)?|DELETE\s+FROM|UPDATE|MERGE\s+INTO|COPY\s+INTO"
+    r"|TRUNCATE\s+TABLE|(?:CREATE|DROP|ALTER)\s+TABLE(?:\s+IF\s+(?:NOT\s+)?EXISTS)?)\s+([\w`.]+)",
+    re.IGNORECASE,
+)
+
+
+def _table_key(name: str) -> str:
+    """Compares tables by schema and table name, as queries may omit the `hive_metastore` catalog"""
+    return ".".join(name.replace("`", "").lower().split(".")[-2:])
+
+
+class SingleFlightBackend(SqlBackend):
+    """Collapses concurrent identical `fetch` calls into a single execution on the wrapped backend
+    and shares the rows with all callers.
+
+    With `cache_ttl`, results are also reused for that long after they are fetched, unless a table
+    they read from is written through this backend. Statements, that write to tables, that can't be
+    recognized, invalidate all cached results."""
+
+    def __init__(self, backend: SqlBackend, *, cache_ttl: dt.timedelta | None = None):
+        self._backend = backend
+        self._cache_ttl = cache_ttl
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, Future] = {}
+        self._cache: dict[str, tuple[float, list[any], set[str]]] = {}
+        self._writes = 0
+
+    def execute(self, sql):
+        written = _written_table.match(sql)
+        self._invalidate(_table_key(written.group(1)) if written else None)
+        self._backend.execute(sql)
+
+    def fetch(self, sql) -> Iterator[any]:
+        # rows are fetched on iteration, like with other backends
+        yield from self._fetch_shared(sql, sql, lambda: self._backend.fetch(sql))
+
+    def fetch_as(
+        self,
+        klass: dataclasses.dataclass,
+        table: str,
+        *,
+        columns: list[str] | None = None,
+        where: str | None = None,
+    ) -> Iterator[any]:
+        # the wrapped backend may read tables in its own way, like Arrow chunks of the Statement Execution API
+        sql = self._select_sql(klass, table, columns, where)
+        key = f"{klass.__module__}.{klass.__qualname__}: {sql}"
+        yield from self._fetch_shared(
+            key, sql, lambda: self._backend.fetch_as(klass, table, columns=columns, where=where)
+        )
+
+    def save_table(
+        self,
+        full_name: str,
+        rows: list[any],
+        klass: dataclasses.dataclass,
+        mode: str = "append",
+        *,
+        keys: list[str] | None = None,
+    ):
+        self._invalidate(_table_key(full_name))
+        self._backend.save_table(full_name, rows, klass, mode, keys=keys)
+
+    def _fetch_shared(self, key: str, sql: str, fetch: Callable[[], Iterable[any]]) -> list[any]:
+        """Shares the result of `fetch`, that runs the `sql` query, between the callers with the same `key`"""
+        with self._lock:
+            cached = self._cache.get(key, None)
+            if cached is not None and cached[0] > time.monotonic():
+                logger.debug(f"[single-flight] cached: {key}")
+                return cached[1]
+            future = self._in_flight.get(key, None)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                writes = self._writes
+        if not leader:
+            logger.debug(f"[single-flight] joined: {key}")
+            return future.result()
+        try:
+            rows = list(fetch())
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        finally:
+            with self._lock:
+                if self._in_flight.get(key, None) is future:
+                    del self._in_flight[key]
+        with self._lock:
+            tables = {_table_key(name) for name in _read_tables.findall(sql)}
+            # results of reads, that have overlapped with writes, may be stale
+            if self._cache_ttl is not None and tables and writes == self._writes:
+                self._cache[key] = (time.monotonic() + self._cache_ttl.total_seconds(), rows, tables)
+        future.set_result(rows)
+        return rows
+
+    def _invalidate(self, table: str | None):
+        with self._lock:
+            self._writes += 1
+            # new reads must not join reads, that have started before the write
+            self._in_flight.clear()
+            if table is None:
+                self._cache.clear()
+                return
+            for key in [key for key, (_, _, tables) in self._cache.items() if table in tables]:
+                del self._cache[key]
+
+
+@dataclass
+class SnapshotProgress:
+    table_name: str
+
+
+@dataclass
+class CrawlMetadata:
+    table_name: str
+    crawled_at: str
+    duration_seconds: float
+    row_count: int
+    ucx_version: str
+
+
+class _SnapshotRegistry:
+    """Process-wide memo of inventory snapshots, so that crawlers sharing the same backend, like `GrantsCrawler`
+    and `TablesCrawler`, fetch every inventory table only once. Entries go away with their backend."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots: weakref.WeakKeyDictionary[SqlBackend, dict[str, list]] = weakref.WeakKeyDictionary()
+
+    def get(self, backend: SqlBackend, full_name: str) -> list | None:
+        with self._lock:
+            return self._snapshots.get(backend, {}).get(full_name, None)
+
+    def put(self, backend: SqlBackend, full_name: str, records: list):
+        with self._lock:
+            self._snapshots.setdefault(backend, {})[full_name] = records
+
+    def invalidate(self, backend: SqlBackend, full_name: str):
+        table = _table_key(full_name)
+        with self._lock:
+            snapshots = self._snapshots.get(backend, {})
+            for name in [name for name in snapshots if _table_key(name) == table]:
+                del snapshots[name]
+
+    def invalidate_written(self, backend: SqlBackend, sql: str):
+        """Invalidates the snapshot of the table, that the statement writes to or alters, if any"""
+        written = _written_table.match(sql)
+        if written is not None:
+            self.invalidate(backend, written.group(1))
+
+
+_snapshots = _SnapshotRegistry()
 
 
 class CrawlerBase:
@@ -168,8 +656,9 @@ class CrawlerBase:
         self._table = self._valid(table)
         self._backend = backend
         self._fetch = backend.fetch
-        self._exec = backend.execute
         self._klass = klass
+        self._persisted_cnt = 0
+        self._max_age = None
 
     @property
     def _full_name(self) -> str:
@@ -215,15 +704,20 @@ class CrawlerBase:
             return None
         return cls._valid(name)
 
-    def _snapshot(self, fetcher, loader) -> list[any]:
+    def _snapshot(self, fetcher, loader, *, max_age: dt.timedelta | None = None) -> list[any]:
         """
         Tries to load dataset of records with `fetcher` function, otherwise automatically creates
         a table with the schema defined in the class of the first row and executes `loader` function
         to populate the dataset.
 
+        Every crawl is recorded in the `crawl_metadata` table. With `max_age`, snapshots crawled longer
+        than `max_age` ago are crawled again and overwritten, and fresh empty snapshots are reused
+        without fetching them.
+
         Args:
             fetcher: A function to fetch existing data.
             loader: A function to load new data.
+            max_age: Maximum age of the snapshot to reuse, `max_age` of the crawler by default.
 
         Exceptions:
         - If a runtime error occurs during fetching (other than "TABLE_OR_VIEW_NOT_FOUND"), the original error is
@@ -232,19 +726,248 @@ class CrawlerBase:
         Returns:
         list[any]: A list of data records, either fetched or loaded.
         """
+        memoized = _snapshots.get(self._backend, self._full_name)
+        if memoized is not None:
+            return list(memoized)
+        cached_results, stale = self._cached_snapshot(fetcher, max_age)
+        if cached_results is not None:
+            return self._memoize(cached_results)
+        logger.debug(f"[{self._full_name}] crawling new batch for {self._table}")
+        started = time.monotonic()
+        loaded_records = list(loader())
+        if stale:
+            self._overwrite_records(loaded_records)
+        else:
+            self._append_records(loaded_records)
+        self._record_crawl(started, len(loaded_records))
+        return self._memoize(loaded_records)
+
+    def _snapshot_stream(
+        self, fetcher, loader, *, chunk_size: int = 1000, max_age: dt.timedelta | None = None
+    ) -> Iterator[any]:
+        """
+        Same as `_snapshot`, but yields records as soon as `loader` yields them and persists them in chunks
+        of `chunk_size`, so that neither the crawler nor its consumer keep the whole crawl in memory and a failure
+        near the end of a long crawl doesn't lose the records crawled so far.
+
+        A started crawl is marked in the `snapshot_progress` table until it completes. If the marker is found,
+        the snapshot is partial: records persisted by the interrupted crawl are fetched and passed to `loader`,
+        so that it can skip them, and the crawl resumes. The marker is only read when the inventory is about
+        to be fetched or crawled, not for memoized or fresh empty snapshots. A crawl, that the consumer stops
+        iterating, is left partial in the same way.
+
+        A stale snapshot is kept as it is while it is crawled again: new records are persisted in a `_refresh`
+        staging table, which replaces the contents of the inventory with a single statement once the crawl completes.
+
+        Args:
+            fetcher: A function to fetch existing data.
+            loader: A function, that takes the list of already persisted records and yields new ones.
+            chunk_size: Number of records to persist at once.
+            max_age: Maximum age of the snapshot to reuse, `max_age` of the crawler by default.
+
+        Yields:
+        Data records, either fetched or loaded.
+        """
+        memoized = _snapshots.get(self._backend, self._full_name)
+        if memoized is not None:
+            yield from memoized
+            return
+        stale, empty = self._staleness(max_age)
+        if empty:
+            yield from self._memoize([])
+            return
+        persisted = []
+        target = self._full_name
+        if self._is_partial_snapshot():
+            refreshed = self._try_refresh_records()
+            if refreshed is not None:
+                target, persisted = self._refresh_full_name, refreshed
+            else:
+                persisted = list(fetcher())
+            logger.info(f"[{target}] resuming partial snapshot of {len(persisted)} records")
+        else:
+            if not stale:
+                cached_results, stale = self._fetch_cached(fetcher, unknown_age=stale is None)
+                if cached_results is not None:
+                    yield from self._memoize(cached_results)
+                    return
+            if stale:
+                target = self._refresh_full_name
+                self._exec(f"DROP TABLE IF EXISTS {target}")
+                self._backend.create_table(target, self._klass)
+            self._backend.save_table(self._progress_full_name, [SnapshotProgress(self._table)], SnapshotProgress)
+        logger.debug(f"[{self._full_name}] crawling new batch for {self._table}")
+        started = time.monotonic()
+        self._persisted_cnt = len(persisted)
+        yield from persisted
+        chunk = []
+        for record in loader(persisted):
+            chunk.append(record)
+            yield record
+            if len(chunk) >= chunk_size:
+                self._persist_chunk(chunk, target)
+                chunk = []
+        if chunk or self._persisted_cnt == 0:
+            self._persist_chunk(chunk, target)
+        if target != self._full_name:
+            self._replace_from(target)
+        escaped = self._table.replace("'", "''")
+        self._exec(f"DELETE FROM {self._progress_full_name} WHERE table_name = '{escaped}'")
+        self._record_crawl(started, self._persisted_cnt)
+
+    @property
+    def max_age(self) -> dt.timedelta | None:
+        """Snapshots older than this are crawled again. Snapshots are reused forever, if None"""
+        return self._max_age
+
+    @max_age.setter
+    def max_age(self, value: dt.timedelta | None):
+        self._max_age = value
+
+    def _cached_snapshot(self, fetcher, max_age: dt.timedelta | None) -> tuple[list[any] | None, bool]:
+        """Returns records of the previous snapshot, if it can be reused, and whether it is stale"""
+        stale, empty = self._staleness(max_age)
+        if stale:
+            return None, True
+        if empty:
+            return [], False
+        return self._fetch_cached(fetcher, unknown_age=stale is None)
+
+    def _staleness(self, max_age: dt.timedelta | None) -> tuple[bool | None, bool]:
+        """Checks the latest recorded crawl and returns whether the snapshot is stale, or None if no crawl is
+        recorded while `max_age` is set, and whether it is fresh and empty, so that it doesn't have to be fetched"""
+        if max_age is None:
+            max_age = self._max_age
+        if max_age is None:
+            return False, False
+        latest = self._latest_crawl()
+        if latest is None:
+            return None, False
+        age = dt.datetime.now(dt.timezone.utc) - dt.datetime.fromisoformat(latest.crawled_at)
+        if age > max_age:
+            logger.info(f"[{self._full_name}] snapshot is stale: crawled {age} ago, max age is {max_age}")
+            return True, False
+        return False, latest.row_count == 0
+
+    def _fetch_cached(self, fetcher, *, unknown_age: bool) -> tuple[list[any] | None, bool]:
+        """Fetches records of the previous snapshot, that is not known to be stale, and returns them, if they can
+        be reused, and whether the snapshot is stale"""
         logger.debug(f"[{self._full_name}] fetching {self._table} inventory")
         try:
             cached_results = list(fetcher())
-            if len(cached_results) > 0:
-                return cached_results
         except Exception as err:
             if "TABLE_OR_VIEW_NOT_FOUND" not in str(err):
                 raise err
-        logger.debug(f"[{self._full_name}] crawling new batch for {self._table}")
-        loaded_records = list(loader())
-        self._append_records(loaded_records)
-        return loaded_records
+            return None, False
+        if len(cached_results) == 0:
+            return None, False
+        if unknown_age:
+            logger.info(f"[{self._full_name}] snapshot is stale: no crawl is recorded")
+            return None, True
+        return cached_results, False
+
+    @property
+    def _metadata_full_name(self) -> str:
+        return f"{self._catalog}.{self._schema}.crawl_metadata"
+
+    def _latest_crawl(self) -> CrawlMetadata | None:
+        escaped = self._table.replace("'", "''")
+        where = (
+            f"table_name = '{escaped}' AND crawled_at = "
+            f"(SELECT MAX(crawled_at) FROM {self._metadata_full_name} WHERE table_name = '{escaped}')"
+        )
+        try:
+            for metadata in self._backend.fetch_as(CrawlMetadata, self._metadata_full_name, where=where):
+                return metadata
+        except Exception as err:
+            if "TABLE_OR_VIEW_NOT_FOUND" not in str(err):
+                raise err
+        return None
+
+    def _record_crawl(self, started: float, row_count: int):
+        metadata = CrawlMetadata(
+            table_name=self._table,
+            crawled_at=dt.datetime.now(dt.timezone.utc).isoformat(),
+            duration_seconds=time.monotonic() - started,
+            row_count=row_count,
+            ucx_version=__version__,
+        )
+        self._backend.save_table(self._metadata_full_name, [metadata], CrawlMetadata)
+
+    @property
+    def persisted_cnt(self) -> int:
+        """Number of records persisted so far by the running `_snapshot_stream`"""
+        return self._persisted_cnt
+
+    @property
+    def _progress_full_name(self) -> str:
+        return f"{self._catalog}.{self._schema}.snapshot_progress"
+
+    def _is_partial_snapshot(self) -> bool:
+        escaped = self._table.replace("'", "''")
+        try:
+            markers = self._fetch(f"SELECT table_name FROM {self._progress_full_name} WHERE table_name = '{escaped}'")
+            return len(list(markers)) > 0
+        except Exception as err:
+            if "TABLE_OR_VIEW_NOT_FOUND" not in str(err):
+                raise err
+            return False
+
+    def _persist_chunk(self, chunk: list[any], target: str):
+        if target == self._full_name:
+            self._append_records(chunk)
+        else:
+            self._backend.save_table(target, chunk, self._klass, mode="append")
+        self._persisted_cnt += len(chunk)
+        logger.info(f"[{target}] persisted {self._persisted_cnt} records so far")
+
+    @property
+    def _refresh_full_name(self) -> str:
+        return f"{self._full_name}_refresh"
+
+    def _try_refresh_records(self) -> list[any] | None:
+        """Returns records persisted by an interrupted crawl of a stale snapshot, if there was one"""
+        try:
+            return list(self._backend.fetch_as(self._klass, self._refresh_full_name))
+        except Exception as err:
+            if "TABLE_OR_VIEW_NOT_FOUND" not in str(err):
+                raise err
+            return None
+
+    def _replace_from(self, staging: str):
+        """Replaces the snapshot with records of the staging table in a single statement and drops it.
+
+        The staging table is filled in chunks over many commits, possibly across runs, so its records are copied
+        once more by `INSERT OVERWRITE`, as Hive Metastore has no atomic metadata-only swap of tables."""
+        logger.debug(f"[{self._full_name}] replacing snapshot with records of {staging}")
+        _snapshots.invalidate(self._backend, self._full_name)
+        columns = ", ".join(row_codec(self._klass).columns)
+        self._backend.create_table(self._full_name, self._klass)
+        self._exec(f"INSERT OVERWRITE {self._full_name} ({columns}) SELECT {columns} FROM {staging}")
+        self._exec(f"DROP TABLE IF EXISTS {staging}")
+
+    def _exec(self, sql: str):
+        try:
+            self._backend.execute(sql)
+        finally:
+            # memoized snapshots must not survive writes and DDL, like DELETE or DROP TABLE, of any crawler
+            _snapshots.invalidate_written(self._backend, sql)
+
+    def _memoize(self, records: list[any]) -> list[any]:
+        _snapshots.put(self._backend, self._full_name, records)
+        return list(records)
+
+    def _overwrite_records(self, items):
+        logger.debug(f"[{self._full_name}] replacing snapshot with {len(items)} new records for {self._table}")
+        _snapshots.invalidate(self._backend, self._full_name)
+        self._backend.save_table(self._full_name, items, self._klass, mode="overwrite")
+
+    def _upsert_records(self, items, keys: list[str]):
+        logger.debug(f"[{self._full_name}] upserting {len(items)} records for {self._table}")
+        _snapshots.invalidate(self._backend, self._full_name)
+        self._backend.save_table(self._full_name, items, self._klass, mode="upsert", keys=keys)
 
     def _append_records(self, items):
         logger.debug(f"[{self._full_name}] found {len(items)} new records for {self._table}")
+        _snapshots.invalidate(self._backend, self._full_name)
         self._backend.save_table(self._full_name, items, self._klass, mode="append")
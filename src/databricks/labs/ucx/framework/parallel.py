@@ -1,23 +1,409 @@
+import asyncio
 import concurrent
+import contextlib
+import dataclasses
 import datetime as dt
 import functools
+import hashlib
+import heapq
+import inspect
+import json
 import logging
+import math
 import os
 import threading
-from collections.abc import Callable
-from concurrent.futures import ThreadPoolExecutor
-from typing import Generic, TypeVar
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator, Sized
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from enum import Enum
+from typing import ClassVar, Generic, TypeVar
+
+from databricks.sdk import WorkspaceClient
+from databricks.sdk.core import DatabricksError
+
+from databricks.labs.ucx.framework.checkpoints import Checkpoint
 
 Result = TypeVar("Result")
 logger = logging.getLogger(__name__)
 
 
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[idx]
+
+
+def _task_name(task: Callable) -> str:
+    if isinstance(task, functools.partial):
+        task = task.func
+    return getattr(task, "__name__", type(task).__name__)
+
+
+_MAX_KEY_ARG_LENGTH = 64
+
+
+def _stable(value: any) -> any:
+    """Converts the value into JSON-compatible data, that does not depend on memory addresses"""
+    if value is None or isinstance(value, str | int | float | bool):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _stable(v) for k, v in value.items()}
+    if isinstance(value, list | tuple):
+        return [_stable(v) for v in value]
+    if isinstance(value, set | frozenset):
+        return sorted((_stable(v) for v in value), key=repr)
+    if hasattr(value, "as_dict"):
+        # dataclasses of Databricks SDK, like `AccessControlRequest`
+        return _stable(value.as_dict())
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return _stable(dataclasses.asdict(value))
+    if type(value).__repr__ is object.__repr__:
+        return type(value).__qualname__
+    return str(value)
+
+
+def _key_arg(arg: any) -> str:
+    """Keeps short scalar arguments, like object types and IDs, and hashes the rest, like access control lists"""
+    if arg is None or isinstance(arg, str | int | float | bool):
+        text = str(arg)
+        if len(text) <= _MAX_KEY_ARG_LENGTH:
+            return text
+    else:
+        text = json.dumps(_stable(arg), sort_keys=True, default=str)
+    return f"#{hashlib.sha256(text.encode('utf8')).hexdigest()[:16]}"
+
+
+def task_key(task: Callable) -> str:
+    """Deterministic key of a task, like `_crawler_task(notebooks, 123)` for a partial. Arguments, that are not
+    short scalars, are replaced with a hash of their contents, like `_applier_task(clusters, 123, #0a1b2c3d4e5f6a7b)`,
+    so that keys stay bounded and do not change between runs."""
+    if not isinstance(task, functools.partial):
+        return _task_name(task)
+    args = [_key_arg(arg) for arg in task.args]
+    args += [f"{k}={_key_arg(v)}" for k, v in task.keywords.items()]
+    return f"{_task_name(task)}({', '.join(args)})"
+
+
+# arguments, that name the kind of objects of a task, like `_crawler_task(object_type="notebooks", ...)`
+_LABEL_PARAMETERS = ("object_type", "property_name")
+
+
+def task_label(task: Callable) -> str:
+    """Groups tasks by function name and the kind of objects, like `_crawler_task:notebooks`. The kind is taken only
+    from the `object_type` or `property_name` argument, so that the number of labels does not grow with the number
+    of objects, as it would with object IDs."""
+    name = _task_name(task)
+    if not isinstance(task, functools.partial):
+        return name
+    try:
+        arguments = inspect.signature(task.func).bind_partial(*task.args, **task.keywords).arguments
+    except (TypeError, ValueError):
+        return name
+    for parameter in _LABEL_PARAMETERS:
+        kind = arguments.get(parameter, None)
+        if kind is None:
+            continue
+        if isinstance(kind, Enum):
+            kind = kind.value
+        return f"{name}:{kind}"
+    return name
+
+
+@dataclass
+class TaskLatency:
+    gather: str
+    label: str
+    count: int
+    failed: int
+    p50: float
+    p95: float
+    p99: float
+    slowest: float
+
+
+@dataclass
+class SlowTask:
+    gather: str
+    label: str
+    key: str
+    seconds: float
+
+
+class _Histogram:
+    """Log-scale latency histogram with ~5% precision and constant memory"""
+
+    _base = 1.05
+    _min_seconds = 0.001
+
+    def __init__(self):
+        self.buckets: dict[int, int] = defaultdict(int)
+        self.count = 0
+        self.failed = 0
+        self.max = 0.0
+
+    def add(self, seconds: float, *, failed: bool):
+        bucket = 0
+        if seconds > self._min_seconds:
+            bucket = int(math.log(seconds / self._min_seconds, self._base)) + 1
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.failed += 1 if failed else 0
+        self.max = max(self.max, seconds)
+
+    def percentile(self, pct: float) -> float:
+        rank = math.ceil(self.count * pct / 100)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                # upper bound of the bucket, but never more than the slowest task
+                return min(self.max, self._min_seconds * self._base**bucket)
+        return self.max
+
+
+class TaskStats:
+    """Records wall time of every task in a gather, grouped by `label` (see `task_label`).
+
+    Memory footprint doesn't depend on the number of tasks: latencies are kept in log-scale
+    histograms, only `top_n` slowest tasks are remembered and throughput is counted
+    in windows of `window_seconds`."""
+
+    def __init__(
+        self,
+        *,
+        top_n: int = 10,
+        window_seconds: int = 60,
+        label: Callable[[Callable], str] = task_label,
+    ):
+        self._top_n = top_n
+        self._window_seconds = window_seconds
+        self._label = label
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._histograms: dict[str, _Histogram] = defaultdict(_Histogram)
+        self._slowest: list[tuple[float, int, str, str]] = []
+        self._windows: dict[int, int] = defaultdict(int)
+        self._seq = 0
+        self._gather = None
+
+    def record(self, task: Callable, seconds: float, *, failed: bool = False):
+        label = self._label(task)
+        with self._lock:
+            self._histograms[label].add(seconds, failed=failed)
+            window = int((time.monotonic() - self._started) / self._window_seconds)
+            self._windows[window] += 1
+            self._seq += 1
+            if len(self._slowest) < self._top_n:
+                heapq.heappush(self._slowest, (seconds, self._seq, label, task_key(task)))
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, (seconds, self._seq, label, task_key(task)))
+
+    def latencies(self) -> list[TaskLatency]:
+        with self._lock:
+            return [
+                TaskLatency(
+                    gather=self._gather,
+                    label=label,
+                    count=h.count,
+                    failed=h.failed,
+                    p50=h.percentile(50),
+                    p95=h.percentile(95),
+                    p99=h.percentile(99),
+                    slowest=h.max,
+                )
+                for label, h in sorted(self._histograms.items())
+            ]
+
+    def slowest(self) -> list[SlowTask]:
+        with self._lock:
+            return [
+                SlowTask(gather=self._gather, label=label, key=key, seconds=seconds)
+                for seconds, _, label, key in sorted(self._slowest, reverse=True)
+            ]
+
+    def throughput(self) -> list[tuple[int, float]]:
+        """Returns (seconds since start, tasks per second) for every window"""
+        with self._lock:
+            if not self._windows:
+                return []
+            last = max(self._windows)
+            return [(i * self._window_seconds, self._windows[i] / self._window_seconds) for i in range(last + 1)]
+
+    def report(self, gather: str):
+        self._gather = gather
+        for latency in self.latencies():
+            logger.info(
+                f"'{gather}' latency for {latency.label}: {latency.count} tasks ({latency.failed} failed), "
+                f"p50={latency.p50:.3f}s p95={latency.p95:.3f}s p99={latency.p99:.3f}s max={latency.slowest:.3f}s"
+            )
+        for slow in self.slowest():
+            logger.info(f"'{gather}' slow task {slow.key}: {slow.seconds:.3f}s")
+        series = ", ".join(f"{rps:.1f}" for _, rps in self.throughput())
+        logger.info(f"'{gather}' throughput per {self._window_seconds}s window (tasks/sec): {series}")
+
+
+class AdaptiveConcurrency:
+    """Additive-increase/multiplicative-decrease (AIMD) controller for the number of tasks in flight.
+
+    It starts with a low limit and, after every window of completed tasks, increases it by `increase_by` as long as
+    the p95 latency stays within `latency_tolerance` times the best p95 seen so far and the error rate stays below
+    `max_error_rate`. HTTP 429/503 responses, `DatabricksError` throttling codes and degraded latency cut the limit
+    by `decrease_factor`. The first signal cuts the limit right away, later ones at most once per window, so that
+    a burst of throttled requests counts as a single signal.
+
+    Databricks SDK retries throttled requests internally, so tasks rarely fail with them. Use `watch()` on the
+    workspace client of the tasks to count the retried requests as well. The controller only decides how many
+    tasks are in flight, so keep the request rate of the tasks bounded, e.g. with `rate_limited`.
+    """
+
+    _throttling_error_codes: ClassVar[set[str]] = {"TOO_MANY_REQUESTS", "TEMPORARILY_UNAVAILABLE"}
+    _throttling_status_codes: ClassVar[set[int]] = {429, 503}
+
+    def __init__(
+        self,
+        *,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase_by: int = 1,
+        decrease_factor: float = 0.5,
+        max_error_rate: float = 0.05,
+        latency_tolerance: float = 2.0,
+    ):
+        self._limit = initial
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._increase_by = increase_by
+        self._decrease_factor = decrease_factor
+        self._max_error_rate = max_error_rate
+        self._latency_tolerance = latency_tolerance
+        self._lock = threading.Lock()
+        self._latencies: list[float] = []
+        self._errors = 0
+        self._throttled = False
+        self._best_p95 = None
+        self._decreased = False
+        self._since_decrease = 0
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def max_limit(self) -> int:
+        return self._max_limit
+
+    @classmethod
+    def is_throttling(cls, err: BaseException | None) -> bool:
+        """Checks the error and its causes for HTTP 429/503 and throttling error codes"""
+        while err is not None:
+            if isinstance(err, DatabricksError):
+                if err.error_code in cls._throttling_error_codes:
+                    return True
+                if err.retry_after_secs is not None:
+                    # Databricks SDK only parses Retry-After header for HTTP 429 and 503
+                    return True
+            response = getattr(err, "response", None)
+            if getattr(response, "status_code", None) in cls._throttling_status_codes:
+                return True
+            err = err.__cause__
+        return False
+
+    def throttled(self):
+        """Records a throttled request, that has not failed the task, e.g. because it was retried"""
+        with self._lock:
+            self._decrease("throttled")
+
+    @contextlib.contextmanager
+    def watch(self, ws: WorkspaceClient):
+        """Records requests of `ws`, that were retried by the SDK, while in the context. SDK authenticates every
+        attempt of a request, so `ApiClient.do` calls, that authenticated more than once, were retried, mostly
+        because of HTTP 429 and 503 responses."""
+        api_client, config = ws.api_client, ws.config
+        do, authenticate = api_client.do, config.authenticate
+        attempts = threading.local()
+
+        def counted_authenticate(*args, **kwargs):
+            attempts.count = getattr(attempts, "count", 0) + 1
+            return authenticate(*args, **kwargs)
+
+        def watched_do(*args, **kwargs):
+            attempts.count = 0
+            try:
+                return do(*args, **kwargs)
+            finally:
+                if attempts.count > 1:
+                    self.throttled()
+
+        api_client.do, config.authenticate = watched_do, counted_authenticate
+        try:
+            yield self
+        finally:
+            api_client.do, config.authenticate = do, authenticate
+
+    def record(self, seconds: float, err: Exception | None = None):
+        with self._lock:
+            self._since_decrease += 1
+            if self.is_throttling(err):
+                self._decrease("throttled")
+                return
+            self._latencies.append(seconds)
+            if err is not None:
+                self._errors += 1
+            if len(self._latencies) < max(self._limit, 10):
+                return
+            latencies = sorted(self._latencies)
+            error_rate = self._errors / len(latencies)
+            self._latencies = []
+            self._errors = 0
+            p95 = _percentile(latencies, 95)
+            if self._best_p95 is None or p95 < self._best_p95:
+                self._best_p95 = p95
+            if p95 > self._best_p95 * self._latency_tolerance:
+                self._decrease(f"p95 latency {p95:.3f}s")
+            elif error_rate <= self._max_error_rate:
+                self._limit = min(self._max_limit, self._limit + self._increase_by)
+
+    def _decrease(self, reason: str):
+        if self._decreased and self._since_decrease < self._limit:
+            # tasks submitted before the previous decrease are still completing
+            return
+        new_limit = max(self._min_limit, int(self._limit * self._decrease_factor))
+        logger.debug(f"Decreasing concurrency from {self._limit} to {new_limit}: {reason}")
+        self._limit = new_limit
+        self._decreased = True
+        self._since_decrease = 0
+        self._latencies = []
+        self._errors = 0
+
+
 class Threads(Generic[Result]):
-    def __init__(self, name, tasks: list[Callable[..., Result]], num_threads: int):
+    def __init__(
+        self,
+        name,
+        tasks: Iterable[Callable[..., Result]],
+        num_threads: int,
+        *,
+        max_in_flight: int | None = None,
+        concurrency: AdaptiveConcurrency | None = None,
+        stats: TaskStats | None = None,
+        checkpoint: Checkpoint | None = None,
+    ):
         self._name = name
         self._tasks = tasks
+        self._total_cnt = len(tasks) if isinstance(tasks, Sized) else None
         self._task_fail_error_pct = 50
         self._num_threads = num_threads
+        if max_in_flight is None:
+            max_in_flight = num_threads * 2
+        self._max_in_flight = max_in_flight
+        self._concurrency = concurrency
+        self._stats = stats
+        self._checkpoint = checkpoint
+        self._submitted_cnt = 0
         self._started = dt.datetime.now()
         self._lock = threading.Lock()
         self._completed_cnt = 0
@@ -25,9 +411,83 @@ class Threads(Generic[Result]):
         self._default_log_every = 100
 
     @classmethod
-    def gather(cls, name: str, tasks: list[Callable[..., Result]]) -> (list[Result], list[Exception]):
+    def gather(
+        cls,
+        name: str,
+        tasks: list[Callable[..., Result]],
+        *,
+        concurrency: AdaptiveConcurrency | None = None,
+        stats: TaskStats | None = None,
+        checkpoint: Checkpoint | None = None,
+    ) -> (list[Result], list[Exception]):
+        if concurrency is not None or checkpoint is not None:
+            collected = []
+            errors = cls.gather_into(
+                name, tasks, collected.append, concurrency=concurrency, stats=stats, checkpoint=checkpoint
+            )
+            return collected, errors
+        num_threads = os.cpu_count() * 2
+        return cls(name, tasks, num_threads=num_threads, stats=stats)._run()
+
+    @classmethod
+    def stream(
+        cls,
+        name: str,
+        tasks: Iterable[Callable[..., Result]],
+        *,
+        max_in_flight: int | None = None,
+        concurrency: AdaptiveConcurrency | None = None,
+        stats: TaskStats | None = None,
+        checkpoint: Checkpoint | None = None,
+    ) -> Iterator[Result]:
+        """Lazily consumes `tasks` and yields non-empty results as soon as they complete. Only `max_in_flight`
+        tasks are submitted to the pool at any point in time, so that the memory footprint depends on the
+        concurrency and not on the total number of tasks. Failed tasks are logged and skipped.
+
+        With `concurrency`, the number of tasks in flight is driven by the given AIMD controller instead.
+        With `stats`, wall time of every task is recorded and reported at the end.
+        With `checkpoint`, tasks completed in the previous runs are skipped (see `task_key`) and the outcome
+        of every task is recorded once the consumer has received its result."""
+        streaming = cls._streaming(
+            name, tasks, max_in_flight=max_in_flight, concurrency=concurrency, stats=stats, checkpoint=checkpoint
+        )
+        for result, err in streaming:
+            if err is not None:
+                continue
+            yield result
+
+    @classmethod
+    def gather_into(
+        cls,
+        name: str,
+        tasks: Iterable[Callable[..., Result]],
+        sink: Callable[[Result], None],
+        *,
+        max_in_flight: int | None = None,
+        concurrency: AdaptiveConcurrency | None = None,
+        stats: TaskStats | None = None,
+        checkpoint: Checkpoint | None = None,
+    ) -> list[Exception]:
+        """Same as `stream`, but hands every non-empty result over to `sink` on the calling thread
+        and returns the errors of failed tasks."""
+        errors = []
+        streaming = cls._streaming(
+            name, tasks, max_in_flight=max_in_flight, concurrency=concurrency, stats=stats, checkpoint=checkpoint
+        )
+        for result, err in streaming:
+            if err is not None:
+                errors.append(err)
+                continue
+            sink(result)
+        return errors
+
+    @classmethod
+    def _streaming(cls, name: str, tasks: Iterable[Callable[..., Result]], **kwargs):
         num_threads = os.cpu_count() * 2
-        return cls(name, tasks, num_threads=num_threads)._run()
+        concurrency = kwargs.get("concurrency", None)
+        if concurrency is not None:
+            num_threads = concurrency.max_limit
+        yield from cls(name, tasks, num_threads=num_threads, **kwargs)._stream()
 
     def _run(self) -> (list[Result], list[Exception]):
         given_cnt = len(self._tasks)
@@ -49,9 +509,93 @@ class Threads(Generic[Result]):
                 continue
             collected.append(result)
         self._on_finish(given_cnt, len(errors))
+        if self._stats is not None:
+            self._stats.report(self._name)
 
         return collected, errors
 
+    def _stream(self) -> Iterator[tuple[Result, Exception | None]]:
+        try:
+            yield from self._stream_tasks()
+        finally:
+            self._finish_checkpoint()
+
+    def _finish_checkpoint(self):
+        if self._checkpoint is not None:
+            # the last records would otherwise stay buffered, if the gather has not reached `flush_every`
+            self._checkpoint.finish()
+
+    def _stream_tasks(self) -> Iterator[tuple[Result, Exception | None]]:
+        logger.debug(f"Streaming tasks in {self._num_threads} threads, {self._max_in_flight} in flight at most")
+        completed = set()
+        if self._checkpoint is not None:
+            completed = self._checkpoint.completed(self._name)
+        skipped_cnt = 0
+        failed_cnt = 0
+        with ThreadPoolExecutor(self._num_threads) as pool:
+            in_flight = {}
+            for task in self._tasks:
+                key = None
+                if self._checkpoint is not None:
+                    key = task_key(task)
+                    if key in completed:
+                        skipped_cnt += 1
+                        continue
+                while len(in_flight) >= self._in_flight_limit():
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for result, err in self._drain(done, in_flight):
+                        failed_cnt += 0 if err is None else 1
+                        yield result, err
+                self._submitted_cnt += 1
+                future = pool.submit(self._measured(task))
+                future.add_done_callback(self._progress_report)
+                in_flight[future] = key
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for result, err in self._drain(done, in_flight):
+                    failed_cnt += 0 if err is None else 1
+                    yield result, err
+        if skipped_cnt > 0:
+            logger.info(f"Skipped {skipped_cnt} '{self._name}' tasks completed in the previous runs")
+        if self._submitted_cnt > 0:
+            self._on_finish(self._submitted_cnt, failed_cnt)
+        if self._stats is not None:
+            self._stats.report(self._name)
+        if self._concurrency is not None:
+            logger.info(f"'{self._name}' settled on concurrency of {self._concurrency.limit} tasks in flight")
+
+    def _drain(self, done, in_flight: dict) -> Iterator[tuple[Result, Exception | None]]:
+        for future in done:
+            key = in_flight.pop(future)
+            result, err = future.result()
+            if err is not None or result is not None:
+                yield result, err
+            if key is not None:
+                # recorded only after the consumer got the result
+                self._checkpoint.record(self._name, key, failed=err is not None)
+
+    def _in_flight_limit(self) -> int:
+        if self._concurrency is not None:
+            return self._concurrency.limit
+        return self._max_in_flight
+
+    def _measured(self, task):
+        wrapped = self._wrap_result(task, self._name)
+        if self._concurrency is None and self._stats is None:
+            return wrapped
+
+        def inner():
+            started = time.monotonic()
+            result, err = wrapped()
+            seconds = time.monotonic() - started
+            if self._concurrency is not None:
+                self._concurrency.record(seconds, err)
+            if self._stats is not None:
+                self._stats.record(task, seconds, failed=err is not None)
+            return result, err
+
+        return inner
+
     def _on_finish(self, given_cnt, failed_cnt):
         since = dt.datetime.now() - self._started
         failed_pct = 0
@@ -71,15 +615,16 @@ class Threads(Generic[Result]):
         with ThreadPoolExecutor(self._num_threads) as pool:
             futures = []
             for task in self._tasks:
-                future = pool.submit(self._wrap_result(task, self._name))
+                future = pool.submit(self._measured(task))
                 future.add_done_callback(self._progress_report)
                 futures.append(future)
             return concurrent.futures.as_completed(futures)
 
     def _progress_report(self, _):
-        total_cnt = len(self._tasks)
+        total_cnt = self._total_cnt
         log_every = self._default_log_every
-        if total_cnt > self._large_log_every:
+        if total_cnt is None or total_cnt > self._large_log_every:
+            # with streamed tasks we don't know the total upfront
             log_every = 500
         elif total_cnt <= self._default_log_every:
             log_every = 10
@@ -88,7 +633,8 @@ class Threads(Generic[Result]):
             since = dt.datetime.now() - self._started
             rps = self._completed_cnt / since.total_seconds()
             if self._completed_cnt % log_every == 0 or self._completed_cnt == total_cnt:
-                msg = f"{self._name} {self._completed_cnt}/{total_cnt}, rps: {rps:.3f}/sec"
+                total = total_cnt if total_cnt is not None else f"{self._submitted_cnt} submitted"
+                msg = f"{self._name} {self._completed_cnt}/{total}, rps: {rps:.3f}/sec"
                 logger.info(msg)
 
     @staticmethod
@@ -104,3 +650,240 @@ class Threads(Generic[Result]):
                 return None, err
 
         return inner
+
+
+class AsyncTasks(Threads[Result]):
+    """Runs tasks on a single asyncio event loop instead of a pool of OS threads, so that hundreds of
+    REST calls can be in flight at once (see `AsyncApiClient`). Coroutine functions are awaited on the loop,
+    blocking callables are offloaded to the default executor of the loop. Task listing may block as well,
+    so it is advanced in the executor too.
+
+    Semantics of `stats` and `checkpoint` are the same as in `Threads.stream`."""
+
+    def __init__(
+        self,
+        name,
+        tasks: Iterable[Callable[..., Result]],
+        *,
+        max_in_flight: int = 256,
+        stats: TaskStats | None = None,
+        checkpoint: Checkpoint | None = None,
+    ):
+        super().__init__(name, tasks, max_in_flight, max_in_flight=max_in_flight, stats=stats, checkpoint=checkpoint)
+
+    @classmethod
+    def gather(
+        cls,
+        name: str,
+        tasks: Iterable[Callable[..., Result]],
+        *,
+        max_in_flight: int = 256,
+        stats: TaskStats | None = None,
+        checkpoint: Checkpoint | None = None,
+    ) -> (list[Result], list[Exception]):
+        collected = []
+        errors = cls.gather_into(
+            name, tasks, collected.append, max_in_flight=max_in_flight, stats=stats, checkpoint=checkpoint
+        )
+        return collected, errors
+
+    @classmethod
+    def gather_into(
+        cls,
+        name: str,
+        tasks: Iterable[Callable[..., Result]],
+        sink: Callable[[Result], None],
+        *,
+        max_in_flight: int = 256,
+        stats: TaskStats | None = None,
+        checkpoint: Checkpoint | None = None,
+    ) -> list[Exception]:
+        """Runs the tasks on a new event loop, hands every non-empty result over to `sink` on the calling thread
+        and returns the errors of failed tasks. Use `run_into` from within a running event loop."""
+        runner = cls(name, tasks, max_in_flight=max_in_flight, stats=stats, checkpoint=checkpoint)
+        return asyncio.run(runner.run_into(sink))
+
+    async def run_into(self, sink: Callable[[Result], None]) -> list[Exception]:
+        try:
+            return await self._run_into(sink)
+        finally:
+            await asyncio.get_running_loop().run_in_executor(None, self._finish_checkpoint)
+
+    async def _run_into(self, sink: Callable[[Result], None]) -> list[Exception]:
+        logger.debug(f"Running tasks on event loop, {self._max_in_flight} in flight at most")
+        loop = asyncio.get_running_loop()
+        completed = set()
+        if self._checkpoint is not None:
+            completed = await loop.run_in_executor(None, self._checkpoint.completed, self._name)
+        skipped_cnt = 0
+        errors = []
+        in_flight = {}
+        iterator = iter(self._tasks)
+        sentinel = object()
+        while True:
+            task = await loop.run_in_executor(None, next, iterator, sentinel)
+            if task is sentinel:
+                break
+            key = None
+            if self._checkpoint is not None:
+                key = task_key(task)
+                if key in completed:
+                    skipped_cnt += 1
+                    continue
+            while len(in_flight) >= self._max_in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                self._drain_into(done, in_flight, sink, errors)
+            self._submitted_cnt += 1
+            in_flight[asyncio.create_task(self._measured_async(task))] = key
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            self._drain_into(done, in_flight, sink, errors)
+        if skipped_cnt > 0:
+            logger.info(f"Skipped {skipped_cnt} '{self._name}' tasks completed in the previous runs")
+        if self._submitted_cnt > 0:
+            self._on_finish(self._submitted_cnt, len(errors))
+        if self._stats is not None:
+            self._stats.report(self._name)
+        return errors
+
+    def _drain_into(self, done, in_flight: dict, sink: Callable[[Result], None], errors: list[Exception]):
+        for future in done:
+            key = in_flight.pop(future)
+            result, err = future.result()
+            if err is not None:
+                errors.append(err)
+            elif result is not None:
+                sink(result)
+            if key is not None:
+                # recorded only after the sink got the result
+                self._checkpoint.record(self._name, key, failed=err is not None)
+
+    async def _measured_async(self, task):
+        started = time.monotonic()
+        try:
+            if inspect.iscoroutinefunction(task):
+                result, err = await task(), None
+            else:
+                loop = asyncio.get_running_loop()
+                result, err = await loop.run_in_executor(None, task), None
+        except Exception as e:
+            logger.error(f"{self._name} task failed: {e!s}")
+            result, err = None, e
+        if self._stats is not None:
+            self._stats.record(task, time.monotonic() - started, failed=err is not None)
+        self._progress_report(None)
+        return result, err
+
+
+class LongestFirst(Generic[Result]):
+    """Runs tasks with estimated costs, like the bytes to copy, longest-processing-time-first, so that a few large
+    tasks don't start last and dominate the wall-clock time. At most `max_large` tasks costing `large_cost` or more
+    run at once, while the remaining threads work on smaller tasks. Every `log_every` the progress is reported
+    with the estimated time of arrival, that is extrapolated from the share of the total cost completed so far."""
+
+    def __init__(
+        self,
+        name,
+        tasks: list[tuple[int, Callable[..., Result]]],
+        num_threads: int,
+        *,
+        max_large: int = 4,
+        large_cost: int = 100 * 1024**3,
+        log_every: dt.timedelta = dt.timedelta(seconds=30),
+    ):
+        if max_large < 1:
+            msg = f"max_large must be positive: {max_large}"
+            raise ValueError(msg)
+        self._name = name
+        self._tasks = tasks
+        self._num_threads = num_threads
+        self._max_large = max_large
+        self._large_cost = large_cost
+        self._log_every = log_every
+        self._total_cost = sum(cost for cost, _ in tasks)
+        self._completed_cnt = 0
+        self._completed_cost = 0
+        self._started = dt.datetime.now()
+        self._last_report = self._started
+
+    @classmethod
+    def gather(
+        cls,
+        name: str,
+        tasks: list[tuple[int, Callable[..., Result]]],
+        *,
+        max_large: int = 4,
+        large_cost: int = 100 * 1024**3,
+        log_every: dt.timedelta = dt.timedelta(seconds=30),
+    ) -> (list[Result], list[Exception]):
+        """Takes `(cost, task)` pairs and returns non-empty results and errors of failed tasks"""
+        num_threads = os.cpu_count() * 2
+        runner = cls(name, tasks, num_threads, max_large=max_large, large_cost=large_cost, log_every=log_every)
+        return runner._run()
+
+    def _run(self) -> (list[Result], list[Exception]):
+        if len(self._tasks) == 0:
+            return [], []
+        by_cost = sorted(self._tasks, key=lambda pair: pair[0], reverse=True)
+        large = [pair for pair in by_cost if pair[0] >= self._large_cost]
+        small = [pair for pair in by_cost if pair[0] < self._large_cost]
+        logger.info(
+            f"Starting {len(self._tasks)} '{self._name}' tasks in {self._num_threads} threads, "
+            f"{len(large)} large ones at most {self._max_large} at once"
+        )
+        large.reverse()
+        small.reverse()
+        collected = []
+        errors = []
+        running_large = 0
+        in_flight = {}
+        with ThreadPoolExecutor(self._num_threads) as pool:
+            while large or small or in_flight:
+                while len(in_flight) < self._num_threads:
+                    if large and running_large < self._max_large:
+                        cost, task = large.pop()
+                        running_large += 1
+                    elif small:
+                        cost, task = small.pop()
+                    else:
+                        break
+                    in_flight[pool.submit(task)] = cost
+                done, _ = wait(in_flight, timeout=self._log_every.total_seconds(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    cost = in_flight.pop(future)
+                    if cost >= self._large_cost:
+                        running_large -= 1
+                    self._completed_cnt += 1
+                    self._completed_cost += cost
+                    try:
+                        result = future.result()
+                    except Exception as err:
+                        logger.error(f"{self._name} task failed: {err!s}")
+                        errors.append(err)
+                        continue
+                    if result is not None:
+                        collected.append(result)
+                self._progress_report()
+        logger.info(
+            f"Finished '{self._name}' tasks: {len(errors)} of {len(self._tasks)} failed. "
+            f"Took {dt.datetime.now() - self._started}"
+        )
+        return collected, errors
+
+    def _progress_report(self):
+        now = dt.datetime.now()
+        if now - self._last_report < self._log_every:
+            return
+        self._last_report = now
+        done, total = self._completed_cost, self._total_cost
+        if total == 0:
+            # nothing is known about costs, so all tasks weigh the same
+            done, total = self._completed_cnt, len(self._tasks)
+        eta = "unknown"
+        if done > 0:
+            elapsed = (now - self._started).total_seconds()
+            eta = str(dt.timedelta(seconds=round(elapsed * (total - done) / done)))
+        logger.info(
+            f"{self._name} {self._completed_cnt}/{len(self._tasks)}, {done / total * 100:.0f}% of estimated cost, "
+            f"ETA: {eta}"
+        )
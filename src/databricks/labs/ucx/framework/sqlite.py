@@ -0,0 +1,354 @@
+import contextlib
+import dataclasses
+import logging
+import re
+import sqlite3
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+from databricks.labs.ucx.framework.codecs import row_codec
+from databricks.labs.ucx.framework.crawlers import SqlBackend
+from databricks.labs.ucx.mixins.sql import Row
+
+logger = logging.getLogger(__name__)
+
+_tokens = re.compile(
+    r"""(?P<string>'(?:[^'\\]|\\.|'')*')"""
+    r"""|(?P<dquoted>"(?:[^"\\]|\\.)*")"""
+    r"""|(?P<backticked>`(?:[^`]|``)*`)"""
+    r"""|(?P<comment>--[^\n]*|/\*.*?\*/)"""
+    r"""|(?P<space>\s+)"""
+    r"""|(?P<word>\w+)"""
+    r"""|(?P<other>.)""",
+    re.DOTALL,
+)
+_table_keywords = {"FROM", "JOIN", "INTO", "TABLE", "UPDATE", "EXISTS", "TO", "USING"}
+_insert_overwrite = re.compile(r"^\s*INSERT\s+OVERWRITE\s+(?:TABLE\s+)?", re.IGNORECASE)
+_show_databases = re.compile(r"^\s*SHOW\s+(?:DATABASES|SCHEMAS)\s*$", re.IGNORECASE)
+_show_tables = re.compile(r"^\s*SHOW\s+TABLES\s+(?:FROM|IN)\s+([\w.`]+)\s*$", re.IGNORECASE)
+_no_such_column = re.compile(r"^no such column: (\w+)$")
+_create_schema = re.compile(r"^\s*CREATE\s+(?:SCHEMA|DATABASE)\s", re.IGNORECASE)
+
+
+def _startswith(value: str | None, prefix: str | None) -> bool | None:
+    if value is None or prefix is None:
+        return None
+    return value.startswith(prefix)
+
+
+def _endswith(value: str | None, suffix: str | None) -> bool | None:
+    if value is None or suffix is None:
+        return None
+    return value.endswith(suffix)
+
+
+def _contains(value: str | None, part: str | None) -> bool | None:
+    if value is None or part is None:
+        return None
+    return part in value
+
+
+@contextlib.contextmanager
+def _translated_errors():
+    """Reports missing tables with the error class of Spark, as callers expect it"""
+    try:
+        yield
+    except sqlite3.OperationalError as err:
+        if "no such table" not in str(err):
+            raise
+        msg = f"TABLE_OR_VIEW_NOT_FOUND: {err}"
+        raise RuntimeError(msg) from err
+
+
+class _SelectList:
+    """Aliased expressions of the select list, that is being translated"""
+
+    def __init__(self, depth: int, start: int):
+        self.depth = depth
+        self.start = start
+        self.alias_at = None
+        self.aliases = {}
+
+    def add_item(self, out: list[str]):
+        if self.alias_at is not None:
+            expression = "".join(out[self.start : self.alias_at]).strip()
+            alias = "".join(out[self.alias_at + 1 :]).strip().strip('"').lower()
+            self.aliases[alias] = expression
+        self.start = len(out) + 1
+        self.alias_at = None
+
+
+class _Translator:
+    """Rewrites Spark SQL, as used by the inventory and the assessment queries, into SQLite dialect:
+
+    - `catalog.schema.table` and `schema.table` names become `"catalog.schema.table"` tables,
+      where `schema.table` is in the `hive_metastore` catalog.
+    - "double-quoted" strings become 'single-quoted' ones and `backticked` identifiers become "quoted" ones.
+    - `IF(cond, a, b)` becomes `IIF(cond, a, b)` and `/` is always a floating point division.
+    - `USING <format>` of `CREATE TABLE` is dropped, `STRING` becomes `TEXT` and `TRUNCATE TABLE`
+      becomes `DELETE FROM`.
+    """
+
+    def __init__(self, default_catalog: str):
+        self._default_catalog = default_catalog
+
+    def table_name(self, parts: list[str]) -> str:
+        if len(parts) == 2:  # noqa: PLR2004
+            parts = [self._default_catalog, *parts]
+        return '"' + ".".join(parts).lower().replace('"', '""') + '"'
+
+    def translate(self, sql: str, lateral_aliases: frozenset[str] = frozenset()) -> str:
+        """Translates the statement. References to `lateral_aliases`, like `format` in
+        `SELECT UPPER(table_format) AS format, IF(format = "DELTA", 1, 0)`, are replaced with the aliased
+        expressions, as SQLite doesn't resolve aliases within the same select list."""
+        tokens = [(m.lastgroup, m.group()) for m in _tokens.finditer(sql)]
+        is_create = False
+        out = []
+        prev_word = None
+        depth = 0
+        selects = []
+        i = 0
+        while i < len(tokens):
+            kind, text = tokens[i]
+            upper = text.upper()
+            select = selects[-1] if selects else None
+            if kind in ("word", "backticked") and prev_word in _table_keywords and self._is_name(tokens, i):
+                parts, i = self._name_parts(tokens, i)
+                out.append(self.table_name(parts))
+                prev_word = None
+                continue
+            if kind == "word" and prev_word is None and upper == "TRUNCATE":
+                out.append("DELETE FROM")
+                i = self._skip_word(tokens, i, "TABLE")
+                prev_word = "FROM"
+                continue
+            if kind == "word" and is_create and upper == "USING":
+                i = self._skip_word(tokens, i, None)
+                continue
+            if select is not None and select.depth == depth:
+                if upper == "AS":
+                    select.alias_at = len(out)
+                elif text == ",":
+                    select.add_item(out)
+                elif upper == "FROM":
+                    select.add_item(out)
+                    selects.pop()
+            if kind == "dquoted":
+                out.append("'" + text[1:-1].replace('\\"', '"').replace("'", "''") + "'")
+            elif kind == "word" and upper == "IF" and self._next_text(tokens, i) == "(":
+                out.append("IIF")
+            elif kind in ("word", "backticked") and prev_word != "AS" and select is not None:
+                name = text.strip("`").lower()
+                expression = select.aliases.get(name, None) if name in lateral_aliases else None
+                out.append(self._word(kind, text) if expression is None else f"({expression})")
+            elif kind in ("word", "backticked"):
+                out.append(self._word(kind, text))
+            elif text == "/":
+                out.append("* 1.0 /")
+            else:
+                out.append(text)
+            if upper == "SELECT":
+                selects.append(_SelectList(depth, len(out)))
+            elif text == "(":
+                depth += 1
+            elif text == ")":
+                depth -= 1
+                while selects and selects[-1].depth > depth:
+                    selects.pop()
+            if kind in ("word", "backticked"):
+                if prev_word is None and upper == "CREATE":
+                    is_create = True
+                prev_word = upper
+            elif kind not in ("space", "comment"):
+                prev_word = text
+            i += 1
+        return "".join(out)
+
+    def _word(self, kind: str, text: str) -> str:
+        if kind == "backticked":
+            return '"' + text[1:-1].replace("``", "`").replace('"', '""') + '"'
+        upper = text.upper()
+        if upper == "STRING":
+            # STRING columns would have numeric affinity
+            return "TEXT"
+        return text
+
+    @staticmethod
+    def _next_text(tokens, i):
+        for kind, text in tokens[i + 1 :]:
+            if kind not in ("space", "comment"):
+                return text
+        return None
+
+    @staticmethod
+    def _is_name(tokens, i):
+        """Table names are qualified with a schema, other words after table keywords aren't"""
+        return i + 1 < len(tokens) and tokens[i + 1] == ("other", ".")
+
+    @staticmethod
+    def _skip_word(tokens, i, word):
+        """Returns the position after the next word, if it is the `word` or any word with `word=None`"""
+        j = i + 1
+        while j < len(tokens) and tokens[j][0] in ("space", "comment"):
+            j += 1
+        if j < len(tokens) and tokens[j][0] == "word" and (word is None or tokens[j][1].upper() == word):
+            return j + 1
+        return i + 1
+
+    @staticmethod
+    def _name_parts(tokens, i) -> tuple[list[str], int]:
+        parts = []
+        while i < len(tokens):
+            kind, text = tokens[i]
+            if kind == "word":
+                parts.append(text)
+            elif kind == "backticked":
+                parts.append(text[1:-1].replace("``", "`"))
+            else:
+                break
+            if i + 1 < len(tokens) and tokens[i + 1] == ("other", "."):
+                i += 2
+                continue
+            i += 1
+            break
+        return parts, i
+
+
+class SqliteBackend(SqlBackend):
+    """Embedded backend, that keeps inventory tables in a local SQLite database file. Crawlers and the
+    assessment queries can run against recorded inventory data without a warehouse, e.g. for offline
+    runs and for benchmarking crawler throughput.
+
+    Spark SQL is translated to the SQLite dialect only as far as the inventory DDL, inventory reads and
+    writes and the assessment queries need. Every table lives in the single database file and keeps its
+    full name, like `hive_metastore.ucx.tables`. Booleans are returned as 0 and 1."""
+
+    def __init__(self, path: Path | str = ":memory:", *, default_catalog: str = "hive_metastore"):
+        self._translator = _Translator(default_catalog)
+        self._default_catalog = default_catalog
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA case_sensitive_like = ON")
+        self._conn.create_function("startswith", 2, _startswith, deterministic=True)
+        self._conn.create_function("endswith", 2, _endswith, deterministic=True)
+        self._conn.create_function("contains", 2, _contains, deterministic=True)
+        self._row_factories: dict[tuple[str, ...], type[Row]] = {}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def execute(self, sql):
+        logger.debug(f"[sqlite][execute] {sql}")
+        if _create_schema.match(sql):
+            # schemas are part of table names
+            return
+        overwrite = _insert_overwrite.match(sql)
+        with self._lock, _translated_errors():
+            if overwrite is None:
+                self._conn.execute(self._translator.translate(sql))
+                return
+            insert = self._translator.translate(f"INSERT INTO {sql[overwrite.end():]}")
+            table = insert.removeprefix("INSERT INTO ").split(" ", 1)[0]
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(f"DELETE FROM {table}")
+                self._conn.execute(insert)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def fetch(self, sql) -> Iterator[any]:
+        logger.debug(f"[sqlite][fetch] {sql}")
+        if _show_databases.match(sql):
+            return iter(self._show_databases())
+        show_tables = _show_tables.match(sql)
+        if show_tables is not None:
+            return iter(self._show_tables(show_tables.group(1)))
+        with self._lock, _translated_errors():
+            cursor = self._execute_select(sql)
+            records = cursor.fetchall()
+            if cursor.description is None:
+                return iter([])
+            row_factory = self._row_factory(tuple(d[0] for d in cursor.description))
+        return iter([row_factory(r) for r in records])
+
+    def save_table(
+        self,
+        full_name: str,
+        rows: list[any],
+        klass: dataclasses.dataclass,
+        mode: str = "append",
+        *,
+        keys: list[str] | None = None,
+    ):
+        rows = self._filter_none_rows(rows, full_name)
+        if mode == "upsert":
+            rows = self._upsert_rows(rows, klass, keys)
+        self.create_table(full_name, klass)
+        table = self._translator.table_name(full_name.split("."))
+        codec = row_codec(klass)
+        placeholders = ", ".join("?" for _ in codec.columns)
+        logger.debug(f"[sqlite][save_table] {len(rows)} rows into {full_name} with {mode} mode")
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if mode == "overwrite":
+                    self._conn.execute(f"DELETE FROM {table}")
+                if mode == "upsert":
+                    self._delete_by_keys(table, rows, keys)
+                self._conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", map(codec.to_tuple, rows))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _delete_by_keys(self, table: str, rows: list[any], keys: list[str]):
+        index = '"' + table.strip('"') + "." + "_".join(keys) + '"'
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {table} ({', '.join(keys)})")
+        matches = " AND ".join(f"{k} IS ?" for k in keys)
+        key_values = ([getattr(row, k) for k in keys] for row in rows)
+        self._conn.executemany(f"DELETE FROM {table} WHERE {matches}", key_values)
+
+    def _execute_select(self, sql: str) -> sqlite3.Cursor:
+        lateral_aliases = frozenset()
+        while True:
+            try:
+                return self._conn.execute(self._translator.translate(sql, lateral_aliases))
+            except sqlite3.OperationalError as err:
+                # columns take precedence over lateral aliases, so they are resolved only for missing columns
+                missing = _no_such_column.match(str(err))
+                if missing is None or missing.group(1).lower() in lateral_aliases:
+                    raise
+                lateral_aliases |= {missing.group(1).lower()}
+
+    def _row_factory(self, columns: tuple[str, ...]) -> type[Row]:
+        row_factory = self._row_factories.get(columns, None)
+        if row_factory is None:
+            row_factory = Row.factory(columns)
+            self._row_factories[columns] = row_factory
+        return row_factory
+
+    def _table_names(self) -> list[list[str]]:
+        with self._lock:
+            names = self._conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")
+            return [name.split(".") for (name,) in names.fetchall() if name.count(".") == 2]  # noqa: PLR2004
+
+    def _show_databases(self) -> list[Row]:
+        row_factory = self._row_factory(("databaseName",))
+        databases = {schema for catalog, schema, _ in self._table_names() if catalog == self._default_catalog}
+        return [row_factory((schema,)) for schema in sorted(databases)]
+
+    def _show_tables(self, name: str) -> list[Row]:
+        parts = name.replace("`", "").lower().split(".")
+        if len(parts) == 1:
+            parts = [self._default_catalog, *parts]
+        row_factory = self._row_factory(("database", "tableName", "isTemporary"))
+        tables = []
+        for catalog, schema, table in self._table_names():
+            if [catalog, schema] != parts:
+                continue
+            tables.append(row_factory((schema, table, False)))
+        return tables
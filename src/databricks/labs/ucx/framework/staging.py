@@ -0,0 +1,74 @@
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO
+
+from databricks.sdk import WorkspaceClient
+
+logger = logging.getLogger(__name__)
+
+
+class StagingArea(ABC):
+    """Place for the files, that are bulk-loaded into tables with `COPY INTO` (see `StatementExecutionBackend`)"""
+
+    @abstractmethod
+    def upload(self, name: str, data: BinaryIO) -> str:
+        """Stores the file and returns its location, as understood by `COPY INTO ... FROM '<location>'`"""
+
+    @abstractmethod
+    def remove(self, location: str):
+        """Removes the file, once it is loaded"""
+
+    @staticmethod
+    def for_folder(ws: WorkspaceClient, folder: str | None) -> "StagingArea | None":
+        """Returns the staging area in the Unity Catalog volume or on DBFS, or None without the `folder`"""
+        if not folder:
+            return None
+        if folder.startswith("/Volumes/"):
+            return VolumeStagingArea(ws, folder)
+        return DbfsStagingArea(ws, folder.removeprefix("dbfs:"))
+
+
+class DbfsStagingArea(StagingArea):
+    def __init__(self, ws: WorkspaceClient, folder: str = "/FileStore/ucx/staging"):
+        self._ws = ws
+        self._folder = folder.rstrip("/")
+
+    def upload(self, name: str, data: BinaryIO) -> str:
+        path = f"{self._folder}/{name}"
+        self._ws.dbfs.upload(path, data, overwrite=True)
+        return f"dbfs:{path}"
+
+    def remove(self, location: str):
+        self._ws.dbfs.delete(location.removeprefix("dbfs:"))
+
+
+class VolumeStagingArea(StagingArea):
+    def __init__(self, ws: WorkspaceClient, folder: str):
+        """`folder` is within a Unity Catalog volume, like `/Volumes/main/ucx/staging`"""
+        self._ws = ws
+        self._folder = folder.rstrip("/")
+
+    def upload(self, name: str, data: BinaryIO) -> str:
+        path = f"{self._folder}/{name}"
+        self._ws.files.upload(path, data, overwrite=True)
+        return path
+
+    def remove(self, location: str):
+        self._ws.files.delete(location)
+
+
+class LocalStagingArea(StagingArea):
+    """Stand-in for tests and local runs, that keeps staged files in a local directory"""
+
+    def __init__(self, folder: Path):
+        self._folder = folder
+
+    def upload(self, name: str, data: BinaryIO) -> str:
+        self._folder.mkdir(parents=True, exist_ok=True)
+        path = self._folder / name
+        path.write_bytes(data.read())
+        return path.absolute().as_uri()
+
+    def remove(self, location: str):
+        Path(location.removeprefix("file://")).unlink(missing_ok=True)
@@ -1,5 +1,6 @@
 from databricks.labs.ucx.hive_metastore.grants import GrantsCrawler
 from databricks.labs.ucx.hive_metastore.mounts import Mounts
+from databricks.labs.ucx.hive_metastore.table_size import TableSizeCrawler
 from databricks.labs.ucx.hive_metastore.tables import TablesCrawler
 
-__all__ = ["TablesCrawler", "GrantsCrawler", "Mounts"]
+__all__ = ["TablesCrawler", "GrantsCrawler", "Mounts", "TableSizeCrawler"]
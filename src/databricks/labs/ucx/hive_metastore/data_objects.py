@@ -61,5 +61,4 @@ class ExternalLocationCrawler(CrawlerBase):
         return self._snapshot(self._try_fetch, self._external_location_list)
 
     def _try_fetch(self) -> list[ExternalLocation]:
-        for row in self._fetch(f"SELECT * FROM {self._schema}.{self._table}"):
-            yield ExternalLocation(*row)
+        yield from self._backend.fetch_as(ExternalLocation, f"{self._schema}.{self._table}")
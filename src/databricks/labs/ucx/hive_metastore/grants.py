@@ -7,7 +7,6 @@ from functools import partial
 from databricks.sdk.service.catalog import SchemaInfo, TableInfo
 
 from databricks.labs.ucx.framework.crawlers import CrawlerBase
-from databricks.labs.ucx.framework.parallel import Threads
 from databricks.labs.ucx.hive_metastore.tables import TablesCrawler
 
 logger = logging.getLogger(__name__)
@@ -133,8 +132,7 @@ class GrantsCrawler(CrawlerBase):
         return self._snapshot(partial(self._try_load), partial(self._crawl))
 
     def _try_load(self):
-        for row in self._fetch(f"SELECT * FROM {self._full_name}"):
-            yield Grant(*row)
+        yield from self._backend.fetch_as(Grant, f"{self._full_name}")
 
     def _crawl(self) -> list[Grant]:
         """
@@ -147,9 +145,9 @@ class GrantsCrawler(CrawlerBase):
         - Constructs a list of tasks to fetch grants using the `_grants` method, including both database-wide and
           table/view-specific grants.
         - Iterates through tables in the specified database using the `_tc.snapshot` method.
-        - For each table, adds tasks to fetch grants for the table or its view, depending on the kind of the table.
-        - Executes the tasks concurrently using Threads.gather.
-        - Flattens the list of retrieved grant lists into a single list of Grant objects.
+        - For each table, adds statements to fetch grants for the table or its view, depending on the kind of the table.
+        - Keeps many statements in flight at once using `fetch_many` of the backend.
+        - Flattens the retrieved grants into a single list of Grant objects.
 
         Note:
         - The method assumes that the `_grants` method fetches grants based on the provided parameters (catalog,
@@ -158,23 +156,22 @@ class GrantsCrawler(CrawlerBase):
         Returns:
         list[Grant]: A list of Grant objects representing the grants found in hive_metastore.
         """
-        seen_databases = set()
         catalog = "hive_metastore"
-        tasks = [partial(self._grants, catalog=catalog)]
-        for table in self._tc.snapshot():
-            if table.database not in seen_databases:
-                tasks.append(partial(self._grants, catalog=catalog, database=table.database))
-                seen_databases.add(table.database)
-            fn = partial(self._grants, catalog=catalog, database=table.database)
-            if table.kind == "VIEW":
-                tasks.append(partial(fn, view=table.name))
-            else:
-                tasks.append(partial(fn, table=table.name))
-        catalog_grants, errors = Threads.gather(f"listing grants for {catalog}", tasks)
-        if len(errors) > 0:
+        statements = ((kwargs, self._show_grants_sql(**kwargs)) for kwargs in self._objects(catalog))
+        errors = 0
+        catalog_grants = []
+        for kwargs, rows in self._backend.fetch_many(statements):
+            try:
+                if isinstance(rows, Exception):
+                    raise rows
+                catalog_grants.extend(self._grants_from(rows, **kwargs))
+            except Exception as e:
+                errors += 1
+                logger.error(f"Couldn't fetch grants for object {self._show_grants_sql(**kwargs)}: {e}")
+        if errors > 0:
             # TODO: https://github.com/databrickslabs/ucx/issues/406
-            logger.error(f"Detected {len(errors)} during scanning for grants in {catalog}")
-        return [grant for grants in catalog_grants for grant in grants]
+            logger.error(f"Detected {errors} during scanning for grants in {catalog}")
+        return catalog_grants
 
     def for_table_info(self, table: TableInfo):
         # TODO: it does not work yet for views
@@ -189,6 +186,19 @@ class GrantsCrawler(CrawlerBase):
             principal_permissions[grant.principal].add(grant.action_type)
         return principal_permissions
 
+    def _objects(self, catalog: str) -> Iterator[dict[str, str]]:
+        """Yields the catalog, databases and tables or views, while tables are streamed from the inventory"""
+        yield {"catalog": catalog}
+        seen_databases = set()
+        for table in self._tc.snapshot_stream():
+            if table.database not in seen_databases:
+                yield {"catalog": catalog, "database": table.database}
+                seen_databases.add(table.database)
+            if table.kind == "VIEW":
+                yield {"catalog": catalog, "database": table.database, "view": table.name}
+            else:
+                yield {"catalog": catalog, "database": table.database, "table": table.name}
+
     def _grants(
         self,
         *,
@@ -230,6 +240,38 @@ class GrantsCrawler(CrawlerBase):
         Returns:
         Iterator[Grant]: An iterator of Grant objects representing the fetched grant information.
         """
+        sql = self._show_grants_sql(
+            catalog=catalog,
+            database=database,
+            table=table,
+            view=view,
+            any_file=any_file,
+            anonymous_function=anonymous_function,
+        )
+        try:
+            yield from self._grants_from(
+                self._fetch(sql),
+                catalog=catalog,
+                database=database,
+                table=table,
+                view=view,
+                any_file=any_file,
+                anonymous_function=anonymous_function,
+            )
+        except Exception as e:
+            logger.error(f"Couldn't fetch grants for object {sql}: {e}")
+            return []
+
+    def _show_grants_sql(
+        self,
+        *,
+        catalog: str = False,
+        database: str | None = None,
+        table: str | None = None,
+        view: str | None = None,
+        any_file: bool = False,
+        anonymous_function: bool = False,
+    ) -> str:
         on_type, key = Grant.type_and_key(
             catalog=self._try_valid(catalog),
             database=self._try_valid(database),
@@ -238,24 +280,42 @@ class GrantsCrawler(CrawlerBase):
             any_file=any_file,
             anonymous_function=anonymous_function,
         )
-        try:
-            object_type_normalization = {"SCHEMA": "DATABASE", "CATALOG$": "CATALOG"}
-            for row in self._fetch(f"SHOW GRANTS ON {on_type} {key}"):
-                (principal, action_type, object_type, _) = row
-                if object_type in object_type_normalization:
-                    object_type = object_type_normalization[object_type]
-                if on_type != object_type:
-                    continue
-                yield Grant(
-                    principal=principal,
-                    action_type=action_type,
-                    table=table,
-                    view=view,
-                    database=database,
-                    catalog=catalog,
-                    any_file=any_file,
-                    anonymous_function=anonymous_function,
-                )
-        except Exception as e:
-            logger.error(f"Couldn't fetch grants for object {on_type} {key}: {e}")
-            return []
+        return f"SHOW GRANTS ON {on_type} {key}"
+
+    @staticmethod
+    def _grants_from(
+        rows: Iterator,
+        *,
+        catalog: str = False,
+        database: str | None = None,
+        table: str | None = None,
+        view: str | None = None,
+        any_file: bool = False,
+        anonymous_function: bool = False,
+    ) -> Iterator[Grant]:
+        """Converts rows of `SHOW GRANTS` into grants on the object, that the statement was issued for"""
+        on_type, _ = Grant.type_and_key(
+            catalog=catalog,
+            database=database,
+            table=table,
+            view=view,
+            any_file=any_file,
+            anonymous_function=anonymous_function,
+        )
+        object_type_normalization = {"SCHEMA": "DATABASE", "CATALOG$": "CATALOG"}
+        for row in rows:
+            (principal, action_type, object_type, _) = row
+            if object_type in object_type_normalization:
+                object_type = object_type_normalization[object_type]
+            if on_type != object_type:
+                continue
+            yield Grant(
+                principal=principal,
+                action_type=action_type,
+                table=table,
+                view=view,
+                database=database,
+                catalog=catalog,
+                any_file=any_file,
+                anonymous_function=anonymous_function,
+            )
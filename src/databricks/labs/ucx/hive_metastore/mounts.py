@@ -32,5 +32,4 @@ class Mounts(CrawlerBase):
         return self._snapshot(self._try_fetch, self._list_mounts)
 
     def _try_fetch(self) -> list[Mount]:
-        for row in self._fetch(f"SELECT * FROM {self._schema}.{self._table}"):
-            yield Mount(*row)
+        yield from self._backend.fetch_as(Mount, f"{self._schema}.{self._table}")
@@ -0,0 +1,74 @@
+import logging
+from dataclasses import dataclass
+from functools import partial
+
+from databricks.labs.ucx.framework.codecs import Long
+from databricks.labs.ucx.framework.crawlers import CrawlerBase
+from databricks.labs.ucx.framework.parallel import Threads
+from databricks.labs.ucx.hive_metastore.tables import Table, TablesCrawler
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TableSize:
+    catalog: str
+    database: str
+    name: str
+    size_in_bytes: Long = None
+    num_files: Long = None
+    partition_columns: str = None
+    last_modified: str = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.catalog}.{self.database}.{self.name}".lower()
+
+
+class TableSizeCrawler(CrawlerBase):
+    def __init__(self, tc: TablesCrawler):
+        """Crawls storage statistics of Delta tables from the tables inventory with `DESCRIBE DETAIL`,
+        so that the migration can be planned with real data volumes.
+
+        Args:
+            tc (TablesCrawler): The crawler of tables, which snapshot is described.
+        """
+        super().__init__(tc._backend, tc._catalog, tc._schema, "table_size", TableSize)
+        self._tc = tc
+
+    def snapshot(self) -> list[TableSize]:
+        return self._snapshot(partial(self._try_load), partial(self._crawl))
+
+    def _try_load(self):
+        yield from self._backend.fetch_as(TableSize, f"{self._full_name}")
+
+    def _crawl(self) -> list[TableSize]:
+        """Describes all Delta tables in parallel. Views and non-Delta tables are skipped,
+        as `DESCRIBE DETAIL` reports no statistics for them."""
+        tasks = []
+        for table in self._tc.snapshot_stream():
+            if table.kind == "VIEW" or not table.is_delta:
+                continue
+            tasks.append(partial(self._describe_detail, table))
+        sizes, errors = Threads.gather("describing table details", tasks)
+        if len(errors) > 0:
+            # TODO: https://github.com/databrickslabs/ucx/issues/406
+            logger.error(f"Detected {len(errors)} errors while describing table details")
+        return sizes
+
+    def _describe_detail(self, table: Table) -> TableSize | None:
+        logger.debug(f"[{table.key}] fetching table details")
+        for row in self._fetch(f"DESCRIBE DETAIL {table.key}"):
+            last_modified = row.lastModified
+            if last_modified is not None and not isinstance(last_modified, str):
+                last_modified = last_modified.isoformat()
+            return TableSize(
+                catalog=table.catalog,
+                database=table.database,
+                name=table.name,
+                size_in_bytes=row.sizeInBytes,
+                num_files=row.numFiles,
+                partition_columns=",".join(row.partitionColumns or []),
+                last_modified=last_modified,
+            )
+        return None
@@ -1,6 +1,9 @@
+import dataclasses
+import datetime as dt
 import logging
 import re
 import string
+import time
 from collections.abc import Iterator
 from dataclasses import dataclass
 from functools import partial
@@ -8,7 +11,7 @@ from functools import partial
 from databricks.sdk import WorkspaceClient
 
 from databricks.labs.ucx.framework.crawlers import CrawlerBase, SqlBackend
-from databricks.labs.ucx.framework.parallel import Threads
+from databricks.labs.ucx.framework.parallel import LongestFirst, Threads
 from databricks.labs.ucx.mixins.sql import Row
 
 logger = logging.getLogger(__name__)
@@ -73,16 +76,88 @@ class Table:
         )
 
 
+@dataclass
+class TableError:
+    """Failure to list a database or describe a table, persisted in the `table_failures` inventory"""
+
+    catalog: str
+    database: str
+    name: str = None
+    error: str = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.catalog}.{self.database}.{self.name}".lower()
+
+
+@dataclass
+class TableCheck:
+    """Last time the properties of a table were checked by `TablesCrawler.refresh`, persisted in `table_checks`"""
+
+    catalog: str
+    database: str
+    name: str
+    checked_at: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.catalog}.{self.database}.{self.name}".lower()
+
+
+# keys of the `information` column of `SHOW TABLE EXTENDED`, that may be followed by a multi-line value
+_MULTILINE_KEYS = {"View Text", "View Original Text", "Schema", "Comment"}
+_INFORMATION_KEYS = {
+    "Catalog",
+    "Database",
+    "Table",
+    "Owner",
+    "Created Time",
+    "Last Access",
+    "Created By",
+    "Type",
+    "Provider",
+    "Table Properties",
+    "Statistics",
+    "Location",
+    "Serde Library",
+    "InputFormat",
+    "OutputFormat",
+    "Storage Properties",
+    "Partition Provider",
+    "Partition Columns",
+    "View Catalog and Namespace",
+    "View Query Output Columns",
+    "View Schema Mode",
+    *_MULTILINE_KEYS,
+}
+# rough average size of a Delta data file, to estimate the size of tables with only the number of files known
+_AVERAGE_FILE_BYTES = 128 * 1024**2
+_INFORMATION_LINE = re.compile(r"^([A-Z][\w ]*): ?(.*)$")
+
+
 class TablesCrawler(CrawlerBase):
-    def __init__(self, backend: SqlBackend, schema):
+    def __init__(
+        self,
+        backend: SqlBackend,
+        schema,
+        *,
+        bulk: bool = False,
+        recheck_max_age: dt.timedelta = dt.timedelta(days=7),
+    ):
         """
         Initializes a TablesCrawler instance.
 
         Args:
             backend (SqlBackend): The SQL Execution Backend abstraction (either REST API or Spark)
             schema: The schema name for the inventory persistence.
+            bulk: Fetch the metadata of all tables in a database with a single `SHOW TABLE EXTENDED`
+                statement instead of one `DESCRIBE TABLE EXTENDED` per table.
+            recheck_max_age: `refresh` re-checks properties of known tables, that were last checked
+                longer than this ago.
         """
         super().__init__(backend, "hive_metastore", schema, "tables", Table)
+        self._bulk = bulk
+        self._recheck_max_age = recheck_max_age
 
     def _all_databases(self) -> Iterator[Row]:
         yield from self._fetch("SHOW DATABASES")
@@ -94,25 +169,32 @@ class TablesCrawler(CrawlerBase):
         Returns:
             list[Table]: A list of Table objects representing the snapshot of tables.
         """
-        return self._snapshot(partial(self._try_load), partial(self._crawl))
+        return list(self.snapshot_stream())
+
+    def snapshot_stream(self) -> Iterator[Table]:
+        """Same as `snapshot`, but yields tables as soon as they are crawled, without keeping them all in memory"""
+        yield from self._snapshot_stream(partial(self._try_load), partial(self._crawl_stream))
 
     @staticmethod
     def _parse_table_props(tbl_props: string) -> {}:
         pattern = r"([^,\[\]]+)=([^,\[\]]+)"
         key_value_pairs = re.findall(pattern, tbl_props)
-        # Convert key-value pairs to dictionary
-        return dict(key_value_pairs)
+        # Convert key-value pairs to dictionary, `SHOW TABLE EXTENDED` separates them with ", "
+        return {k.strip(): v.strip() for k, v in key_value_pairs}
 
     def _try_load(self):
         """Tries to load table information from the database or throws TABLE_OR_VIEW_NOT_FOUND error"""
-        for row in self._fetch(f"SELECT * FROM {self._full_name}"):
-            yield Table(*row)
+        yield from self._backend.fetch_as(Table, f"{self._full_name}")
 
     def _crawl(self) -> list[Table]:
+        return list(self._crawl_stream())
+
+    def _crawl_stream(self, persisted: list[Table] | None = None) -> Iterator[Table]:
         """Crawls and lists tables within the specified catalog and database.
 
         After performing initial scan of all tables, starts making parallel
-        DESCRIBE TABLE EXTENDED queries for every table.
+        DESCRIBE TABLE EXTENDED queries for every table, that is not in `persisted`
+        records of an interrupted crawl, and yields tables as soon as they are described.
 
         Production tasks would most likely be executed through `tables.scala`
         within `crawl_tables` task due to `spark.sharedState.externalCatalog`
@@ -120,45 +202,328 @@ class TablesCrawler(CrawlerBase):
         possible for Azure storage with credentials supplied through Spark
         conf (see https://github.com/databrickslabs/ucx/issues/249).
 
+        In `bulk` mode, databases are described in parallel with a single
+        SHOW TABLE EXTENDED statement each, so that the number of statements
+        grows with the number of databases and not with the number of tables.
+
         See also https://github.com/databrickslabs/ucx/issues/247
         """
-        tasks = []
         catalog = "hive_metastore"
-        for (database,) in self._all_databases():
+        seen = {t.key for t in persisted or []}
+        if self._bulk:
+            databases = [database for (database,) in self._all_databases()]
+            tasks = [partial(self._describe_database, catalog, database, seen) for database in databases]
+            for tables in Threads.stream(f"listing tables in {catalog}", tasks):
+                yield from tables
+            return
+        yield from self._describe_many(catalog, seen)
+
+    def _describe_many(self, catalog: str, seen: set[str], databases: list[str] | None = None) -> Iterator[Table]:
+        """Keeps many `DESCRIBE TABLE EXTENDED` statements in flight through `fetch_many` of the backend,
+        while tables are still being listed, and yields tables in the order they are listed."""
+        statements = (
+            ((database, table), f"DESCRIBE TABLE EXTENDED {catalog}.{database}.{table}")
+            for database, table in self._undescribed(catalog, seen, databases)
+        )
+        for (database, table), rows in self._backend.fetch_many(statements):
+            try:
+                if isinstance(rows, Exception):
+                    raise rows
+                yield self._table_from_describe(database, table, rows)
+            except Exception as e:
+                # TODO: https://github.com/databrickslabs/ucx/issues/406
+                logger.error(f"Couldn't fetch information for table {catalog}.{database}.{table} : {e}")
+
+    def _undescribed(self, catalog: str, seen: set[str], databases: list[str] | None = None):
+        for database in databases if databases is not None else [d for (d,) in self._all_databases()]:
             logger.debug(f"[{catalog}.{database}] listing tables")
             for _, table, _is_tmp in self._fetch(f"SHOW TABLES FROM {catalog}.{database}"):
-                tasks.append(partial(self._describe, catalog, database, table))
-        catalog_tables, errors = Threads.gather(f"listing tables in {catalog}", tasks)
-        if len(errors) > 0:
-            # TODO: https://github.com/databrickslabs/ucx/issues/406
-            logger.error(f"Detected {len(errors)} while scanning tables in {catalog}")
-        return catalog_tables
+                if f"{catalog}.{database}.{table}".lower() in seen:
+                    continue
+                yield database, table
 
-    def _describe(self, catalog: str, database: str, table: str) -> Table | None:
+    def _describe_database(self, catalog: str, database: str, seen: set[str]) -> list[Table]:
+        """Fetches metadata of all tables in the database with one statement and falls back
+        to describing tables one by one, if the statement fails, e.g. because of a corrupt table.
+        """
+        try:
+            information = self._extended_information(catalog, database)
+        except Exception as e:
+            logger.warning(f"[{catalog}.{database}] describing tables one by one: {e}")
+            return list(self._describe_many(catalog, seen, [database]))
+        tables = []
+        for table, describe in information.items():
+            if f"{catalog}.{database}.{table}".lower() in seen:
+                continue
+            try:
+                tables.append(self._table_from(catalog, database, table, describe))
+            except Exception as e:
+                # TODO: https://github.com/databrickslabs/ucx/issues/406
+                logger.error(f"Couldn't parse information for table {catalog}.{database}.{table} : {e}")
+        return tables
+
+    def _extended_information(self, catalog: str, database: str) -> dict[str, dict[str, str]]:
+        """Returns parsed `SHOW TABLE EXTENDED` information of all non-temporary tables in the database"""
+        logger.debug(f"[{catalog}.{database}] fetching metadata of all tables")
+        information = {}
+        for _, table, is_temporary, blob in self._fetch(f"SHOW TABLE EXTENDED IN {catalog}.{database} LIKE '*'"):
+            if is_temporary:
+                continue
+            information[table] = self._parse_information(blob)
+        return information
+
+    @staticmethod
+    def _parse_information(information: str) -> dict[str, str]:
+        """Parses `Key: value` lines of the `information` column of `SHOW TABLE EXTENDED`,
+        where values, like the text of a view or the schema, may span multiple lines.
+        """
+        describe = {}
+        key = None
+        for line in information.splitlines():
+            match = _INFORMATION_LINE.match(line)
+            if match and (match.group(1) in _INFORMATION_KEYS or key not in _MULTILINE_KEYS):
+                key = match.group(1)
+                describe[key] = match.group(2)
+            elif key is not None:
+                describe[key] += f"\n{line}"
+        return describe
+
+    def _describe_table(self, catalog: str, database: str, table: str) -> Table:
         """Fetches metadata like table type, data format, external table location,
         and the text of a view if specified for a specific table within the given
         catalog and database.
         """
         full_name = f"{catalog}.{database}.{table}"
+        logger.debug(f"[{full_name}] fetching table metadata")
+        return self._table_from_describe(database, table, self._fetch(f"DESCRIBE TABLE EXTENDED {full_name}"))
+
+    def _table_from_describe(self, database: str, table: str, rows: Iterator[Row]) -> Table:
+        describe = {}
+        for key, value, _ in rows:
+            describe[key] = value
+        return self._table_from(describe["Catalog"], database, table, describe)
+
+    def _table_from(self, catalog: str, database: str, table: str, describe: dict[str, str]) -> Table:
+        return Table(
+            catalog=catalog,
+            database=database,
+            name=table,
+            object_type=describe["Type"],
+            table_format=describe.get("Provider", "").upper(),
+            location=describe.get("Location", None),
+            view_text=describe.get("View Text", None),
+            upgraded_to=self._parse_table_props(describe.get("Table Properties", "")).get("upgraded_to", None),
+        )
+
+    def refresh(self) -> list[Table]:
+        """Incrementally updates the inventory of the previous crawl instead of crawling all tables again.
+
+        Databases are listed with SHOW TABLES in parallel and compared with the previous inventory:
+        only added tables and tables recorded in `table_failures` by the previous run are described,
+        tables without `upgraded_to`, that were last checked longer than `recheck_max_age` ago, are
+        re-checked with SHOW TBLPROPERTIES, which doesn't touch the storage, and tables, that are no
+        longer listed, are removed. Changed records are upserted. Failures of this run replace the
+        contents of `table_failures`, and the time of every check is kept in `table_checks`, so that
+        the number of statements of every run doesn't grow with the number of unmigrated tables.
+
+        Returns:
+            list[Table]: All tables in the refreshed inventory.
+        """
+        catalog = "hive_metastore"
+        started = time.monotonic()
+        now = dt.datetime.now(dt.timezone.utc)
+        previous = {t.key: t for t in self._try_records(self._try_load)}
+        retries = {f.key for f in self._try_records(self._try_load_failures) if f.name is not None}
+        stored = {c.key: c for c in self._try_records(self._try_load_checks)}
+        checks = self._previous_checks(previous.values(), stored)
+        databases = {database for (database,) in self._all_databases()}
+        tasks = [partial(self._list_tables, catalog, database) for database in databases]
+        listings, _ = Threads.gather(f"listing tables in {catalog}", tasks)
+        failures = []
+        listed = {}
+        for database, tables in listings:
+            if isinstance(tables, TableError):
+                failures.append(tables)
+                continue
+            listed[database] = {table.lower(): table for table in tables}
+        removed = [
+            t
+            for t in previous.values()
+            if t.database not in databases or (t.database in listed and t.name.lower() not in listed[t.database])
+        ]
+        describe = {}
+        recheck = {}
+        for database, tables in listed.items():
+            for table in tables.values():
+                key = f"{catalog}.{database}.{table}".lower()
+                if key not in previous or key in retries:
+                    describe.setdefault(database, []).append(table)
+                elif previous[key].upgraded_to is None and self._is_due(checks[key], now):
+                    recheck.setdefault(database, []).append(previous[key])
+        logger.info(
+            f"[{self._full_name}] refreshing inventory: {sum(len(v) for v in describe.values())} tables to describe, "
+            f"{sum(len(v) for v in recheck.values())} to re-check, {len(removed)} removed"
+        )
+        changed = []
+        for result in Threads.stream(
+            f"refreshing tables in {catalog}", self._refresh_tasks(catalog, describe, recheck)
+        ):
+            for record in result:
+                if isinstance(record, TableError):
+                    failures.append(record)
+                    continue
+                changed.append(record)
+        self._upsert_records(changed, ["catalog", "database", "name"])
+        self._delete_records(removed)
+        self._backend.save_table(self._failures_full_name, failures, TableError, mode="overwrite")
+        checked_at = now.isoformat()
+        checked = [TableCheck(catalog, d, t, checked_at) for d, tables in describe.items() for t in tables]
+        checked += [TableCheck(t.catalog, t.database, t.name, checked_at) for ts in recheck.values() for t in ts]
+        self._save_checks(stored, checks, checked, removed, failures)
+        gone = {t.key for t in removed}
+        records = {key: t for key, t in previous.items() if key not in gone}
+        for table in changed:
+            records[table.key] = table
+        self._record_crawl(started, len(records))
+        return self._memoize(list(records.values()))
+
+    @property
+    def _failures_full_name(self) -> str:
+        return f"{self._catalog}.{self._schema}.table_failures"
+
+    @property
+    def _checks_full_name(self) -> str:
+        return f"{self._catalog}.{self._schema}.table_checks"
+
+    def _try_load_checks(self):
+        yield from self._backend.fetch_as(TableCheck, self._checks_full_name)
+
+    def _previous_checks(self, previous: Iterator[Table], stored: dict[str, TableCheck]) -> dict[str, TableCheck]:
+        """Returns the last check of every table of the previous inventory. Tables without a stored check
+        were last checked by the previous crawl, unless no crawl was recorded at all."""
+        latest = self._latest_crawl()
+        crawled_at = latest.crawled_at if latest is not None else None
+        checks = {}
+        for table in previous:
+            checks[table.key] = stored.get(table.key, TableCheck(table.catalog, table.database, table.name, crawled_at))
+        return checks
+
+    def _is_due(self, check: TableCheck, now: dt.datetime) -> bool:
+        if check.checked_at is None:
+            return True
+        return now - dt.datetime.fromisoformat(check.checked_at) > self._recheck_max_age
+
+    def _save_checks(
+        self,
+        stored: dict[str, TableCheck],
+        checks: dict[str, TableCheck],
+        checked: list[TableCheck],
+        removed: list[Table],
+        failures: list[TableError],
+    ):
+        """Upserts checks of this run and checks, that were taken over from the previous crawl"""
+        updates = {key: c for key, c in checks.items() if key not in stored and c.checked_at is not None}
+        for check in checked:
+            updates[check.key] = check
+        skipped = {f.key for f in failures} | {t.key for t in removed}
+        records = [check for key, check in updates.items() if key not in skipped]
+        keys = ["catalog", "database", "name"]
+        self._backend.save_table(self._checks_full_name, records, TableCheck, mode="upsert", keys=keys)
+        self._delete_records(removed, self._checks_full_name)
+
+    def _try_load_failures(self):
+        yield from self._backend.fetch_as(TableError, self._failures_full_name)
+
+    @staticmethod
+    def _try_records(fetcher) -> list:
         try:
-            logger.debug(f"[{full_name}] fetching table metadata")
-            describe = {}
-            for key, value, _ in self._fetch(f"DESCRIBE TABLE EXTENDED {full_name}"):
-                describe[key] = value
-            return Table(
-                catalog=describe["Catalog"],
-                database=database,
-                name=table,
-                object_type=describe["Type"],
-                table_format=describe.get("Provider", "").upper(),
-                location=describe.get("Location", None),
-                view_text=describe.get("View Text", None),
-                upgraded_to=self._parse_table_props(describe.get("Table Properties", "")).get("upgraded_to", None),
-            )
+            return list(fetcher())
+        except Exception as err:
+            if "TABLE_OR_VIEW_NOT_FOUND" not in str(err):
+                raise err
+            return []
+
+    def _list_tables(self, catalog: str, database: str) -> tuple[str, list[str] | TableError]:
+        try:
+            logger.debug(f"[{catalog}.{database}] listing tables")
+            return database, [table for _, table, _is_tmp in self._fetch(f"SHOW TABLES FROM {catalog}.{database}")]
         except Exception as e:
-            # TODO: https://github.com/databrickslabs/ucx/issues/406
-            logger.error(f"Couldn't fetch information for table {full_name} : {e}")
-            return None
+            logger.error(f"Couldn't list tables in {catalog}.{database} : {e}")
+            return database, TableError(catalog, database, None, f"ignoring database because of {e}")
+
+    def _refresh_tasks(self, catalog: str, describe: dict[str, list[str]], recheck: dict[str, list[Table]]):
+        if self._bulk:
+            for database in describe.keys() | recheck.keys():
+                yield partial(
+                    self._refresh_database, catalog, database, describe.get(database, []), recheck.get(database, [])
+                )
+            return
+        for database, tables in describe.items():
+            for table in tables:
+                yield partial(self._refresh_table, catalog, database, table)
+        for tables in recheck.values():
+            for table in tables:
+                yield partial(self._recheck_upgraded_to, table)
+
+    def _refresh_database(
+        self, catalog: str, database: str, describe: list[str], recheck: list[Table]
+    ) -> list[Table | TableError]:
+        """Describes and re-checks tables of the database with one SHOW TABLE EXTENDED statement"""
+        try:
+            information = self._extended_information(catalog, database)
+        except Exception as e:
+            logger.warning(f"[{catalog}.{database}] refreshing tables one by one: {e}")
+            information = {}
+        records = []
+        for table in describe:
+            if table not in information:
+                records.extend(self._refresh_table(catalog, database, table))
+                continue
+            try:
+                records.append(self._table_from(catalog, database, table, information[table]))
+            except Exception as e:
+                records.append(TableError(catalog, database, table, f"ignoring table because of {e}"))
+        for table in recheck:
+            if table.name not in information:
+                records.extend(self._recheck_upgraded_to(table))
+                continue
+            props = self._parse_table_props(information[table.name].get("Table Properties", ""))
+            records.extend(self._upgraded_to_changes(table, props))
+        return records
+
+    def _refresh_table(self, catalog: str, database: str, table: str) -> list[Table | TableError]:
+        try:
+            return [self._describe_table(catalog, database, table)]
+        except Exception as e:
+            logger.error(f"Couldn't fetch information for table {catalog}.{database}.{table} : {e}")
+            return [TableError(catalog, database, table, f"ignoring table because of {e}")]
+
+    def _recheck_upgraded_to(self, table: Table) -> list[Table | TableError]:
+        try:
+            props = dict(self._fetch(f"SHOW TBLPROPERTIES {table.key}"))
+        except Exception as e:
+            logger.error(f"Couldn't fetch properties for table {table.key} : {e}")
+            return [TableError(table.catalog, table.database, table.name, f"ignoring table because of {e}")]
+        return self._upgraded_to_changes(table, props)
+
+    @staticmethod
+    def _upgraded_to_changes(table: Table, props: dict[str, str]) -> list[Table]:
+        upgraded_to = props.get("upgraded_to", None)
+        if upgraded_to == table.upgraded_to:
+            return []
+        return [dataclasses.replace(table, upgraded_to=upgraded_to)]
+
+    def _delete_records(self, tables: list[Table], full_name: str | None = None, batch_size: int = 1000):
+        if full_name is None:
+            full_name = self._full_name
+        by_database = {}
+        for table in tables:
+            by_database.setdefault(table.database, []).append(table.name)
+        for database, names in by_database.items():
+            escaped = database.replace("'", "''")
+            for i in range(0, len(names), batch_size):
+                batch = ", ".join("'{}'".format(name.replace("'", "''")) for name in names[i : i + batch_size])
+                self._exec(f"DELETE FROM {full_name} WHERE database = '{escaped}' AND name IN ({batch})")
 
 
 class TablesMigrate:
@@ -169,12 +534,26 @@ class TablesMigrate:
         backend: SqlBackend,
         default_catalog=None,
         database_to_catalog_mapping: dict[str, str] | None = None,
+        *,
+        table_sizes: CrawlerBase | None = None,
+        max_large_clones: int = 4,
+        large_table_bytes: int = 100 * 1024**3,
     ):
+        """
+        Args:
+            table_sizes: The crawler of `TableSize` records (see `TableSizeCrawler`), which are used to clone
+                the largest tables first. Without it, all managed tables are assumed to be of the same size.
+            max_large_clones: The maximum number of concurrent `DEEP CLONE` of tables, that are larger than
+                `large_table_bytes`, so that smaller tables are migrated in the meantime.
+        """
         self._tc = tc
         self._backend = backend
         self._ws = ws
         self._database_to_catalog_mapping = database_to_catalog_mapping
         self._default_catalog = self._init_default_catalog(default_catalog)
+        self._table_sizes = table_sizes
+        self._max_large_clones = max_large_clones
+        self._large_table_bytes = large_table_bytes
         self._seen_tables = {}
 
     @staticmethod
@@ -186,17 +565,48 @@ class TablesMigrate:
 
     def migrate_tables(self):
         self._init_seen_tables()
+        tables = self._tc.snapshot()
+        sizes = self._sizes()
+        known_bytes = sorted(size.size_in_bytes for size in sizes.values() if size.size_in_bytes is not None)
+        # tables without statistics are assumed to be of the median size
+        fallback_bytes = known_bytes[len(known_bytes) // 2] if known_bytes else 0
         tasks = []
-        for table in self._tc.snapshot():
+        for table in tables:
             target_catalog = self._default_catalog
             if self._database_to_catalog_mapping:
                 target_catalog = self._database_to_catalog_mapping[table.database]
-            tasks.append(partial(self._migrate_table, target_catalog, table))
-        _, errors = Threads.gather("migrate tables", tasks)
+            target = f"{target_catalog}.{table.database}.{table.name}".lower()
+            cost = 0
+            if not self._table_already_upgraded(target):
+                cost = self._estimated_bytes(table, sizes.get(table.key, None), fallback_bytes)
+            tasks.append((cost, partial(self._migrate_table, target_catalog, table)))
+        _, errors = LongestFirst.gather(
+            "migrate tables", tasks, max_large=self._max_large_clones, large_cost=self._large_table_bytes
+        )
         if len(errors) > 0:
             # TODO: https://github.com/databrickslabs/ucx/issues/406
             logger.error(f"Detected {len(errors)} errors while migrating tables")
 
+    def _sizes(self) -> dict:
+        if self._table_sizes is None:
+            return {}
+        try:
+            return {size.key: size for size in self._table_sizes.snapshot()}
+        except Exception as e:
+            logger.warning(f"Migrating tables without size statistics: {e}")
+            return {}
+
+    @staticmethod
+    def _estimated_bytes(table: Table, size, fallback_bytes: int) -> int:
+        """Estimates the bytes copied by the migration: only managed tables are cloned, the rest is metadata"""
+        if table.object_type != "MANAGED" or table.kind == "VIEW":
+            return 0
+        if size is not None and size.size_in_bytes is not None:
+            return size.size_in_bytes
+        if size is not None and size.num_files is not None:
+            return size.num_files * _AVERAGE_FILE_BYTES
+        return fallback_bytes
+
     def _migrate_table(self, target_catalog, table):
         sql = table.uc_create_sql(target_catalog)
         logger.debug(f"Migrating table {table.key} to using SQL query: {sql}")
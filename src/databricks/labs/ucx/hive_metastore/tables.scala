@@ -1,5 +1,8 @@
-import java.util.concurrent.ConcurrentLinkedQueue
+import java.time.{OffsetDateTime, ZoneOffset}
+import java.time.format.DateTimeFormatter
+import java.util.concurrent.{ConcurrentLinkedQueue, ForkJoinPool}
 import scala.collection.JavaConverters
+import scala.collection.parallel.{ForkJoinTaskSupport, ParSeq}
 
 import org.apache.spark.sql.catalyst.analysis.NoSuchDatabaseException
 import org.apache.spark.sql.catalyst.catalog.{CatalogTable, CatalogTableType}
@@ -12,51 +15,183 @@ case class TableDetails(catalog: String, database: String, name: String, object_
 // recording error log in the database
 case class TableError(catalog: String, database: String, name: String, error: String)
 
+// must follow the same structure as databricks.labs.ucx.hive_metastore.tables.TableCheck
+case class TableCheck(catalog: String, database: String, name: String, checked_at: String)
+
+// must follow the same structure as databricks.labs.ucx.framework.crawlers.SnapshotProgress
+case class SnapshotProgress(table_name: String)
+
 val failures = new ConcurrentLinkedQueue[TableError]()
 
-def metadataForAllTables(databases: Seq[String], queue: ConcurrentLinkedQueue[TableError]): DataFrame = {
-  import spark.implicits._
-
-  val externalCatalog = spark.sharedState.externalCatalog
-  databases.par.flatMap(databaseName => {
-    val tables = try {
-      externalCatalog.listTables(databaseName)
-    } catch {
-      case err: NoSuchDatabaseException =>
-        failures.add(TableError("hive_metastore", databaseName, null, s"ignoring database because of ${err}"))
-        null
-    }
-    if (tables == null) {
-      failures.add(TableError("hive_metastore", databaseName, null, s"listTables returned null"))
-      Seq()
-    } else {
-      tables.par.map(tableName => try {
-        val table = externalCatalog.getTable(databaseName, tableName)
-        if (table == null) {
-          failures.add(TableError("hive_metastore", databaseName, tableName, s"result is null"))
-          None
-        } else {
-          val upgraded_to=table.properties.get("upgraded_to")
-          Some(TableDetails("hive_metastore", databaseName, tableName, table.tableType.name, table.provider.orNull,
-            table.storage.locationUri.map(_.toString).orNull, table.viewText.orNull,
-              upgraded_to match {case Some(target) => target case None => null}))
-        }
-      } catch {
-        case err: Throwable =>
-          failures.add(TableError("hive_metastore", databaseName, tableName, s"ignoring table because of ${err}"))
-          None
-      }).toList.collect {
-        case Some(x) => x
-      }
+dbutils.widgets.text("inventory_database", "ucx")
+dbutils.widgets.text("incremental", "false")
+dbutils.widgets.text("parallelism", "")
+dbutils.widgets.text("batch_size", "100")
+dbutils.widgets.text("recheck_days", "7")
+val inventoryDatabase = dbutils.widgets.get("inventory_database")
+val incremental = dbutils.widgets.get("incremental").toBoolean
+// metastore calls are I/O bound, so the number of concurrent calls is not limited by driver cores,
+// but follows the size of the cluster by default
+val parallelism = dbutils.widgets.get("parallelism") match {
+  case "" => math.max(spark.sparkContext.defaultParallelism, Runtime.getRuntime.availableProcessors) * 2
+  case value => value.toInt
+}
+// number of databases, which tables are written to the inventory at once
+val batchSize = dbutils.widgets.get("batch_size").toInt
+// known tables without `upgraded_to` are fetched again by incremental crawls, once checked longer than that ago
+val recheckDays = dbutils.widgets.get("recheck_days").toInt
+
+val taskSupport = new ForkJoinTaskSupport(new ForkJoinPool(parallelism))
+
+def par[T](items: Seq[T]): ParSeq[T] = {
+  val parallel = items.par
+  parallel.tasksupport = taskSupport
+  parallel
+}
+
+def listTables(databaseName: String): Option[Seq[String]] = {
+  val tables = try {
+    spark.sharedState.externalCatalog.listTables(databaseName)
+  } catch {
+    case err: NoSuchDatabaseException =>
+      failures.add(TableError("hive_metastore", databaseName, null, s"ignoring database because of ${err}"))
+      null
+  }
+  if (tables == null) {
+    failures.add(TableError("hive_metastore", databaseName, null, s"listTables returned null"))
+    None
+  } else {
+    Some(tables)
+  }
+}
+
+def tableDetails(databaseName: String, tableName: String): Option[TableDetails] = try {
+  val table = spark.sharedState.externalCatalog.getTable(databaseName, tableName)
+  if (table == null) {
+    failures.add(TableError("hive_metastore", databaseName, tableName, s"result is null"))
+    None
+  } else {
+    val upgraded_to=table.properties.get("upgraded_to")
+    Some(TableDetails("hive_metastore", databaseName, tableName, table.tableType.name, table.provider.orNull,
+      table.storage.locationUri.map(_.toString).orNull, table.viewText.orNull,
+        upgraded_to match {case Some(target) => target case None => null}))
+  }
+} catch {
+  case err: Throwable =>
+    failures.add(TableError("hive_metastore", databaseName, tableName, s"ignoring table because of ${err}"))
+    None
+}
+
+def metadataForAllTables(databases: Seq[String]): Seq[TableDetails] =
+  par(databases).flatMap(databaseName => listTables(databaseName) match {
+    case None => Seq()
+    case Some(tables) => par(tables).flatMap(tableName => tableDetails(databaseName, tableName)).toList
+  }).toList
+
+def checksOf(tables: Seq[TableDetails], checkedAt: String): Seq[TableCheck] =
+  tables.map(t => TableCheck(t.catalog, t.database, t.name, checkedAt))
+
+// compares the listing of every database with the previous inventory and fetches only added tables,
+// tables that failed in the previous run, and tables without `upgraded_to`, which may have been upgraded since
+// their last check before `recheckBefore`. returns changed, removed and checked tables, while tables of databases,
+// that could not be listed, are kept as they are. tables of databases, that no longer exist, are not part of the result.
+def refreshedMetadata(databases: Seq[String], previous: Seq[TableDetails], retries: Set[(String, String)],
+                      checks: Map[(String, String), OffsetDateTime],
+                      recheckBefore: OffsetDateTime): (Seq[TableDetails], Seq[TableDetails], Seq[TableDetails]) = {
+  val previousByDatabase = previous.groupBy(_.database)
+  val results = par(databases).map(databaseName => {
+    val known = previousByDatabase.getOrElse(databaseName, Seq()).map(t => t.name.toLowerCase -> t).toMap
+    listTables(databaseName) match {
+      case None => (Seq[TableDetails](), Seq[TableDetails](), Seq[TableDetails]())
+      case Some(tables) =>
+        val listed = tables.map(_.toLowerCase).toSet
+        val removed = known.values.filter(t => !listed.contains(t.name.toLowerCase)).toSeq
+        val checked = par(tables).flatMap(tableName => {
+          val key = (databaseName, tableName.toLowerCase)
+          known.get(key._2) match {
+            case Some(_) if retries.contains(key) => tableDetails(databaseName, tableName)
+            case Some(t) if t.upgraded_to != null => None
+            case Some(_) if checks.get(key).exists(_.isAfter(recheckBefore)) => None
+            case _ => tableDetails(databaseName, tableName)
+          }
+        }).toList
+        val changed = checked.filter(t => !known.get(t.name.toLowerCase).contains(t))
+        (changed, removed, checked)
     }
-  }).toList.toDF
+  }).toList
+  (results.flatMap(_._1), results.flatMap(_._2), results.flatMap(_._3))
 }
 
-dbutils.widgets.text("inventory_database", "ucx")
-val inventoryDatabase = dbutils.widgets.get("inventory_database")
+val inventory = s"$inventoryDatabase.tables"
+val databases = spark.sharedState.externalCatalog.listDatabases()
+val checksTable = s"$inventoryDatabase.table_checks"
+val keys = "t.catalog <=> s.catalog AND t.database <=> s.database AND t.name <=> s.name"
+val now = OffsetDateTime.now(ZoneOffset.UTC)
+// same format as `datetime.isoformat()`, so that checks are readable by `TablesCrawler.refresh` as well
+val checkedAt = now.format(DateTimeFormatter.ofPattern("yyyy-MM-dd'T'HH:mm:ss.SSSSSSxxx"))
 
-val df = metadataForAllTables(spark.sharedState.externalCatalog.listDatabases(), failures)
-df.write.mode("overwrite").option("overwriteSchema", "true").saveAsTable(s"$inventoryDatabase.tables")
+// every batch of databases is persisted as soon as it is crawled, so that the memory footprint of the driver
+// doesn't grow with the size of the metastore and the inventory fills up while the crawl is running
+if (incremental && spark.catalog.tableExists(inventory)) {
+  val previous = spark.table(inventory).as[TableDetails].collect().toSeq
+  val retries = if (spark.catalog.tableExists(s"$inventoryDatabase.table_failures")) {
+    spark.table(s"$inventoryDatabase.table_failures").as[TableError].collect()
+      .filter(_.name != null).map(f => (f.database, f.name.toLowerCase)).toSet
+  } else {
+    Set[(String, String)]()
+  }
+  // tables without a recorded check are checked once and recorded afterwards
+  val checks = if (spark.catalog.tableExists(checksTable)) {
+    spark.table(checksTable).as[TableCheck].collect()
+      .map(c => (c.database, c.name.toLowerCase) -> OffsetDateTime.parse(c.checked_at)).toMap
+  } else {
+    Map[(String, String), OffsetDateTime]()
+  }
+  def deleteFrom(table: String, removed: Seq[TableDetails]): Unit = {
+    removed.toDF.createOrReplaceTempView("ucx_tables_removed")
+    spark.sql(s"MERGE INTO $table AS t USING ucx_tables_removed AS s ON $keys WHEN MATCHED THEN DELETE")
+  }
+  def upsertInto(table: String, changed: DataFrame): Unit = {
+    changed.createOrReplaceTempView("ucx_tables_changed")
+    spark.sql(s"MERGE INTO $table AS t USING ucx_tables_changed AS s ON $keys " +
+      "WHEN MATCHED THEN UPDATE SET * WHEN NOT MATCHED THEN INSERT *")
+  }
+  if (!spark.catalog.tableExists(checksTable)) {
+    Seq[TableCheck]().toDF.write.saveAsTable(checksTable)
+  }
+  val present = databases.toSet
+  val gone = previous.filter(t => !present.contains(t.database))
+  deleteFrom(inventory, gone)
+  deleteFrom(checksTable, gone)
+  databases.grouped(batchSize).foreach(batch => {
+    val (changed, removed, checked) = refreshedMetadata(batch, previous, retries, checks, now.minusDays(recheckDays))
+    upsertInto(inventory, changed.toDF)
+    upsertInto(checksTable, checksOf(checked, checkedAt).toDF)
+    deleteFrom(inventory, removed)
+    deleteFrom(checksTable, removed)
+  })
+} else {
+  // a started crawl is marked in the same way as crawls of `CrawlerBase._snapshot_stream`, so that an interrupted
+  // crawl is resumed by the next run instead of being replaced by an empty inventory
+  val progress = s"$inventoryDatabase.snapshot_progress"
+  val resuming = spark.catalog.tableExists(progress) && spark.catalog.tableExists(inventory) &&
+    !spark.table(progress).where($"table_name" === "tables").isEmpty
+  val crawled = if (resuming) {
+    // every batch is appended with a single write, so databases found in the inventory are complete
+    spark.table(inventory).select("database").distinct.as[String].collect().toSet
+  } else {
+    Seq(SnapshotProgress("tables")).toDF.write.mode("append").saveAsTable(progress)
+    Seq[TableDetails]().toDF.write.mode("overwrite").option("overwriteSchema", "true").saveAsTable(inventory)
+    Seq[TableCheck]().toDF.write.mode("overwrite").option("overwriteSchema", "true").saveAsTable(checksTable)
+    Set[String]()
+  }
+  databases.filter(d => !crawled.contains(d)).grouped(batchSize).foreach(batch => {
+    val tables = metadataForAllTables(batch)
+    tables.toDF.write.mode("append").saveAsTable(inventory)
+    checksOf(tables, checkedAt).toDF.write.mode("append").saveAsTable(checksTable)
+  })
+  spark.sql(s"DELETE FROM $progress WHERE table_name = 'tables'")
+}
 
 JavaConverters.asScalaIteratorConverter(failures.iterator).asScala.toList.toDF
-  .write.mode("overwrite").option("overwriteSchema", "true").saveAsTable(s"$inventoryDatabase.table_failures")
\ No newline at end of file
+  .write.mode("overwrite").option("overwriteSchema", "true").saveAsTable(s"$inventoryDatabase.table_failures")
@@ -554,7 +554,11 @@ class WorkspaceInstaller:
             notebook_task=jobs.NotebookTask(
                 notebook_path=remote_notebook,
                 # ES-872211: currently, we cannot read WSFS files from Scala context
-                base_parameters={"inventory_database": self._current_config.inventory_database},
+                base_parameters={
+                    "inventory_database": self._current_config.inventory_database,
+                    "incremental": str(self._current_config.incremental_table_crawl).lower(),
+                    "parallelism": str(self._current_config.table_crawl_parallelism or ""),
+                },
             ),
         )
 
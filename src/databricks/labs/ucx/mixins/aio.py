@@ -0,0 +1,333 @@
+import asyncio
+import base64
+import json
+import logging
+import os
+import socket
+import ssl
+import threading
+import time
+import urllib.parse
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import requests
+from databricks.sdk.core import Config, DatabricksError
+from databricks.sdk.service import iam, sql, workspace
+
+logger = logging.getLogger(__name__)
+
+_Connection = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class _ConnectionPool:
+    """Keep-alive connections of a single event loop. At most `max_connections` are open at any point in time,
+    so that the number of in-flight requests is bounded by the pool and not by the number of OS threads."""
+
+    def __init__(self, open_connection, max_connections: int):
+        self._open_connection = open_connection
+        self._slots = asyncio.Semaphore(max_connections)
+        self._idle: list[_Connection] = []
+
+    async def acquire(self) -> tuple[_Connection, bool]:
+        await self._slots.acquire()
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if writer.is_closing() or reader.at_eof():
+                writer.close()
+                continue
+            return (reader, writer), True
+        try:
+            return await self._open_connection(), False
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn: _Connection, *, reusable: bool):
+        if reusable:
+            self._idle.append(conn)
+        else:
+            conn[1].close()
+        self._slots.release()
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+        for _, writer in idle:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+
+class AsyncApiClient:
+    """Minimal asyncio HTTP/1.1 client for the hot REST endpoints of permission crawling. Every request
+    is a coroutine on a keep-alive connection instead of an OS thread, so hundreds of requests can be
+    in flight with little memory per request. 429 and 503 responses are retried with respect to Retry-After.
+
+    Connections are pooled per event loop. Use the client as `async with client:` to close idle connections
+    of the current loop before it finishes.
+
+    CA bundles and proxies are taken from the environment in the same way as for the `requests` session of the SDK,
+    e.g. from `REQUESTS_CA_BUNDLE`, `HTTPS_PROXY` and `NO_PROXY`. HTTPS is tunneled through HTTP proxies.
+
+    Authentication headers are reused for `auth_ttl` seconds, which is shorter than the margin, with which
+    the SDK refreshes OAuth tokens before they expire, and on 401 responses. Credential providers may block
+    on token refresh, so they run on a dedicated thread and not on the event loop. `timeout` applies to
+    connecting and to every request-response exchange, and not to the time spent waiting for a connection."""
+
+    def __init__(
+        self,
+        cfg: Config,
+        *,
+        max_connections: int = 100,
+        timeout: float = 60,
+        max_retries: int = 6,
+        auth_ttl: float = 5,
+    ):
+        url = urllib.parse.urlparse(cfg.host)
+        self._cfg = cfg
+        self._host = url.hostname
+        self._tls = url.scheme == "https"
+        self._port = url.port or (443 if self._tls else 80)
+        self._max_connections = max_connections
+        self._timeout = timeout
+        self._max_retries = max_retries
+        settings = requests.Session().merge_environment_settings(cfg.host, {}, None, None, None)
+        self._ssl = self._ssl_context(False if cfg.skip_verify else settings["verify"]) if self._tls else None
+        proxy = requests.utils.select_proxy(cfg.host, settings["proxies"])
+        self._proxy = urllib.parse.urlparse(proxy) if proxy else None
+        self._auth_ttl = auth_ttl
+        self._auth: tuple[float, dict[str, str]] | None = None
+        self._auth_executor = ThreadPoolExecutor(1, thread_name_prefix="ucx-auth")
+        self._lock = threading.Lock()
+        self._pools: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _ConnectionPool] = weakref.WeakKeyDictionary()
+
+    @property
+    def max_connections(self) -> int:
+        return self._max_connections
+
+    async def __aenter__(self) -> "AsyncApiClient":
+        return self
+
+    async def __aexit__(self, *_):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            pool = self._pools.pop(loop, None)
+        if pool is not None:
+            await pool.close()
+
+    async def permissions_get(self, request_object_type: str, request_object_id: str) -> iam.ObjectPermissions:
+        raw = await self.do("GET", f"/api/2.0/permissions/{request_object_type}/{request_object_id}")
+        return iam.ObjectPermissions.from_dict(raw)
+
+    async def workspace_list(self, path: str) -> list[workspace.ObjectInfo]:
+        raw = await self.do("GET", "/api/2.0/workspace/list", query={"path": path})
+        return workspace.ListResponse.from_dict(raw).objects or []
+
+    async def dbsql_permissions_get(self, object_type: sql.ObjectTypePlural, object_id: str) -> sql.GetResponse:
+        raw = await self.do("GET", f"/api/2.0/preview/sql/permissions/{object_type.value}/{object_id}")
+        return sql.GetResponse.from_dict(raw)
+
+    async def secrets_list_acls(self, scope: str) -> list[workspace.AclItem]:
+        raw = await self.do("GET", "/api/2.0/secrets/acls/list", query={"scope": scope})
+        return workspace.ListAclsResponse.from_dict(raw).items or []
+
+    async def do(self, method: str, path: str, *, query: dict | None = None, body: dict | None = None) -> dict:
+        if query:
+            path = f"{path}?{urllib.parse.urlencode(query)}"
+        payload = b"" if body is None else json.dumps(body).encode("utf8")
+        attempt = 0
+        reauthenticated = False
+        while True:
+            auth = await self._authenticate()
+            status, headers, raw = await self._perform(method, path, payload, auth)
+            if status < HTTPStatus.BAD_REQUEST:
+                return json.loads(raw) if raw else {}
+            if status == HTTPStatus.UNAUTHORIZED and not reauthenticated:
+                # the token may have been revoked or rotated before the headers went stale
+                reauthenticated = True
+                self._auth = None
+                continue
+            err = self._make_error(status, headers, raw)
+            if err.retry_after_secs is None or attempt >= self._max_retries:
+                raise err
+            attempt += 1
+            logger.debug(f"{method} {path} is throttled, retrying in {err.retry_after_secs}s: {err}")
+            await asyncio.sleep(err.retry_after_secs)
+
+    async def _authenticate(self) -> dict[str, str]:
+        cached = self._auth
+        if cached is not None and time.monotonic() - cached[0] < self._auth_ttl:
+            return cached[1]
+        return await asyncio.get_running_loop().run_in_executor(self._auth_executor, self._refresh_auth)
+
+    def _refresh_auth(self) -> dict[str, str]:
+        # requests, that waited for this single thread, reuse the headers refreshed by the first one
+        cached = self._auth
+        if cached is not None and time.monotonic() - cached[0] < self._auth_ttl:
+            return cached[1]
+        headers = self._cfg.authenticate()
+        self._auth = (time.monotonic(), headers)
+        return headers
+
+    def _pool(self) -> _ConnectionPool:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            pool = self._pools.get(loop, None)
+            if pool is None:
+                pool = _ConnectionPool(self._open_connection, self._max_connections)
+                self._pools[loop] = pool
+            return pool
+
+    @staticmethod
+    def _ssl_context(verify: bool | str) -> ssl.SSLContext:
+        if verify is False:
+            ssl_context = ssl.create_default_context()
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+            return ssl_context
+        if verify is True:
+            # requests verifies with the bundle of certifi, unless told otherwise
+            verify = requests.certs.where()
+        if os.path.isdir(verify):
+            return ssl.create_default_context(capath=verify)
+        return ssl.create_default_context(cafile=verify)
+
+    @property
+    def _authority(self) -> str:
+        return self._host if self._port in (80, 443) else f"{self._host}:{self._port}"
+
+    def _proxy_headers(self) -> dict[str, str]:
+        if self._proxy.username is None:
+            return {}
+        credentials = f"{urllib.parse.unquote(self._proxy.username)}:{urllib.parse.unquote(self._proxy.password or '')}"
+        return {"Proxy-Authorization": f"Basic {base64.b64encode(credentials.encode('utf8')).decode('ascii')}"}
+
+    async def _open_connection(self) -> _Connection:
+        return await asyncio.wait_for(self._connect(), self._timeout)
+
+    async def _connect(self) -> _Connection:
+        if self._proxy is None:
+            return await asyncio.open_connection(self._host, self._port, ssl=self._ssl)
+        proxy_port = self._proxy.port or 80
+        if not self._tls:
+            # plain HTTP requests are sent to the proxy with absolute URLs
+            return await asyncio.open_connection(self._proxy.hostname, proxy_port)
+        sock = await asyncio.get_running_loop().run_in_executor(None, self._tunnel, proxy_port)
+        return await asyncio.open_connection(sock=sock, ssl=self._ssl, server_hostname=self._host)
+
+    def _tunnel(self, proxy_port: int) -> socket.socket:
+        """Opens a tunnel to the host through the proxy with HTTP CONNECT, before TLS is started on it"""
+        sock = socket.create_connection((self._proxy.hostname, proxy_port), timeout=self._timeout)
+        try:
+            headers = {"Host": self._authority, **self._proxy_headers()}
+            head = f"CONNECT {self._host}:{self._port} HTTP/1.1\r\n"
+            head += "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+            sock.sendall(head.encode("latin1") + b"\r\n")
+            response = b""
+            while b"\r\n\r\n" not in response:
+                received = sock.recv(4096)
+                if not received:
+                    msg = "proxy closed the connection"
+                    raise ConnectionError(msg)
+                response += received
+            status_line = response.split(b"\r\n", 1)[0].decode("latin1")
+            if status_line.split(" ", 2)[1] != "200":
+                msg = f"proxy refused to tunnel to {self._authority}: {status_line}"
+                raise ConnectionError(msg)
+            sock.settimeout(None)
+            return sock
+        except BaseException:
+            sock.close()
+            raise
+
+    async def _perform(
+        self, method: str, path: str, payload: bytes, auth: dict[str, str]
+    ) -> tuple[int, dict[str, str], bytes]:
+        pool = self._pool()
+        while True:
+            conn, reused = await pool.acquire()
+            try:
+                exchange = self._exchange(conn, method, path, payload, auth)
+                status, headers, raw = await asyncio.wait_for(exchange, self._timeout)
+            except (ConnectionError, asyncio.IncompleteReadError) as err:
+                pool.release(conn, reusable=False)
+                if reused:
+                    # server has closed the idle keep-alive connection, retry on a fresh one
+                    logger.debug(f"Reconnecting after stale connection: {err}")
+                    continue
+                raise
+            except BaseException:
+                pool.release(conn, reusable=False)
+                raise
+            pool.release(conn, reusable=headers.get("connection", "").lower() != "close")
+            return status, headers, raw
+
+    async def _exchange(self, conn: _Connection, method: str, path: str, payload: bytes, auth: dict[str, str]):
+        reader, writer = conn
+        request_headers = {
+            "Host": self._authority,
+            "User-Agent": self._cfg.user_agent,
+            "Accept": "application/json",
+            "Content-Length": str(len(payload)),
+            **auth,
+        }
+        if payload:
+            request_headers["Content-Type"] = "application/json"
+        if self._proxy is not None and not self._tls:
+            path = f"http://{self._authority}{path}"
+            request_headers.update(self._proxy_headers())
+        head = f"{method} {path} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in request_headers.items())
+        writer.write(head.encode("latin1") + b"\r\n" + payload)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b"", None)
+        status = int(status_line.split(b" ", 2)[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if method == "HEAD" or status in (HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED):
+            return status, headers, b""
+        if headers.get("transfer-encoding", "").lower().endswith("chunked"):
+            return status, headers, await self._read_chunked(reader)
+        if "content-length" in headers:
+            return status, headers, await reader.readexactly(int(headers["content-length"]))
+        # no framing, the body ends with the connection
+        headers["connection"] = "close"
+        return status, headers, await reader.read()
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0], 16)
+            if size == 0:
+                # skip trailers
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+    @staticmethod
+    def _make_error(status: int, headers: dict[str, str], raw: bytes) -> DatabricksError:
+        try:
+            payload = json.loads(raw) if raw else {}
+        except ValueError:
+            payload = {"message": raw.decode("utf8", errors="replace")}
+        if not isinstance(payload, dict):
+            payload = {"message": str(payload)}
+        payload.setdefault("message", f"request failed with status {status}")
+        if status in (429, 503):
+            retry_after = headers.get("retry-after", "")
+            payload["retry_after_secs"] = int(retry_after) if retry_after.isdigit() else 1
+        return DatabricksError(**payload)
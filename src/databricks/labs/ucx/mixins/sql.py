@@ -1,20 +1,31 @@
 import json
 import logging
+import operator
 import random
+import threading
 import time
-from collections.abc import Iterator
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from contextlib import suppress
+from dataclasses import dataclass
 from datetime import timedelta
+from typing import ClassVar
 
+import requests
+from databricks.sdk.core import Config
 from databricks.sdk.service.sql import (
     ColumnInfoTypeName,
     Disposition,
     ExecuteStatementResponse,
+    ExternalLink,
     Format,
     ResultData,
     StatementExecutionAPI,
     StatementState,
     StatementStatus,
 )
+from requests.adapters import HTTPAdapter
 
 MAX_SLEEP_PER_ATTEMPT = 10
 
@@ -22,6 +33,8 @@ MAX_PLATFORM_TIMEOUT = 50
 
 MIN_PLATFORM_TIMEOUT = 5
 
+FIRST_POLL_DELAY = 0.1
+
 _LOG = logging.getLogger("databricks.sdk")
 
 
@@ -36,13 +49,30 @@ class _RowCreator(tuple):
 
 
 class Row(tuple):
+    __columns__: ClassVar[list[str]] = []
+    __positions__: ClassVar[dict[str, int]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # columns are looked up by name in constant time
+        cls.__positions__ = {col: i for i, col in enumerate(cls.__columns__)}
+        for col, i in cls.__positions__.items():
+            # attribute access of columns skips __getattr__, unless they are named like tuple methods
+            if col.isidentifier() and not hasattr(cls, col):
+                setattr(cls, col, property(operator.itemgetter(i)))
+
+    @classmethod
+    def factory(cls, columns: list[str]) -> type["Row"]:
+        """Returns the class of rows with the given `columns`"""
+        return type("Row", (cls,), {"__columns__": list(columns)})
+
     # Python SDK convention
     def as_dict(self) -> dict[str, any]:
         return dict(zip(self.__columns__, self, strict=True))
 
     # PySpark convention
     def __contains__(self, item):
-        return item in self.__columns__
+        return item in self.__positions__
 
     def __getitem__(self, col):
         if isinstance(col, int | slice):
@@ -52,20 +82,224 @@ class Row(tuple):
 
     def __getattr__(self, col):
         try:
-            idx = self.__columns__.index(col)
+            idx = self.__positions__[col]
             return self[idx]
         except IndexError:
             raise AttributeError(col)  # noqa: B904
-        except ValueError:
+        except KeyError:
             raise AttributeError(col)  # noqa: B904
 
     def __repr__(self):
         return f"Row({', '.join(f'{k}={v}' for (k, v) in zip(self.__columns__, self, strict=True))})"
 
 
+@dataclass
+class _PendingStatement:
+    future: Future
+    deadline: float
+    next_poll: float
+    timeout: timedelta
+    attempt: int = 0
+
+
+class _StatementPoller:
+    """Drives all statements submitted with `StatementExecutionExt.submit` from a single thread, that polls
+    every statement due for a status check in a round of up to `max_polls` concurrent `get_statement` calls.
+    The thread runs only while there are outstanding statements."""
+
+    def __init__(self, api: "StatementExecutionExt", max_polls: int):
+        self._api = api
+        self._max_polls = max_polls
+        self._cond = threading.Condition()
+        self._pending: dict[str, _PendingStatement] = {}
+        self._thread: threading.Thread | None = None
+
+    def add(self, statement_id: str, future: Future, timeout: timedelta):
+        now = time.monotonic()
+        pending = _PendingStatement(future, now + timeout.total_seconds(), now + FIRST_POLL_DELAY, timeout)
+        with self._cond:
+            self._pending[statement_id] = pending
+            if self._thread is None:
+                self._start()
+            self._cond.notify()
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name="statement-poller", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            with ThreadPoolExecutor(self._max_polls, thread_name_prefix="statement-poll") as pool:
+                while self._run_round(pool):
+                    pass
+        finally:
+            with self._cond:
+                self._thread = None
+                # statements added while the thread was stopping, or left by an unexpected failure
+                if self._pending:
+                    self._start()
+
+    def _run_round(self, pool: ThreadPoolExecutor) -> bool:
+        """Polls the statements due for a status check and returns False, once there are no statements"""
+        with self._cond:
+            if not self._pending:
+                return False
+            now = time.monotonic()
+            due = [(sid, p) for sid, p in self._pending.items() if p.next_poll <= now]
+            if not due:
+                self._cond.wait(min(p.next_poll for p in self._pending.values()) - now)
+                return True
+        try:
+            outcomes = list(pool.map(self._poll, [sid for sid, _ in due]))
+        except Exception as err:
+            outcomes = [err] * len(due)
+        for (statement_id, pending), outcome in zip(due, outcomes, strict=True):
+            try:
+                self._handle(statement_id, pending, outcome)
+            except Exception as err:
+                # only the statement at hand fails, e.g. when its cancellation fails
+                _LOG.warning(f"Failed to handle statement {statement_id}: {err}")
+                self._forget(statement_id)
+                self._fail(pending.future, err)
+        return True
+
+    def _poll(self, statement_id: str):
+        try:
+            return self._api.get_statement(statement_id)
+        except Exception as err:
+            return err
+
+    def _handle(self, statement_id: str, pending: _PendingStatement, outcome):
+        if pending.future.cancelled():
+            self._forget(statement_id)
+            self._api.cancel_execution(statement_id)
+            return
+        if isinstance(outcome, Exception):
+            self._forget(statement_id)
+            self._fail(pending.future, outcome)
+            return
+        if outcome.status.state == StatementState.SUCCEEDED:
+            self._forget(statement_id)
+            response = ExecuteStatementResponse(
+                manifest=outcome.manifest, result=outcome.result, statement_id=statement_id, status=outcome.status
+            )
+            # the consumer may have cancelled the future in the meantime
+            with suppress(InvalidStateError):
+                pending.future.set_result(response)
+            return
+        try:
+            self._api._raise_if_needed(outcome.status)
+        except RuntimeError as err:
+            self._forget(statement_id)
+            self._fail(pending.future, err)
+            return
+        now = time.monotonic()
+        if now >= pending.deadline:
+            self._forget(statement_id)
+            msg = f"timed out after {pending.timeout}: current status: {outcome.status.state.value}"
+            self._fail(pending.future, TimeoutError(msg))
+            self._api.cancel_execution(statement_id)
+            return
+        pending.attempt += 1
+        sleep = min(FIRST_POLL_DELAY * 2**pending.attempt, MAX_SLEEP_PER_ATTEMPT)
+        pending.next_poll = now + sleep * (1 + random.random() / 10)
+
+    def _forget(self, statement_id: str):
+        with self._cond:
+            self._pending.pop(statement_id, None)
+
+    @staticmethod
+    def _fail(future: Future, err: BaseException):
+        with suppress(InvalidStateError):
+            future.set_exception(err)
+
+
+class _ChunkReadAhead:
+    """Follows the links to the next result chunks in a background thread, while the consumer converts rows
+    of the previous chunks. At most `depth` chunks and, unless it's a single chunk, `max_bytes` bytes
+    are buffered. Links are followed in order, as every chunk links to the next one."""
+
+    def __init__(self, next_chunk: Callable[[ResultData], ResultData], first: ResultData, depth: int, max_bytes: int):
+        self._next_chunk = next_chunk
+        self._depth = depth
+        self._max_bytes = max_bytes
+        self._cond = threading.Condition()
+        self._buffered: deque[ResultData] = deque()
+        self._buffered_bytes = 0
+        self._done = False
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(first,), name="chunk-read-ahead", daemon=True)
+        self._thread.start()
+
+    def __iter__(self) -> Iterator[ResultData]:
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._buffered or self._done)
+                    if not self._buffered:
+                        if self._error is not None:
+                            raise self._error
+                        return
+                    result_data = self._buffered.popleft()
+                    self._buffered_bytes -= result_data.byte_count or 0
+                    self._cond.notify_all()
+                yield result_data
+        finally:
+            self.close()
+
+    def close(self):
+        """Stops reading ahead, when the consumer stops early"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _has_room(self) -> bool:
+        if self._closed or not self._buffered:
+            return True
+        return len(self._buffered) < self._depth and self._buffered_bytes < self._max_bytes
+
+    def _run(self, result_data: ResultData):
+        try:
+            while result_data.next_chunk_index is not None:
+                with self._cond:
+                    self._cond.wait_for(self._has_room)
+                    if self._closed:
+                        return
+                result_data = self._next_chunk(result_data)
+                _LOG.debug(f"Read ahead chunk #{result_data.chunk_index}")
+                with self._cond:
+                    self._buffered.append(result_data)
+                    self._buffered_bytes += result_data.byte_count or 0
+                    self._cond.notify_all()
+        except Exception as err:
+            with self._cond:
+                self._error = err
+        finally:
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+
 class StatementExecutionExt(StatementExecutionAPI):
-    def __init__(self, api_client):
+    def __init__(
+        self,
+        api_client,
+        *,
+        max_polls: int = 8,
+        read_ahead: int = 2,
+        max_read_ahead_bytes: int = 64 * 1024 * 1024,
+        config: Config | None = None,
+    ):
+        """Rows of INLINE results are converted while up to `read_ahead` next chunks, or `max_read_ahead_bytes`
+        bytes of them, are fetched in the background. Set `read_ahead=0` to fetch chunks only when needed.
+
+        Chunks of EXTERNAL_LINKS results are downloaded with the connection settings of the `config`."""
         super().__init__(api_client)
+        self._downloads = self._download_session(config)
+        self._poller = _StatementPoller(self, max_polls)
+        self._read_ahead = read_ahead
+        self._max_read_ahead_bytes = max_read_ahead_bytes
         self.type_converters = {
             ColumnInfoTypeName.ARRAY: json.loads,
             # ColumnInfoTypeName.BINARY: not_supported(ColumnInfoTypeName.BINARY),
@@ -87,6 +321,21 @@ class StatementExecutionExt(StatementExecutionAPI):
             # ColumnInfoTypeName.USER_DEFINED_TYPE: not_supported(ColumnInfoTypeName.USER_DEFINED_TYPE),
         }
 
+    @staticmethod
+    def _download_session(config: Config | None) -> requests.Session:
+        """Presigned links must not receive the workspace credentials, so chunks are downloaded with a session
+        without them. Like the session of the SDK, it uses the proxy and the CA bundle from the environment."""
+        session = requests.Session()
+        if config is None:
+            return session
+        session.verify = not config.skip_verify
+        pool_size = config.max_connection_pools or 20
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=config.max_connections_per_pool or pool_size, pool_block=True
+        )
+        session.mount("https://", adapter)
+        return session
+
     @staticmethod
     def _raise_if_needed(status: StatementStatus):
         if status.state not in [StatementState.FAILED, StatementState.CANCELED, StatementState.CLOSED]:
@@ -105,6 +354,8 @@ class StatementExecutionExt(StatementExecutionAPI):
         catalog: str | None = None,
         schema: str | None = None,
         timeout: timedelta = timedelta(minutes=20),
+        disposition: Disposition = Disposition.INLINE,
+        result_format: Format = Format.JSON_ARRAY,
     ) -> ExecuteStatementResponse:
         # The wait_timeout field must be 0 seconds (disables wait),
         # or between 5 seconds and 50 seconds.
@@ -115,15 +366,15 @@ class StatementExecutionExt(StatementExecutionAPI):
 
         _LOG.debug(f"Executing SQL statement: {statement}")
 
-        # technically, we can do Disposition.EXTERNAL_LINKS, but let's push it further away.
-        # format is limited to Format.JSON_ARRAY, but other iterations may include ARROW_STREAM.
+        # INLINE results with JSON_ARRAY format are converted by execute_fetch_all(),
+        # EXTERNAL_LINKS results with ARROW_STREAM format are downloaded by execute_fetch_arrow().
         immediate_response = self.execute_statement(
             warehouse_id=warehouse_id,
             statement=statement,
             catalog=catalog,
             schema=schema,
-            disposition=Disposition.INLINE,
-            format=Format.JSON_ARRAY,
+            disposition=disposition,
+            format=result_format,
             byte_limit=byte_limit,
             wait_timeout=wait_timeout,
         )
@@ -155,6 +406,42 @@ class StatementExecutionExt(StatementExecutionAPI):
         msg = f"timed out after {timeout}: {status_message}"
         raise TimeoutError(msg)
 
+    def submit(
+        self,
+        warehouse_id: str,
+        statement: str,
+        *,
+        byte_limit: int | None = None,
+        catalog: str | None = None,
+        schema: str | None = None,
+        timeout: timedelta = timedelta(minutes=20),
+    ) -> Future[ExecuteStatementResponse]:
+        """Submits the statement without waiting for it and returns the future of its response. Statements,
+        that haven't finished immediately, are polled by a single background thread, so that a few threads
+        can keep hundreds of statements in flight. Cancelling the future cancels the statement."""
+        _LOG.debug(f"Submitting SQL statement: {statement}")
+        future = Future()
+        immediate_response = self.execute_statement(
+            warehouse_id=warehouse_id,
+            statement=statement,
+            catalog=catalog,
+            schema=schema,
+            disposition=Disposition.INLINE,
+            format=Format.JSON_ARRAY,
+            byte_limit=byte_limit,
+            wait_timeout="0s",
+        )
+        if immediate_response.status.state == StatementState.SUCCEEDED:
+            future.set_result(immediate_response)
+            return future
+        try:
+            self._raise_if_needed(immediate_response.status)
+        except RuntimeError as err:
+            future.set_exception(err)
+            return future
+        self._poller.add(immediate_response.statement_id, future, timeout)
+        return future
+
     def execute_fetch_all(
         self,
         warehouse_id: str,
@@ -168,33 +455,147 @@ class StatementExecutionExt(StatementExecutionAPI):
         execute_response = self.execute(
             warehouse_id, statement, byte_limit=byte_limit, catalog=catalog, schema=schema, timeout=timeout
         )
-        col_names = []
-        col_conv = []
-        for col in execute_response.manifest.schema.columns:
-            col_names.append(col.name)
-            conv = self.type_converters.get(col.type_name, None)
-            if conv is None:
-                msg = f"{col.name} has no {col.type_name.value} converter"
-                raise ValueError(msg)
-            col_conv.append(conv)
-        row_factory = type("Row", (Row,), {"__columns__": col_names})
+        yield from self.iterate_rows(execute_response)
+
+    def execute_fetch_arrow(
+        self,
+        warehouse_id: str,
+        statement: str,
+        *,
+        catalog: str | None = None,
+        schema: str | None = None,
+        timeout: timedelta = timedelta(minutes=20),
+        max_downloads: int = 4,
+    ) -> Iterator[any]:
+        """Yields the result as Arrow tables, one per result chunk, in order. Results use the EXTERNAL_LINKS
+        disposition with the ARROW_STREAM format, so that large results are not limited by the size of inline
+        results. Up to `max_downloads` chunks are downloaded in parallel from their presigned links and decoded
+        without copying. Requires `pyarrow`."""
+        import pyarrow as pa  # noqa: F401
+
+        execute_response = self.execute(
+            warehouse_id,
+            statement,
+            catalog=catalog,
+            schema=schema,
+            timeout=timeout,
+            disposition=Disposition.EXTERNAL_LINKS,
+            result_format=Format.ARROW_STREAM,
+        )
+        total_chunks = execute_response.manifest.total_chunk_count or 0
+        known_links = {}
+        if execute_response.result is not None:
+            known_links = {link.chunk_index: link for link in execute_response.result.external_links or []}
+        statement_id = execute_response.statement_id
+        with ThreadPoolExecutor(max_downloads, thread_name_prefix="arrow-download") as pool:
+            in_flight = deque()
+            for chunk_index in range(total_chunks):
+                if len(in_flight) >= max_downloads:
+                    yield in_flight.popleft().result()
+                link = known_links.get(chunk_index, None)
+                in_flight.append(pool.submit(self._download_arrow_chunk, statement_id, chunk_index, link))
+            while in_flight:
+                yield in_flight.popleft().result()
+
+    def _download_arrow_chunk(self, statement_id: str, chunk_index: int, link: ExternalLink | None):
+        import pyarrow as pa
+        import pyarrow.ipc
+
+        if link is None:
+            link = self.get_statement_result_chunk_n(statement_id, chunk_index).external_links[0]
+        _LOG.debug(f"Downloading chunk #{chunk_index} of {statement_id}")
+        response = self._downloads.get(link.external_link, timeout=MAX_PLATFORM_TIMEOUT)
+        response.raise_for_status()
+        return pa.ipc.open_stream(pa.py_buffer(response.content)).read_all()
+
+    def execute_fetch_columns(
+        self,
+        warehouse_id: str,
+        statement: str,
+        *,
+        byte_limit: int | None = None,
+        catalog: str | None = None,
+        schema: str | None = None,
+        timeout: timedelta = timedelta(minutes=20),
+    ) -> dict[str, list]:
+        """Returns the result as lists of values by column name. Columns are converted a whole chunk at a time,
+        which costs less CPU than creating and converting rows for large results."""
+        execute_response = self.execute(
+            warehouse_id, statement, byte_limit=byte_limit, catalog=catalog, schema=schema, timeout=timeout
+        )
+        return self.result_columns(execute_response)
+
+    def result_columns(self, execute_response: ExecuteStatementResponse) -> dict[str, list]:
+        """Converts the result of the statement into lists of values by column name"""
+        col_names, col_conv = self._converters(execute_response)
+        columns = [[] for _ in col_names]
+        if execute_response.result is None:
+            return dict(zip(col_names, columns, strict=True))
+        for chunk in self._read_ahead_chunks(execute_response.result):
+            if not chunk.data_array:
+                continue
+            for values, conv, column in zip(zip(*chunk.data_array, strict=True), col_conv, columns, strict=True):
+                if conv is None:
+                    column.extend(values)
+                else:
+                    column.extend([None if v is None else conv(v) for v in values])
+        return dict(zip(col_names, columns, strict=True))
+
+    def iterate_rows(self, execute_response: ExecuteStatementResponse) -> Iterator[Row]:
+        """Converts the result of the statement into rows, fetching the next chunks as needed"""
+        col_names, col_conv = self._converters(execute_response)
+        row_factory = Row.factory(col_names)
         result_data = execute_response.result
         if result_data is None:
             return []
-        while True:
-            for data in result_data.data_array:
+        for chunk in self._read_ahead_chunks(result_data):
+            for data in chunk.data_array:
                 # enumerate() + iterator + tuple constructor makes it more performant
                 # on larger humber of records for Python, even though it's less
                 # readable code.
                 row = []
                 for i, value in enumerate(data):
-                    if value is None:
-                        row.append(None)
+                    conv = col_conv[i]
+                    if value is None or conv is None:
+                        row.append(value)
                     else:
-                        row.append(col_conv[i](value))
+                        row.append(conv(value))
                 yield row_factory(row)
-            if result_data.next_chunk_index is None:
-                return
-            # TODO: replace once ES-828324 is fixed
-            json_response = self._api.do("GET", result_data.next_chunk_internal_link)
-            result_data = ResultData.from_dict(json_response)
+
+    def _converters(self, execute_response: ExecuteStatementResponse) -> tuple[list[str], list[Callable | None]]:
+        """Returns column names and their converters, where None is for values, that need no conversion"""
+        col_names = []
+        col_conv = []
+        for col in execute_response.manifest.schema.columns:
+            col_names.append(col.name)
+            if col.type_name in (ColumnInfoTypeName.STRING, ColumnInfoTypeName.CHAR):
+                # values of JSON_ARRAY results are strings already
+                col_conv.append(None)
+                continue
+            conv = self.type_converters.get(col.type_name, None)
+            if conv is None:
+                msg = f"{col.name} has no {col.type_name.value} converter"
+                raise ValueError(msg)
+            col_conv.append(conv)
+        return col_names, col_conv
+
+    def _read_ahead_chunks(self, first: ResultData) -> Iterator[ResultData]:
+        if first.next_chunk_index is None or self._read_ahead < 1:
+            result_data = first
+            yield result_data
+            while result_data.next_chunk_index is not None:
+                result_data = self._next_chunk(result_data)
+                yield result_data
+            return
+        # next chunks are fetched while rows of the first one are converted
+        read_ahead = _ChunkReadAhead(self._next_chunk, first, self._read_ahead, self._max_read_ahead_bytes)
+        try:
+            yield first
+            yield from read_ahead
+        finally:
+            read_ahead.close()
+
+    def _next_chunk(self, result_data: ResultData) -> ResultData:
+        # TODO: replace once ES-828324 is fixed
+        json_response = self._api.do("GET", result_data.next_chunk_internal_link)
+        return ResultData.from_dict(json_response)
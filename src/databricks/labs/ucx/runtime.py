@@ -12,9 +12,15 @@ from databricks.labs.ucx.assessment.crawlers import (
     PipelinesCrawler,
 )
 from databricks.labs.ucx.config import WorkspaceConfig
-from databricks.labs.ucx.framework.crawlers import RuntimeBackend
+from databricks.labs.ucx.framework.checkpoints import TableCheckpoint
+from databricks.labs.ucx.framework.crawlers import RuntimeBackend, SingleFlightBackend
+from databricks.labs.ucx.framework.parallel import TaskLatency, TaskStats
 from databricks.labs.ucx.framework.tasks import task, trigger
-from databricks.labs.ucx.hive_metastore import GrantsCrawler, TablesCrawler
+from databricks.labs.ucx.hive_metastore import (
+    GrantsCrawler,
+    TablesCrawler,
+    TableSizeCrawler,
+)
 from databricks.labs.ucx.hive_metastore.data_objects import ExternalLocationCrawler
 from databricks.labs.ucx.hive_metastore.mounts import Mounts
 from databricks.labs.ucx.workspace_access.groups import GroupManager
@@ -37,7 +43,10 @@ def crawl_tables(_: WorkspaceConfig):
     as _database name_, _table name_, _table type_, _table location_, etc., in the Delta table named
     `${inventory_database}.tables`. The `inventory_database` placeholder is set in the configuration file. The metadata
     stored is then used in the subsequent tasks and workflows to, for example,  find all Hive Metastore tables that
-    cannot easily be migrated to Unity Catalog."""
+    cannot easily be migrated to Unity Catalog. With `incremental_table_crawl` set in the configuration file, only
+    tables added or failed since the previous run, or not upgraded yet and not checked for a week, as recorded in the
+    `$inventory.table_checks` table, are fetched again. If a full crawl is interrupted, the rerun skips databases
+    crawled before, as marked in the `$inventory.snapshot_progress` table."""
 
 
 @task("assessment", job_cluster="tacl")
@@ -55,12 +64,23 @@ def crawl_grants(cfg: WorkspaceConfig):
 
     Note: This job runs on a separate cluster (named `tacl`) as it requires the proper configuration to have the Table
     ACLs enabled and available for retrieval."""
-    backend = RuntimeBackend()
+    # identical concurrent reads, like of the tables inventory, run on the cluster only once
+    backend = SingleFlightBackend(RuntimeBackend())
     tables = TablesCrawler(backend, cfg.inventory_database)
     grants = GrantsCrawler(tables)
     grants.snapshot()
 
 
+@task("assessment", depends_on=[crawl_tables])
+def crawl_table_sizes(cfg: WorkspaceConfig):
+    """Runs `DESCRIBE DETAIL` for every Delta table in `${inventory_database}.tables` and persists its size in bytes,
+    number of files, partition columns and the time of the last modification in the `$inventory.table_size` table.
+    Migration uses these data volumes to schedule `DEEP CLONE` of the largest tables first."""
+    backend = RuntimeBackend()
+    tables = TablesCrawler(backend, cfg.inventory_database)
+    TableSizeCrawler(tables).snapshot()
+
+
 @task("assessment", depends_on=[setup_schema])
 def crawl_mounts(cfg: WorkspaceConfig):
     """Defines the scope of the _mount points_ intended for migration into Unity Catalog. As these objects are not
@@ -166,17 +186,29 @@ def crawl_permissions(cfg: WorkspaceConfig):
     Delta table.
 
     This is the first step for the _group migration_ process, which is continued in the `migrate-groups` workflow.
-    This step includes preparing Legacy Table ACLs for local group migration."""
+    This step includes preparing Legacy Table ACLs for local group migration. Latency percentiles of the crawl,
+    grouped by object type, are stored in the `$inventory.task_latencies` Delta table. If this task is interrupted,
+    the rerun skips objects crawled before, as recorded in the `$inventory.checkpoints` Delta table."""
     ws = WorkspaceClient(config=cfg.to_databricks_config())
+    backend = RuntimeBackend()
     permission_manager = PermissionManager.factory(
         ws,
-        RuntimeBackend(),
+        backend,
         cfg.inventory_database,
         num_threads=cfg.num_threads,
         workspace_start_path=cfg.workspace_start_path,
+        use_asyncio=cfg.use_asyncio,
     )
-    permission_manager.cleanup()
-    permission_manager.inventorize_permissions()
+    # checkpoints are flushed by the permission manager, once crawled permissions are saved
+    checkpoint = TableCheckpoint(backend, cfg.inventory_database, flush_every=None)
+    if checkpoint.completed("crawl permissions"):
+        logger.info("Resuming interrupted crawl of permissions")
+    else:
+        permission_manager.cleanup()
+    stats = TaskStats()
+    permission_manager.inventorize_permissions(stats=stats, checkpoint=checkpoint)
+    checkpoint.clear("crawl permissions")
+    backend.save_table(f"hive_metastore.{cfg.inventory_database}.task_latencies", stats.latencies(), TaskLatency)
 
 
 @task(
@@ -219,17 +251,31 @@ def migrate_permissions(cfg: WorkspaceConfig):
         logger.info("Skipping group migration as no groups were found.")
         return
 
+    backend = RuntimeBackend()
     permission_manager = PermissionManager.factory(
         ws,
-        RuntimeBackend(),
+        backend,
         cfg.inventory_database,
         num_threads=cfg.num_threads,
         workspace_start_path=cfg.workspace_start_path,
     )
 
-    permission_manager.apply_group_permissions(group_manager.migration_groups_provider, destination="backup")
+    # rerun of the interrupted task applies only permissions, that were not applied before
+    checkpoint = TableCheckpoint(backend, cfg.inventory_database)
+    migration_groups = group_manager.migration_groups_provider
+    backup_applied = permission_manager.apply_group_permissions(
+        migration_groups, destination="backup", checkpoint=checkpoint
+    )
     group_manager.replace_workspace_groups_with_account_groups()
-    permission_manager.apply_group_permissions(group_manager.migration_groups_provider, destination="account")
+    account_applied = permission_manager.apply_group_permissions(
+        migration_groups, destination="account", checkpoint=checkpoint
+    )
+    if not (backup_applied and account_applied):
+        # checkpoints are kept, so that the rerun retries only the failed permissions
+        logger.warning("Some permissions were not applied, rerun the task to retry them")
+        return
+    checkpoint.clear("apply backup group permissions")
+    checkpoint.clear("apply account group permissions")
 
 
 @task("migrate-groups-cleanup", depends_on=[migrate_permissions])
@@ -29,6 +29,13 @@ class Crawler:
         :return:
         """
 
+    def get_async_crawler_tasks(self) -> Iterator[Callable[..., Permissions | None]]:
+        """
+        Same as `get_crawler_tasks`, but tasks may be coroutine functions (see `AsyncTasks`).
+        Crawlers without async implementation return their blocking tasks.
+        """
+        return self.get_crawler_tasks()
+
 
 # TODO: this class has to become typing.Protocol and keep only abstract methods
 # See https://www.oreilly.com/library/view/fluent-python-2nd/9781492056348/ch13.html
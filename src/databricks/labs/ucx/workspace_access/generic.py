@@ -3,12 +3,14 @@ import logging
 from collections.abc import Callable, Iterator
 from dataclasses import dataclass
 from functools import partial
+from typing import ClassVar
 
 from databricks.sdk import WorkspaceClient
 from databricks.sdk.core import DatabricksError
 from databricks.sdk.retries import retried
 from databricks.sdk.service import iam, ml, workspace
 
+from databricks.labs.ucx.mixins.aio import AsyncApiClient
 from databricks.labs.ucx.mixins.hardening import rate_limited
 from databricks.labs.ucx.workspace_access.base import (
     Applier,
@@ -32,15 +34,37 @@ class RetryableError(DatabricksError):
 
 
 class GenericPermissionsSupport(Crawler, Applier):
-    def __init__(self, ws: WorkspaceClient, listings: list[Callable[..., Iterator[GenericPermissionsInfo]]]):
+    _ignored_error_codes: ClassVar[list[str]] = [
+        "RESOURCE_DOES_NOT_EXIST",
+        "RESOURCE_NOT_FOUND",
+        "PERMISSION_DENIED",
+        "FEATURE_DISABLED",
+    ]
+
+    def __init__(
+        self,
+        ws: WorkspaceClient,
+        listings: list[Callable[..., Iterator[GenericPermissionsInfo]]],
+        *,
+        async_client: AsyncApiClient | None = None,
+    ):
         self._ws = ws
         self._listings = listings
+        self._async_client = async_client
 
     def get_crawler_tasks(self):
         for listing in self._listings:
             for info in listing():
                 yield partial(self._crawler_task, info.request_type, info.object_id)
 
+    def get_async_crawler_tasks(self):
+        if self._async_client is None:
+            yield from self.get_crawler_tasks()
+            return
+        for listing in self._listings:
+            for info in listing():
+                yield partial(self._async_crawler_task, info.request_type, info.object_id)
+
     def is_item_relevant(self, item: Permissions, migration_state: GroupMigrationState) -> bool:
         # passwords and tokens are represented on the workspace-level
         if item.object_id in ("tokens", "passwords"):
@@ -74,18 +98,27 @@ class GenericPermissionsSupport(Crawler, Applier):
             raw=json.dumps(permissions.as_dict()),
         )
 
+    async def _async_crawler_task(self, object_type: str, object_id: str) -> Permissions | None:
+        try:
+            permissions = await self._async_client.permissions_get(object_type, object_id)
+        except DatabricksError as e:
+            if e.error_code not in self._ignored_error_codes:
+                raise
+            logger.warning(f"Could not get permissions for {object_type} {object_id} due to {e.error_code}")
+            return None
+        return Permissions(
+            object_id=object_id,
+            object_type=object_type,
+            raw=json.dumps(permissions.as_dict()),
+        )
+
     # TODO remove after ES-892977 is fixed
     @retried(on=[RetryableError])
     def _safe_get_permissions(self, object_type: str, object_id: str) -> iam.ObjectPermissions | None:
         try:
             return self._ws.permissions.get(object_type, object_id)
         except DatabricksError as e:
-            if e.error_code in [
-                "RESOURCE_DOES_NOT_EXIST",
-                "RESOURCE_NOT_FOUND",
-                "PERMISSION_DENIED",
-                "FEATURE_DISABLED",
-            ]:
+            if e.error_code in self._ignored_error_codes:
                 logger.warning(f"Could not get permissions for {object_type} {object_id} due to {e.error_code}")
                 return None
             else:
@@ -134,7 +167,13 @@ def listing_wrapper(
     return wrapper
 
 
-def workspace_listing(ws: WorkspaceClient, num_threads=20, start_path: str | None = "/"):
+def workspace_listing(
+    ws: WorkspaceClient,
+    num_threads=20,
+    start_path: str | None = "/",
+    *,
+    async_client: AsyncApiClient | None = None,
+):
     def _convert_object_type_to_request_type(_object: workspace.ObjectInfo) -> str | None:
         match _object.object_type:
             case workspace.ObjectType.NOTEBOOK:
@@ -154,7 +193,7 @@ def workspace_listing(ws: WorkspaceClient, num_threads=20, start_path: str | Non
     def inner():
         from databricks.labs.ucx.workspace_access.listing import WorkspaceListing
 
-        ws_listing = WorkspaceListing(ws, num_threads=num_threads, with_directories=False)
+        ws_listing = WorkspaceListing(ws, num_threads=num_threads, with_directories=False, async_client=async_client)
         for _object in ws_listing.walk(start_path):
             request_type = _convert_object_type_to_request_type(_object)
             if request_type:
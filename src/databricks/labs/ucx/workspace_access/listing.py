@@ -1,6 +1,7 @@
+import asyncio
 import datetime as dt
 import logging
-from collections.abc import Iterator
+from collections.abc import Iterable, Iterator
 from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from itertools import groupby
 
@@ -8,6 +9,8 @@ from databricks.sdk import WorkspaceClient
 from databricks.sdk.core import DatabricksError
 from databricks.sdk.service.workspace import ObjectInfo, ObjectType
 
+from databricks.labs.ucx.mixins.aio import AsyncApiClient
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,12 +21,14 @@ class WorkspaceListing:
         num_threads: int,
         *,
         with_directories: bool = True,
+        async_client: AsyncApiClient | None = None,
     ):
         self.start_time = None
         self._ws = ws
         self.results: list[ObjectInfo] = []
         self._num_threads = num_threads
         self._with_directories = with_directories
+        self._async_client = async_client
         self._counter = 0
 
     def _progress_report(self, _):
@@ -45,23 +50,35 @@ class WorkspaceListing:
         return self._ws.workspace.list(path=path, recursive=False)
 
     def _list_and_analyze(self, obj: ObjectInfo) -> (list[ObjectInfo], list[ObjectInfo]):
-        directories = []
-        others = []
         try:
-            grouped_iterator = groupby(
-                self._list_workspace(obj.path), key=lambda x: x.object_type == ObjectType.DIRECTORY
-            )
-            for is_directory, objects in grouped_iterator:
-                if is_directory:
-                    directories.extend(list(objects))
-                else:
-                    others.extend(list(objects))
-            logger.debug(f"Listed {obj.path}, found {len(directories)} sub-directories and {len(others)} other objects")
+            return self._analyze(obj, self._list_workspace(obj.path))
         except DatabricksError as err:
             # See https://github.com/databrickslabs/ucx/issues/230
             if err.error_code != "RESOURCE_DOES_NOT_EXIST":
                 raise err
             logger.warning(f"{obj.path} is not listable. Ignoring")
+        return [], []
+
+    async def _list_and_analyze_async(self, obj: ObjectInfo) -> (list[ObjectInfo], list[ObjectInfo]):
+        try:
+            return self._analyze(obj, await self._async_client.workspace_list(obj.path))
+        except DatabricksError as err:
+            if err.error_code != "RESOURCE_DOES_NOT_EXIST":
+                raise err
+            logger.warning(f"{obj.path} is not listable. Ignoring")
+        return [], []
+
+    @staticmethod
+    def _analyze(obj: ObjectInfo, listed: Iterable[ObjectInfo]) -> (list[ObjectInfo], list[ObjectInfo]):
+        directories = []
+        others = []
+        grouped_iterator = groupby(listed, key=lambda x: x.object_type == ObjectType.DIRECTORY)
+        for is_directory, objects in grouped_iterator:
+            if is_directory:
+                directories.extend(list(objects))
+            else:
+                others.extend(list(objects))
+        logger.debug(f"Listed {obj.path}, found {len(directories)} sub-directories and {len(others)} other objects")
         return directories, others
 
     def walk(self, start_path="/"):
@@ -70,6 +87,10 @@ class WorkspaceListing:
         root_object = self._ws.workspace.get_status(start_path)
         self.results.append(root_object)
 
+        if self._async_client is not None:
+            asyncio.run(self._walk_async(root_object))
+            return self.results
+
         with ThreadPoolExecutor(self._num_threads) as executor:
             initial_future = executor.submit(self._list_and_analyze, root_object)
             initial_future.add_done_callback(self._progress_report)
@@ -97,3 +118,22 @@ class WorkspaceListing:
             )
             self._progress_report(None)
         return self.results
+
+    async def _walk_async(self, root_object: ObjectInfo):
+        # every directory is listed by a coroutine, so the number of concurrent listings
+        # is bounded by the connection pool of the async client and not by the number of threads
+        async with self._async_client:
+            pending = {asyncio.create_task(self._list_and_analyze_async(root_object))}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    self._progress_report(task)
+                    directories, others = task.result()
+                    self.results.extend(directories)
+                    self.results.extend(others)
+                    for directory in directories:
+                        pending.add(asyncio.create_task(self._list_and_analyze_async(directory)))
+        logger.info(
+            f"Recursive WorkspaceFS listing finished at {dt.datetime.now()}. "
+            f"Total time taken for workspace listing: {dt.datetime.now() - self.start_time}"
+        )
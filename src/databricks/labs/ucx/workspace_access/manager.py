@@ -1,3 +1,5 @@
+import asyncio
+import contextlib
 import logging
 import os
 from collections.abc import Callable, Iterator
@@ -7,9 +9,20 @@ from typing import Literal
 from databricks.sdk import WorkspaceClient
 from databricks.sdk.service import sql
 
-from databricks.labs.ucx.framework.crawlers import CrawlerBase, SqlBackend
-from databricks.labs.ucx.framework.parallel import Threads
+from databricks.labs.ucx.framework.checkpoints import Checkpoint
+from databricks.labs.ucx.framework.crawlers import (
+    CrawlerBase,
+    SingleFlightBackend,
+    SqlBackend,
+)
+from databricks.labs.ucx.framework.parallel import (
+    AdaptiveConcurrency,
+    AsyncTasks,
+    TaskStats,
+    Threads,
+)
 from databricks.labs.ucx.hive_metastore import GrantsCrawler, TablesCrawler
+from databricks.labs.ucx.mixins.aio import AsyncApiClient
 from databricks.labs.ucx.workspace_access import generic, redash, scim, secrets
 from databricks.labs.ucx.workspace_access.base import Applier, Crawler, Permissions
 from databricks.labs.ucx.workspace_access.groups import GroupMigrationState
@@ -20,11 +33,21 @@ logger = logging.getLogger(__name__)
 
 class PermissionManager(CrawlerBase):
     def __init__(
-        self, backend: SqlBackend, inventory_database: str, crawlers: list[Crawler], appliers: dict[str, Applier]
+        self,
+        backend: SqlBackend,
+        inventory_database: str,
+        crawlers: list[Crawler],
+        appliers: dict[str, Applier],
+        *,
+        async_client: AsyncApiClient | None = None,
+        ws: WorkspaceClient | None = None,
     ):
         super().__init__(backend, "hive_metastore", inventory_database, "permissions", Permissions)
+        self._ws = ws
         self._crawlers = crawlers
         self._appliers = appliers
+        self._async_client = async_client
+        self._save_every = 10_000
 
     @classmethod
     def factory(
@@ -35,9 +58,16 @@ class PermissionManager(CrawlerBase):
         *,
         num_threads: int | None = None,
         workspace_start_path: str = "/",
+        use_asyncio: bool = False,
     ) -> "PermissionManager":
         if num_threads is None:
             num_threads = os.cpu_count() * 2
+        if not isinstance(sql_backend, SingleFlightBackend):
+            # crawlers of tables and grants read the same inventory tables concurrently
+            sql_backend = SingleFlightBackend(sql_backend)
+        async_client = None
+        if use_asyncio:
+            async_client = AsyncApiClient(ws.config)
         generic_acl_listing = [
             generic.listing_wrapper(ws.clusters.list, "cluster_id", "clusters"),
             generic.listing_wrapper(ws.cluster_policies.list, "policy_id", "cluster-policies"),
@@ -47,7 +77,9 @@ class PermissionManager(CrawlerBase):
             generic.listing_wrapper(ws.pipelines.list_pipelines, "pipeline_id", "pipelines"),
             generic.listing_wrapper(generic.experiments_listing(ws), "experiment_id", "experiments"),
             generic.listing_wrapper(generic.models_listing(ws), "id", "registered-models"),
-            generic.workspace_listing(ws, num_threads=num_threads, start_path=workspace_start_path),
+            generic.workspace_listing(
+                ws, num_threads=num_threads, start_path=workspace_start_path, async_client=async_client
+            ),
             generic.authorization_listing(),
         ]
         redash_acl_listing = [
@@ -55,9 +87,9 @@ class PermissionManager(CrawlerBase):
             redash.redash_listing_wrapper(ws.dashboards.list, sql.ObjectTypePlural.DASHBOARDS),
             redash.redash_listing_wrapper(ws.queries.list, sql.ObjectTypePlural.QUERIES),
         ]
-        generic_support = generic.GenericPermissionsSupport(ws, generic_acl_listing)
-        sql_support = redash.SqlPermissionsSupport(ws, redash_acl_listing)
-        secrets_support = secrets.SecretScopesSupport(ws)
+        generic_support = generic.GenericPermissionsSupport(ws, generic_acl_listing, async_client=async_client)
+        sql_support = redash.SqlPermissionsSupport(ws, redash_acl_listing, async_client=async_client)
+        secrets_support = secrets.SecretScopesSupport(ws, async_client=async_client)
         scim_support = scim.ScimSupport(ws)
         tables_crawler = TablesCrawler(sql_backend, inventory_database)
         grants_crawler = GrantsCrawler(tables_crawler)
@@ -67,6 +99,8 @@ class PermissionManager(CrawlerBase):
             inventory_database,
             [generic_support, sql_support, secrets_support, scim_support, tacl_support],
             cls._object_type_appliers(generic_support, sql_support, secrets_support, scim_support, tacl_support),
+            async_client=async_client,
+            ws=ws,
         )
 
     @staticmethod
@@ -104,25 +138,68 @@ class PermissionManager(CrawlerBase):
             "CATALOG": tacl_support,
         }
 
-    def inventorize_permissions(self):
+    def inventorize_permissions(self, *, stats: TaskStats | None = None, checkpoint: Checkpoint | None = None):
+        """Crawls permissions of all workspace objects and appends them to the inventory table.
+
+        With `checkpoint`, objects crawled in the previous (interrupted) runs are skipped. Checkpoints
+        are flushed only after the batch of crawled permissions is saved, so create it with `flush_every=None`.
+        Permissions are appended, unless the crawl resumes from the checkpoint: objects crawled after the last
+        flush of the interrupted run are crawled again, so their permissions are merged by object instead.
+        """
         logger.debug("Crawling permissions")
-        crawler_tasks = list(self._get_crawler_tasks())
-        logger.info(f"Starting to crawl permissions. Total tasks: {len(crawler_tasks)}")
-        results, errors = Threads.gather("crawl permissions", crawler_tasks)
-        if len(errors) > 0:
-            # TODO: https://github.com/databrickslabs/ucx/issues/406
-            logger.error(f"Detected {len(errors)} errors while crawling permissions")
-        items = []
-        for item in results:
+        logger.info("Starting to crawl permissions")
+        # crawler tasks are listed lazily and crawled results are saved in batches,
+        # so that we never hold the whole workspace in memory
+        batch: list[Permissions] = []
+        saved_cnt = 0
+        resuming = checkpoint is not None and len(checkpoint.completed("crawl permissions")) > 0
+
+        def save():
+            nonlocal batch, saved_cnt
+            self._save(batch, upsert=resuming)
+            saved_cnt += len(batch)
+            batch = []
+            if checkpoint is not None:
+                checkpoint.flush()
+
+        def sink(item: Permissions):
             if item.object_type not in self._appliers:
                 msg = f"unknown object_type: {item.object_type}"
                 raise KeyError(msg)
-            items.append(item)
-        logger.info(f"Total crawled permissions after filtering: {len(items)}")
-        self._save(items)
-        logger.info(f"Saved {len(items)} to {self._full_name}")
+            batch.append(item)
+            if len(batch) >= self._save_every:
+                save()
+
+        if self._async_client is not None:
+            errors = asyncio.run(self._crawl_async(sink, stats=stats, checkpoint=checkpoint))
+        else:
+            crawler_tasks = self._get_crawler_tasks()
+            concurrency = AdaptiveConcurrency()
+            # requests, that were throttled and retried by the SDK, don't fail the tasks, so they are watched
+            watching = contextlib.nullcontext() if self._ws is None else concurrency.watch(self._ws)
+            with watching:
+                errors = Threads.gather_into(
+                    "crawl permissions",
+                    crawler_tasks,
+                    sink,
+                    concurrency=concurrency,
+                    stats=stats,
+                    checkpoint=checkpoint,
+                )
+        if len(errors) > 0:
+            # TODO: https://github.com/databrickslabs/ucx/issues/406
+            logger.error(f"Detected {len(errors)} errors while crawling permissions")
+        save()
+        logger.info(f"Total crawled permissions after filtering: {saved_cnt}")
+        logger.info(f"Saved {saved_cnt} to {self._full_name}")
 
-    def apply_group_permissions(self, migration_state: GroupMigrationState, destination: Literal["backup", "account"]):
+    def apply_group_permissions(
+        self,
+        migration_state: GroupMigrationState,
+        destination: Literal["backup", "account"],
+        *,
+        checkpoint: Checkpoint | None = None,
+    ):
         # list shall be sorted prior to using group by
         if len(migration_state.groups) == 0:
             logger.info("No valid groups selected, nothing to do.")
@@ -153,7 +230,7 @@ class PermissionManager(CrawlerBase):
             applier_tasks.extend(tasks_for_support)
 
         logger.info(f"Starting to apply permissions on {destination} groups. Total tasks: {len(applier_tasks)}")
-        _, errors = Threads.gather(f"apply {destination} group permissions", applier_tasks)
+        _, errors = Threads.gather(f"apply {destination} group permissions", applier_tasks, checkpoint=checkpoint)
         if len(errors) > 0:
             # TODO: https://github.com/databrickslabs/ucx/issues/406
             logger.error(f"Detected {len(errors)} while applying permissions")
@@ -166,8 +243,11 @@ class PermissionManager(CrawlerBase):
         self._exec(f"DROP TABLE IF EXISTS {self._full_name}")
         logger.info("Inventory table cleanup complete")
 
-    def _save(self, items: list[Permissions]):
-        self._append_records(items)  # TODO: update instead of append
+    def _save(self, items: list[Permissions], *, upsert: bool = False):
+        if upsert:
+            self._upsert_records(items, ["object_type", "object_id"])
+        else:
+            self._append_records(items)
         logger.info("Successfully saved the items to inventory table")
 
     def _load_all(self) -> list[Permissions]:
@@ -177,6 +257,23 @@ class PermissionManager(CrawlerBase):
             for object_id, object_type, raw in self._fetch(f"SELECT object_id, object_type, raw FROM {self._full_name}")
         ]
 
+    async def _crawl_async(self, sink, *, stats: TaskStats | None, checkpoint: Checkpoint | None):
+        # REST-bound crawlers run as coroutines with hundreds of requests in flight,
+        # the rest of the crawlers are offloaded to the default executor of the event loop
+        tasks = AsyncTasks(
+            "crawl permissions",
+            self._get_async_crawler_tasks(),
+            max_in_flight=self._async_client.max_connections * 2,
+            stats=stats,
+            checkpoint=checkpoint,
+        )
+        async with self._async_client:
+            return await tasks.run_into(sink)
+
     def _get_crawler_tasks(self) -> Iterator[Callable[..., Permissions | None]]:
         for support in self._crawlers:
             yield from support.get_crawler_tasks()
+
+    def _get_async_crawler_tasks(self) -> Iterator[Callable[..., Permissions | None]]:
+        for support in self._crawlers:
+            yield from support.get_async_crawler_tasks()
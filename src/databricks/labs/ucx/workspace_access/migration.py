@@ -8,6 +8,7 @@ from databricks.labs.ucx.framework.crawlers import (
     SqlBackend,
     StatementExecutionBackend,
 )
+from databricks.labs.ucx.framework.staging import StagingArea
 from databricks.labs.ucx.workspace_access.groups import GroupManager
 from databricks.labs.ucx.workspace_access.manager import PermissionManager
 from databricks.labs.ucx.workspace_access.secrets import SecretScopesSupport
@@ -25,7 +26,7 @@ class GroupMigrationToolkit:
         secrets_support = SecretScopesSupport(ws)
         self._permissions_manager = PermissionManager.factory(
             ws,
-            self._backend(ws, warehouse_id),
+            self._backend(ws, warehouse_id, config.staging_folder),
             config.inventory_database,
             num_threads=config.num_threads,
             workspace_start_path=config.workspace_start_path,
@@ -64,10 +65,10 @@ class GroupMigrationToolkit:
         }
 
     @staticmethod
-    def _backend(ws: WorkspaceClient, warehouse_id: str | None = None) -> SqlBackend:
+    def _backend(ws: WorkspaceClient, warehouse_id: str | None = None, staging_folder: str | None = None) -> SqlBackend:
         if warehouse_id is None:
             return RuntimeBackend()
-        return StatementExecutionBackend(ws, warehouse_id)
+        return StatementExecutionBackend(ws, warehouse_id, staging=StagingArea.for_folder(ws, staging_folder))
 
     @staticmethod
     def _verify_ws_client(w: WorkspaceClient):
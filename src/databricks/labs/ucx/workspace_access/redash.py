@@ -3,11 +3,13 @@ import json
 from collections.abc import Callable
 from dataclasses import dataclass
 from functools import partial
+from typing import ClassVar
 
 from databricks.sdk import WorkspaceClient
 from databricks.sdk.core import DatabricksError
 from databricks.sdk.service import iam, sql
 
+from databricks.labs.ucx.mixins.aio import AsyncApiClient
 from databricks.labs.ucx.mixins.hardening import rate_limited
 from databricks.labs.ucx.workspace_access.base import (
     Applier,
@@ -29,9 +31,18 @@ class SqlPermissionsInfo:
 
 
 class SqlPermissionsSupport(Crawler, Applier):
-    def __init__(self, ws: WorkspaceClient, listings: list[Callable[..., list[SqlPermissionsInfo]]]):
+    _ignored_error_codes: ClassVar[list[str]] = ["RESOURCE_DOES_NOT_EXIST", "RESOURCE_NOT_FOUND", "PERMISSION_DENIED"]
+
+    def __init__(
+        self,
+        ws: WorkspaceClient,
+        listings: list[Callable[..., list[SqlPermissionsInfo]]],
+        *,
+        async_client: AsyncApiClient | None = None,
+    ):
         self._ws = ws
         self._listings = listings
+        self._async_client = async_client
 
     def is_item_relevant(self, item: Permissions, migration_state: GroupMigrationState) -> bool:
         mentioned_groups = [
@@ -44,6 +55,14 @@ class SqlPermissionsSupport(Crawler, Applier):
             for item in listing():
                 yield partial(self._crawler_task, item.object_id, item.request_type)
 
+    def get_async_crawler_tasks(self):
+        if self._async_client is None:
+            yield from self.get_crawler_tasks()
+            return
+        for listing in self._listings:
+            for item in listing():
+                yield partial(self._async_crawler_task, item.object_id, item.request_type)
+
     def _get_apply_task(self, item: Permissions, migration_state: GroupMigrationState, destination: Destination):
         new_acl = self._prepare_new_acl(
             sql.GetResponse.from_dict(json.loads(item.raw)).access_control_list,
@@ -61,7 +80,7 @@ class SqlPermissionsSupport(Crawler, Applier):
         try:
             return self._ws.dbsql_permissions.get(object_type, object_id)
         except DatabricksError as e:
-            if e.error_code in ["RESOURCE_DOES_NOT_EXIST", "RESOURCE_NOT_FOUND", "PERMISSION_DENIED"]:
+            if e.error_code in self._ignored_error_codes:
                 logger.warning(f"Could not get permissions for {object_type} {object_id} due to {e.error_code}")
                 return None
             else:
@@ -77,6 +96,20 @@ class SqlPermissionsSupport(Crawler, Applier):
                 raw=json.dumps(permissions.as_dict()),
             )
 
+    async def _async_crawler_task(self, object_id: str, object_type: sql.ObjectTypePlural) -> Permissions | None:
+        try:
+            permissions = await self._async_client.dbsql_permissions_get(object_type, object_id)
+        except DatabricksError as e:
+            if e.error_code not in self._ignored_error_codes:
+                raise
+            logger.warning(f"Could not get permissions for {object_type} {object_id} due to {e.error_code}")
+            return None
+        return Permissions(
+            object_id=object_id,
+            object_type=object_type.value,
+            raw=json.dumps(permissions.as_dict()),
+        )
+
     @rate_limited(max_requests=30)
     def _applier_task(self, object_type: sql.ObjectTypePlural, object_id: str, acl: list[sql.AccessControl]):
         """
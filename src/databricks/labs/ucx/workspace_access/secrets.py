@@ -6,6 +6,7 @@ from functools import partial
 from databricks.sdk import WorkspaceClient
 from databricks.sdk.service import iam, workspace
 
+from databricks.labs.ucx.mixins.aio import AsyncApiClient
 from databricks.labs.ucx.mixins.hardening import rate_limited
 from databricks.labs.ucx.workspace_access.base import (
     Applier,
@@ -17,8 +18,9 @@ from databricks.labs.ucx.workspace_access.groups import GroupMigrationState
 
 
 class SecretScopesSupport(Crawler, Applier):
-    def __init__(self, ws: WorkspaceClient):
+    def __init__(self, ws: WorkspaceClient, *, async_client: AsyncApiClient | None = None):
         self._ws = ws
+        self._async_client = async_client
 
     def get_crawler_tasks(self):
         scopes = self._ws.secrets.list_scopes()
@@ -34,6 +36,21 @@ class SecretScopesSupport(Crawler, Applier):
         for scope in scopes:
             yield partial(_crawler_task, scope)
 
+    def get_async_crawler_tasks(self):
+        if self._async_client is None:
+            yield from self.get_crawler_tasks()
+            return
+        for scope in self._ws.secrets.list_scopes():
+            yield partial(self._async_crawler_task, scope.name)
+
+    async def _async_crawler_task(self, scope_name: str) -> Permissions:
+        acl_items = await self._async_client.secrets_list_acls(scope_name)
+        return Permissions(
+            object_id=scope_name,
+            object_type="secrets",
+            raw=json.dumps([item.as_dict() for item in acl_items]),
+        )
+
     def is_item_relevant(self, item: Permissions, migration_state: GroupMigrationState) -> bool:
         acls = [workspace.AclItem.from_dict(acl) for acl in json.loads(item.raw)]
         mentioned_groups = [acl.principal for acl in acls]
@@ -89,9 +106,9 @@ class SecretScopesSupport(Crawler, Applier):
             else:
                 new_acls.append(acl)
 
-        def apply_acls():
-            for acl in new_acls:
-                self._rate_limited_put_acl(item.object_id, acl.principal, acl.permission)
-            return True
+        return partial(self._apply_acls, item.object_id, new_acls)
 
-        return partial(apply_acls)
+    def _apply_acls(self, object_id: str, acls: list[workspace.AclItem]):
+        for acl in acls:
+            self._rate_limited_put_acl(object_id, acl.principal, acl.permission)
+        return True
@@ -1,6 +1,14 @@
+import json
 import logging
 import re
+import sys
+import threading
+import time
+import urllib.parse
 from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from databricks.sdk.core import Config
 
 from databricks.labs.ucx.framework.crawlers import SqlBackend
 
@@ -40,7 +48,7 @@ class MockBackend(SqlBackend):
         logger.debug(f"Returning rows: {rows}")
         return iter(rows)
 
-    def save_table(self, full_name: str, rows: list[any], klass, mode: str = "append"):
+    def save_table(self, full_name: str, rows: list[any], klass, mode: str = "append", *, keys=None):  # noqa: ARG002
         if klass.__class__ == type:
             self._save_table.append((full_name, rows, mode))
 
@@ -51,3 +59,88 @@ class MockBackend(SqlBackend):
                 continue
             rows += stub_rows
         return rows
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            # client has given up on the response, e.g. after a timeout
+            return
+        super().handle_error(request, client_address)
+
+
+class FakeApiServer:
+    """Local HTTP server, that responds to GET requests with the JSON payloads from `routes`, keyed by
+    the path with the query string. Payloads of bytes are served as they are. A route may be a list of
+    `(status, payload, headers)` responses, that are served in order, the last one repeatedly. Responses with
+    `Transfer-Encoding: chunked` header are sent in chunks. Requests with absolute URLs are served as if
+    the server was an HTTP proxy. Every response is sent after `delay` seconds."""
+
+    def __init__(self, routes: dict, *, delay: float = 0):
+        self.routes = routes
+        self.delay = delay
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = _QuietHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeApiServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def config(self) -> Config:
+        host, port = self._server.server_address
+        return Config(host=f"http://{host}:{port}", token="fake")
+
+    def _respond(self, path: str) -> tuple[int, dict, dict]:
+        with self._lock:
+            self.requests.append(urllib.parse.unquote(path))
+            route = self.routes.get(urllib.parse.unquote(path), None)
+            if route is None:
+                return 404, {"error_code": "RESOURCE_DOES_NOT_EXIST", "message": f"{path} not found"}, {}
+            if not isinstance(route, list):
+                return 200, route, {}
+            if len(route) > 1:
+                return route.pop(0)
+            return route[0]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):  # noqa: N802
+                url = urllib.parse.urlparse(self.path)
+                path = self.path if not url.scheme else self.path[len(f"{url.scheme}://{url.netloc}") :]
+                status, payload, headers = server._respond(path)
+                time.sleep(server.delay)
+                content_type = "application/octet-stream"
+                body = payload
+                if not isinstance(payload, bytes):
+                    content_type = "application/json"
+                    body = json.dumps(payload).encode("utf8")
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Type", content_type)
+                if headers.get("Transfer-Encoding", None) == "chunked":
+                    self.end_headers()
+                    for i in range(0, len(body), 7):
+                        chunk = body[i : i + 7]
+                        self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+                    self.wfile.write(b"0\r\n\r\n")
+                    return
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_):
+                pass
+
+        return Handler
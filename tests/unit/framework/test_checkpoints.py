@@ -0,0 +1,99 @@
+import functools
+
+from databricks.labs.ucx.framework.checkpoints import (
+    FileCheckpoint,
+    TableCheckpoint,
+    TaskCheckpoint,
+)
+from databricks.labs.ucx.framework.parallel import Threads
+
+from ..framework.mocks import MockBackend
+
+
+def test_file_checkpoint_roundtrip(tmp_path):
+    checkpoint = FileCheckpoint(tmp_path / "checkpoints.jsonl", flush_every=2)
+    checkpoint.record("a", "first")
+    assert set() == checkpoint.completed("a")
+
+    checkpoint.record("a", "second", failed=True)
+    checkpoint.record("b", "third")
+    checkpoint.flush()
+
+    assert {"first"} == checkpoint.completed("a")
+    assert {"third"} == checkpoint.completed("b")
+
+    checkpoint.clear("a")
+
+    assert set() == checkpoint.completed("a")
+    assert {"third"} == checkpoint.completed("b")
+
+
+def test_table_checkpoint_loads_completed_keys():
+    backend = MockBackend(
+        rows={
+            "SELECT key, status FROM hive_metastore.ucx.checkpoints": [
+                ("first", "completed"),
+                ("second", "failed"),
+            ]
+        }
+    )
+    checkpoint = TableCheckpoint(backend, "ucx")
+
+    assert {"first"} == checkpoint.completed("crawl permissions")
+    assert "WHERE gather = 'crawl permissions'" in backend.queries[0]
+
+
+def test_table_checkpoint_missing_table():
+    backend = MockBackend(fails_on_first={"checkpoints": ".. TABLE_OR_VIEW_NOT_FOUND .."})
+    checkpoint = TableCheckpoint(backend, "ucx")
+
+    assert set() == checkpoint.completed("crawl permissions")
+
+
+def test_table_checkpoint_persists_and_clears():
+    backend = MockBackend()
+    checkpoint = TableCheckpoint(backend, "ucx", flush_every=None)
+    checkpoint.record("testing", "first")
+    assert [] == backend.rows_written_for("hive_metastore.ucx.checkpoints", "append")
+
+    checkpoint.flush()
+    checkpoint.clear("testing")
+
+    assert [TaskCheckpoint("testing", "first", "completed")] == backend.rows_written_for(
+        "hive_metastore.ucx.checkpoints", "append"
+    )
+    assert ["DELETE FROM hive_metastore.ucx.checkpoints WHERE gather = 'testing'"] == backend.queries
+
+
+def test_gather_skips_completed_tasks(tmp_path):
+    called = []
+
+    def task(x):
+        called.append(x)
+        if x == 3:
+            msg = "failed"
+            raise ValueError(msg)
+        return x
+
+    checkpoint = FileCheckpoint(tmp_path / "checkpoints.jsonl")
+    checkpoint.record("testing", "task(1)")
+    checkpoint.record("testing", "task(3)", failed=True)
+    checkpoint.flush()
+
+    tasks = [functools.partial(task, i) for i in range(1, 5)]
+    results, errors = Threads.gather("testing", tasks, checkpoint=checkpoint)
+
+    assert [2, 4] == sorted(results)
+    assert 1 == len(errors)
+    assert [2, 3, 4] == sorted(called)
+    assert {"task(1)", "task(2)", "task(4)"} == checkpoint.completed("testing")
+
+
+def test_gather_leaves_manually_flushed_checkpoints_buffered(tmp_path):
+    checkpoint = FileCheckpoint(tmp_path / "checkpoints.jsonl", flush_every=None)
+
+    Threads.gather("testing", [functools.partial(str, i) for i in range(3)], checkpoint=checkpoint)
+
+    assert set() == checkpoint.completed("testing")
+    checkpoint.flush()
+    assert {"str(0)", "str(1)", "str(2)"} == checkpoint.completed("testing")
@@ -0,0 +1,155 @@
+import dataclasses
+import os
+import time
+from dataclasses import dataclass
+
+import pytest
+
+from databricks.labs.ucx.framework.codecs import Long, row_codec
+from databricks.labs.ucx.hive_metastore.tables import Table
+from databricks.labs.ucx.workspace_access.base import Permissions
+
+
+@dataclass
+class Sample:
+    name: str
+    enabled: bool
+    count: int
+    ratio: float
+    comment: str = None
+
+
+def test_to_sql():
+    codec = row_codec(Sample)
+
+    assert "'it''s', TRUE, 3, 0.5, NULL" == codec.to_sql(Sample("it's", True, 3, 0.5))
+    assert "'x', FALSE, 0, CAST('nan' AS FLOAT), 'y'" == codec.to_sql(Sample("x", False, 0, float("nan"), "y"))
+
+
+def test_first_missing_ignores_nullable_fields():
+    codec = row_codec(Sample)
+
+    assert codec.first_missing(Sample("x", True, 1, 1.0)) is None
+    assert "count" == codec.first_missing(Sample("x", True, None, None))
+
+
+def test_schema_and_tuple():
+    codec = row_codec(Sample("x", True, 1, 1.0))
+
+    assert codec is row_codec(Sample)
+    assert (
+        "name STRING NOT NULL, enabled BOOLEAN NOT NULL, count INT NOT NULL, ratio FLOAT NOT NULL, comment STRING"
+        == codec.schema
+    )
+    assert ("x", True, 1, 1.0, None) == codec.to_tuple(Sample("x", True, 1, 1.0))
+
+
+def test_unsupported_types():
+    @dataclass
+    class Nested:
+        items: list
+
+    codec = row_codec(Nested)
+
+    with pytest.raises(SyntaxError):
+        _ = codec.schema
+    with pytest.raises(ValueError):
+        codec.to_sql(Nested([]))
+
+
+def test_decoder_maps_columns_by_name():
+    codec = row_codec(Sample)
+    decode = codec.decoder(["ratio", "extra", "name"])
+
+    assert Sample("x", None, None, 0.5) == decode((0.5, "ignored", "x"))
+    assert decode is codec.decoder(("ratio", "extra", "name"))
+
+
+def test_long_fields_are_64_bit():
+    @dataclass
+    class Sized:
+        name: str
+        size: Long
+
+    codec = row_codec(Sized)
+
+    assert "name STRING NOT NULL, size BIGINT NOT NULL" == codec.schema
+    assert "'x', 5497558138880" == codec.to_sql(Sized("x", 5 * 1024**4))
+
+
+def _filter_with_asdict(rows):
+    """Filtering of rows with missing values, as it was done before the row codecs"""
+    nullable = {f.name for f in dataclasses.fields(rows[0]) if f.default is None}
+    results = []
+    for row in rows:
+        if any(v is None and k not in nullable for k, v in dataclasses.asdict(row).items()):
+            continue
+        results.append(row)
+    return results
+
+
+def _row_to_sql_by_field_type(row, fields):
+    """Rendering of SQL literals, as it was done before the row codecs"""
+    data = []
+    for f in fields:
+        value = getattr(row, f.name)
+        if value is None:
+            data.append("NULL")
+        elif f.type == bool:
+            data.append("TRUE" if value else "FALSE")
+        elif f.type == str:
+            value = str(value).replace("'", "''")
+            data.append(f"'{value}'")
+        elif f.type == int:
+            data.append(f"{value}")
+        else:
+            msg = f"unknown type: {f.type}"
+            raise ValueError(msg)
+    return ", ".join(data)
+
+
+def _schema_by_field_type(klass):
+    """Column definitions, as they were computed on every `create_table` before the row codecs"""
+    types = {str: "STRING", int: "INT", bool: "BOOLEAN", float: "FLOAT"}
+    return ", ".join(
+        f"{f.name} {types[f.type]}{'' if f.default is None else ' NOT NULL'}" for f in dataclasses.fields(klass)
+    )
+
+
+def _seconds(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+@pytest.mark.skipif("UCX_BENCHMARK_ROWS" not in os.environ, reason="set UCX_BENCHMARK_ROWS to run the benchmark")
+@pytest.mark.parametrize(
+    "row",
+    [
+        Permissions("123", "clusters", '{"access_control_list": [{"group_name": "it\'s"}]}'),
+        Table("hive_metastore", "db", "table", "MANAGED", "DELTA", "dbfs:/user/hive/warehouse/db.db/table"),
+    ],
+)
+def test_benchmark_codec_against_field_inspection(row):
+    """Run with `UCX_BENCHMARK_ROWS=1000000 pytest -k benchmark tests/unit/framework/test_codecs.py`"""
+    rows = [dataclasses.replace(row) for _ in range(int(os.environ["UCX_BENCHMARK_ROWS"]))]
+    codec = row_codec(type(row))
+    fields = dataclasses.fields(row)
+
+    filter_before = _seconds(_filter_with_asdict, rows)
+    filter_after = _seconds(lambda: [r for r in rows if codec.first_missing(r) is None])
+    render_before = _seconds(lambda: [_row_to_sql_by_field_type(r, fields) for r in rows])
+    render_after = _seconds(lambda: [codec.to_sql(r) for r in rows])
+    schema_before = _seconds(lambda: [_schema_by_field_type(type(row)) for _ in range(100_000)])
+    schema_after = _seconds(lambda: [row_codec(type(row)).schema for _ in range(100_000)])
+
+    print(
+        f"{type(row).__name__}, {len(rows)} rows: "
+        f"filter rows {filter_before:.2f}s -> {filter_after:.2f}s ({filter_before / filter_after:.0f}x), "
+        f"render SQL {render_before:.2f}s -> {render_after:.2f}s ({render_before / render_after:.1f}x), "
+        f"schema of 100k tables {schema_before:.2f}s -> {schema_after:.2f}s"
+    )
+    assert codec.to_sql(row) == _row_to_sql_by_field_type(row, fields)
+    assert codec.schema == _schema_by_field_type(type(row))
+    assert filter_after < filter_before
+    assert render_after < render_before
@@ -1,6 +1,11 @@
+import datetime as dt
 import os
 import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import partial
 
 import pytest
 from databricks.sdk.service import sql
@@ -8,8 +13,12 @@ from databricks.sdk.service import sql
 from databricks.labs.ucx.framework.crawlers import (
     CrawlerBase,
     RuntimeBackend,
+    SingleFlightBackend,
+    SnapshotProgress,
     StatementExecutionBackend,
 )
+from databricks.labs.ucx.framework.staging import LocalStagingArea
+from databricks.labs.ucx.mixins.sql import Row
 
 from ..framework.mocks import MockBackend
 
@@ -79,6 +88,217 @@ def test_snapshot_wrong_error():
         cb._snapshot(fetcher=fetcher, loader=lambda: [Foo(first="first", second=True)])
 
 
+def test_snapshot_records_crawl_metadata():
+    b = MockBackend()
+    cb = CrawlerBase(b, "a", "b", "c", Bar)
+
+    cb._snapshot(fetcher=lambda: [], loader=lambda: [Foo(first="first", second=True)])
+
+    metadata = b.rows_written_for("a.b.crawl_metadata", "append")
+    assert 1 == len(metadata)
+    assert "c" == metadata[0].table_name
+    assert 1 == metadata[0].row_count
+
+
+def _crawled(ago: dt.timedelta, row_count: int = 1):
+    crawled_at = (dt.datetime.now(dt.timezone.utc) - ago).isoformat()
+    return [("c", crawled_at, 1.0, row_count, "0.3.0")]
+
+
+def test_snapshot_recrawls_stale_snapshot():
+    b = MockBackend(rows={"SELECT \\* FROM a.b.crawl_metadata": _crawled(dt.timedelta(days=2))})
+    cb = CrawlerBase(b, "a", "b", "c", Bar)
+    cb.max_age = dt.timedelta(days=1)
+
+    def fetcher():
+        msg = "stale snapshot must not be fetched"
+        raise AssertionError(msg)
+
+    result = cb._snapshot(fetcher=fetcher, loader=lambda: [Foo(first="new", second=True)])
+
+    assert [Foo(first="new", second=True)] == result
+    assert [Foo(first="new", second=True)] == b.rows_written_for("a.b.c", "overwrite")
+
+
+def test_snapshot_reuses_fresh_empty_snapshot():
+    b = MockBackend(rows={"SELECT \\* FROM a.b.crawl_metadata": _crawled(dt.timedelta(hours=1), row_count=0)})
+    cb = CrawlerBase(b, "a", "b", "c", Bar)
+
+    result = cb._snapshot(fetcher=lambda: [], loader=lambda: [Foo(first="new", second=True)], max_age=dt.timedelta(1))
+
+    assert [] == result
+    assert [] == b.rows_written_for("a.b.c", "append")
+
+
+def test_snapshot_is_shared_by_crawlers_of_the_same_backend():
+    b = MockBackend(rows={"SELECT \\* FROM a.b.c": [("first", True)]})
+    fetcher = lambda cb: [Foo(*row) for row in cb._fetch("SELECT * FROM a.b.c")]  # noqa: E731
+    first, second = CrawlerBase(b, "a", "b", "c", Foo), CrawlerBase(b, "a", "b", "c", Foo)
+
+    assert [Foo("first", True)] == first._snapshot(fetcher=partial(fetcher, first), loader=lambda: [])
+    assert [Foo("first", True)] == second._snapshot(fetcher=partial(fetcher, second), loader=lambda: [])
+    assert 1 == b.queries.count("SELECT * FROM a.b.c")
+
+    second._append_records([Foo("second", False)])
+    first._snapshot(fetcher=partial(fetcher, first), loader=lambda: [])
+    assert 2 == b.queries.count("SELECT * FROM a.b.c")
+
+
+@pytest.mark.parametrize("sql", ["DELETE FROM a.b.c WHERE first = 'first'", "DROP TABLE IF EXISTS `a`.`b`.`c`"])
+def test_snapshot_is_invalidated_by_writes_through_exec(sql):
+    b = MockBackend(rows={"SELECT \\* FROM a.b.c": [("first", True)]})
+    fetcher = lambda cb: [Foo(*row) for row in cb._fetch("SELECT * FROM a.b.c")]  # noqa: E731
+    first, second = CrawlerBase(b, "a", "b", "c", Foo), CrawlerBase(b, "a", "b", "c", Foo)
+    first._snapshot(fetcher=partial(fetcher, first), loader=lambda: [])
+
+    second._exec("DELETE FROM a.b.other")
+    first._snapshot(fetcher=partial(fetcher, first), loader=lambda: [])
+    assert 1 == b.queries.count("SELECT * FROM a.b.c")
+
+    second._exec(sql)
+    first._snapshot(fetcher=partial(fetcher, first), loader=lambda: [])
+    assert 2 == b.queries.count("SELECT * FROM a.b.c")
+
+
+def test_snapshot_stream_persists_in_chunks():
+    b = MockBackend()
+    cb = CrawlerBase(b, "a", "b", "c", Baz)
+    progress = []
+
+    def loader(persisted):
+        assert [] == persisted
+        for i in range(5):
+            progress.append(cb.persisted_cnt)
+            yield Baz(str(i))
+
+    result = list(cb._snapshot_stream(fetcher=lambda: [], loader=loader, chunk_size=2))
+
+    assert 5 == len(result)
+    assert [0, 0, 2, 2, 4] == progress
+    assert [["0", "1"], ["2", "3"], ["4"]] == [[r.first for r in rows] for n, rows, _ in b._save_table if n == "a.b.c"]
+    assert [SnapshotProgress("c")] == b.rows_written_for("a.b.snapshot_progress", "append")
+    assert "DELETE FROM a.b.snapshot_progress WHERE table_name = 'c'" == b.queries[-1]
+
+
+def test_snapshot_stream_yields_records_before_crawl_completes():
+    b = MockBackend()
+    cb = CrawlerBase(b, "a", "b", "c", Baz)
+
+    stream = cb._snapshot_stream(fetcher=lambda: [], loader=lambda _: (Baz(str(i)) for i in range(5)), chunk_size=2)
+
+    assert Baz("0") == next(stream)
+    assert [] == b.rows_written_for("a.b.c", "append")
+    assert ["1", "2", "3", "4"] == [r.first for r in stream]
+    assert 5 == b.rows_written_for("a.b.crawl_metadata", "append")[0].row_count
+
+
+def test_snapshot_stream_reads_progress_marker_only_before_fetching_inventory():
+    b = MockBackend(rows={"SELECT \\* FROM a.b.crawl_metadata": _crawled(dt.timedelta(hours=1), row_count=0)})
+    cb = CrawlerBase(b, "a", "b", "c", Baz)
+
+    assert [] == list(cb._snapshot_stream(fetcher=lambda: [], loader=lambda _: [], max_age=dt.timedelta(days=1)))
+    assert [] == list(cb._snapshot_stream(fetcher=lambda: [], loader=lambda _: []))
+    assert not any("snapshot_progress" in q for q in b.queries)
+
+
+def test_snapshot_stream_resumes_partial_snapshot():
+    b = MockBackend(
+        fails_on_first={"FROM a.b.c_refresh": "TABLE_OR_VIEW_NOT_FOUND"},
+        rows={
+            "SELECT table_name FROM a.b.snapshot_progress": [("c",)],
+            "SELECT \\* FROM a.b.c": [("0", None), ("1", None)],
+        },
+    )
+    cb = CrawlerBase(b, "a", "b", "c", Baz)
+
+    def loader(persisted):
+        seen = {r.first for r in persisted}
+        for i in range(3):
+            if str(i) not in seen:
+                yield Baz(str(i))
+
+    fetcher = lambda: [Baz(*row) for row in b.fetch("SELECT * FROM a.b.c")]  # noqa: E731
+    result = list(cb._snapshot_stream(fetcher=fetcher, loader=loader))
+
+    assert ["0", "1", "2"] == [r.first for r in result]
+    assert [Baz("2")] == b.rows_written_for("a.b.c", "append")
+    assert [] == b.rows_written_for("a.b.snapshot_progress", "append")
+
+
+def test_snapshot_stream_keeps_stale_snapshot_until_crawl_completes():
+    b = MockBackend(rows={"SELECT \\* FROM a.b.crawl_metadata": _crawled(dt.timedelta(days=2))})
+    cb = CrawlerBase(b, "a", "b", "c", Baz)
+    cb.max_age = dt.timedelta(days=1)
+
+    def loader(persisted):
+        assert [] == persisted
+        # the stale snapshot is still there, while new records are crawled
+        assert not any(q.startswith(("TRUNCATE", "INSERT OVERWRITE", "DELETE FROM a.b.c ")) for q in b.queries)
+        yield Baz("new")
+
+    result = list(cb._snapshot_stream(fetcher=lambda: [], loader=loader))
+
+    assert [Baz("new")] == result
+    assert [Baz("new")] == b.rows_written_for("a.b.c_refresh", "append")
+    assert [] == b.rows_written_for("a.b.c", "overwrite")
+    assert [
+        "INSERT OVERWRITE a.b.c (first, second) SELECT first, second FROM a.b.c_refresh",
+        "DROP TABLE IF EXISTS a.b.c_refresh",
+        "DELETE FROM a.b.snapshot_progress WHERE table_name = 'c'",
+    ] == b.queries[-3:]
+
+
+def test_snapshot_stream_resumes_crawl_of_stale_snapshot():
+    b = MockBackend(
+        rows={
+            "SELECT table_name FROM a.b.snapshot_progress": [("c",)],
+            "SELECT \\* FROM a.b.c_refresh": [("0", None)],
+        }
+    )
+    cb = CrawlerBase(b, "a", "b", "c", Baz)
+
+    def fetcher():
+        msg = "stale snapshot must not be resumed"
+        raise AssertionError(msg)
+
+    result = list(cb._snapshot_stream(fetcher=fetcher, loader=lambda _: [Baz("1")]))
+
+    assert ["0", "1"] == [r.first for r in result]
+    assert [Baz("1")] == b.rows_written_for("a.b.c_refresh", "append")
+    assert "INSERT OVERWRITE a.b.c (first, second) SELECT first, second FROM a.b.c_refresh" in b.queries
+
+
+def test_snapshot_without_recorded_crawl_is_stale():
+    b = MockBackend(rows={"SELECT \\* FROM a.b.c$": [("old", True)]})
+    cb = CrawlerBase(b, "a", "b", "c", Foo)
+
+    result = cb._snapshot(
+        fetcher=lambda: [Foo(*row) for row in b.fetch("SELECT * FROM a.b.c")],
+        loader=lambda: [Foo("new", True)],
+        max_age=dt.timedelta(days=1),
+    )
+
+    assert [Foo("new", True)] == result
+    assert [Foo("new", True)] == b.rows_written_for("a.b.c", "overwrite")
+
+
+def test_latest_crawl_is_decoded_by_column_name():
+    crawled_at = dt.datetime.now(dt.timezone.utc).isoformat()
+    row = type(
+        "Row", (Row,), {"__columns__": ["ucx_version", "table_name", "row_count", "crawled_at", "duration_seconds"]}
+    )
+    b = MockBackend(rows={"SELECT \\* FROM a.b.crawl_metadata": [row(("0.3.0", "c", 3, crawled_at, 1.5))]})
+
+    latest = CrawlerBase(b, "a", "b", "c", Foo)._latest_crawl()
+
+    assert ("c", crawled_at, 1.5, 3) == (
+        latest.table_name,
+        latest.crawled_at,
+        latest.duration_seconds,
+        latest.row_count,
+    )
+
+
 def test_statement_execution_backend_execute_happy(mocker):
     execute_statement = mocker.patch("databricks.sdk.service.sql.StatementExecutionAPI.execute_statement")
     execute_statement.return_value = sql.ExecuteStatementResponse(
@@ -116,10 +336,239 @@ def test_statement_execution_backend_fetch_happy(mocker):
     execute_fetch_all.assert_called_with("abc", "SELECT id FROM range(3)")
 
 
-def test_statement_execution_backend_save_table_overwrite(mocker):
+def test_fetch_as_decodes_by_column_name():
+    row = type("Row", (Row,), {"__columns__": ["third", "first", "second"]})
+    mock_backend = MockBackend(rows={"SELECT": [row((0.5, "x", True))]})
+
+    result = list(mock_backend.fetch_as(Bar, "a.b.c"))
+
+    assert [Bar("x", True, 0.5)] == result
+    assert ["SELECT * FROM a.b.c"] == mock_backend.queries
+
+
+def test_fetch_as_projects_columns_and_pushes_predicate():
+    mock_backend = MockBackend(rows={"SELECT first FROM": [("x",), ("y",)]})
+
+    result = list(mock_backend.fetch_as(Baz, "a.b.c", columns=["first"], where="first <> 'z'"))
+
+    assert [Baz("x"), Baz("y")] == result
+    assert ["SELECT first FROM a.b.c WHERE first <> 'z'"] == mock_backend.queries
+
+
+def test_fetch_as_rejects_unknown_columns():
+    mock_backend = MockBackend()
+
+    with pytest.raises(ValueError):
+        list(mock_backend.fetch_as(Baz, "a.b.c", columns=["first", "third"]))
+
+
+def test_statement_execution_backend_fetch_as_reads_arrow_chunks(mocker):
+    pa = pytest.importorskip("pyarrow")
+    chunks = [
+        pa.table({"second": [True, False], "first": ["x", "y"], "third": [0.5, None]}),
+        pa.table({"second": [True], "first": ["z"], "third": [1.5]}),
+    ]
+    execute_fetch_arrow = mocker.patch(
+        "databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute_fetch_arrow", return_value=iter(chunks)
+    )
+    execute_fetch_all = mocker.patch("databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute_fetch_all")
+
+    seb = StatementExecutionBackend(mocker.Mock(), "abc")
+
+    result = list(seb.fetch_as(Bar, "a.b.c"))
+
+    assert [Bar("x", True, 0.5), Bar("y", False, None), Bar("z", True, 1.5)] == result
+    execute_fetch_arrow.assert_called_with("abc", "SELECT * FROM a.b.c")
+    execute_fetch_all.assert_not_called()
+
+
+def test_statement_execution_backend_fetch_as_filtered_reads_inline_columns(mocker):
+    execute_fetch_columns = mocker.patch(
+        "databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute_fetch_columns",
+        return_value={"second": ["y", None], "first": ["x", "x"]},
+    )
+    execute_fetch_arrow = mocker.patch("databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute_fetch_arrow")
+
     seb = StatementExecutionBackend(mocker.Mock(), "abc")
-    with pytest.raises(NotImplementedError):
-        seb.save_table("a.b.c", [1, 2, 3], Bar, mode="overwrite")
+
+    result = list(seb.fetch_as(Baz, "a.b.c", where="first = 'x'"))
+
+    assert [Baz("x", "y"), Baz("x")] == result
+    execute_fetch_columns.assert_called_with("abc", "SELECT * FROM a.b.c WHERE first = 'x'")
+    execute_fetch_arrow.assert_not_called()
+
+
+def test_statement_execution_backend_fetch_as_reads_inline_columns_without_pyarrow(mocker):
+    mocker.patch.object(StatementExecutionBackend, "_has_pyarrow", return_value=False)
+    execute_fetch_columns = mocker.patch(
+        "databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute_fetch_columns", return_value={"first": []}
+    )
+
+    seb = StatementExecutionBackend(mocker.Mock(), "abc")
+
+    assert [] == list(seb.fetch_as(Baz, "a.b.c", columns=["first"]))
+    execute_fetch_columns.assert_called_with("abc", "SELECT first FROM a.b.c")
+
+
+def test_statement_execution_backend_fetch_async(mocker):
+    response = Future()
+    submit = mocker.patch("databricks.labs.ucx.mixins.sql.StatementExecutionExt.submit", return_value=response)
+    mocker.patch("databricks.labs.ucx.mixins.sql.StatementExecutionExt.iterate_rows", return_value=iter([1, 2, 3]))
+
+    seb = StatementExecutionBackend(mocker.Mock(), "abc")
+
+    rows = seb.fetch_async("SELECT id FROM range(3)")
+    assert not rows.done()
+    response.set_result(mocker.Mock())
+
+    assert [1, 2, 3] == list(rows.result())
+    submit.assert_called_with("abc", "SELECT id FROM range(3)")
+
+
+def test_fetch_async_runs_query_on_other_backends():
+    mock_backend = MockBackend(rows={"SELECT": [("x",)]}, fails_on_first={"FROM a.b.c": "TABLE_OR_VIEW_NOT_FOUND"})
+
+    assert [("x",)] == list(mock_backend.fetch_async("SELECT 1").result())
+    with pytest.raises(RuntimeError):
+        mock_backend.fetch_async("SELECT * FROM a.b.c").result()
+
+
+def test_fetch_many_yields_rows_and_errors_in_order():
+    mock_backend = MockBackend(
+        rows={"SELECT 1": [(1,)], "SELECT 3": [(3,)]}, fails_on_first={"SELECT 2": "TABLE_OR_VIEW_NOT_FOUND"}
+    )
+
+    results = list(mock_backend.fetch_many((i, f"SELECT {i}") for i in [1, 2, 3]))
+
+    assert [1, 2, 3] == [key for key, _ in results]
+    assert [(1,)] == list(results[0][1])
+    assert isinstance(results[1][1], RuntimeError)
+    assert [(3,)] == list(results[2][1])
+
+
+def test_fetch_many_bounds_statements_in_flight():
+    submitted = []
+    collected = []
+
+    class RecordingBackend(MockBackend):
+        def fetch_async(self, sql):
+            submitted.append(sql)
+            # statements, that are submitted, but not collected yet, are in flight
+            assert len(submitted) - len(collected) <= 2
+            return super().fetch_async(sql)
+
+    for key, _ in RecordingBackend().fetch_many(((i, f"SELECT {i}") for i in range(10)), max_in_flight=2):
+        collected.append(key)
+
+    assert list(range(10)) == collected
+
+
+def test_statement_execution_backend_save_table_overwrite_single_batch(mocker):
+    execute_sql = mocker.patch("databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute")
+
+    seb = StatementExecutionBackend(mocker.Mock(), "abc")
+
+    seb.save_table("a.b.c", [Foo("aaa", True), Foo("bbb", False)], Foo, mode="overwrite")
+
+    assert [
+        mocker.call(
+            "abc", "CREATE TABLE IF NOT EXISTS a.b.c (first STRING NOT NULL, second BOOLEAN NOT NULL) USING DELTA"
+        ),
+        mocker.call("abc", "INSERT OVERWRITE a.b.c (first, second) VALUES ('aaa', TRUE), ('bbb', FALSE)"),
+    ] == execute_sql.mock_calls
+
+
+def test_statement_execution_backend_save_table_overwrite_from_staging_table(mocker):
+    execute_sql = mocker.patch("databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute")
+    mocker.patch("uuid.uuid4", return_value=mocker.Mock(hex="0123456789abcdef"))
+
+    seb = StatementExecutionBackend(mocker.Mock(), "abc", max_records_per_batch=1)
+
+    seb.save_table("a.b.c", [Baz("aaa"), Baz("bbb")], Baz, mode="overwrite")
+
+    assert [
+        "CREATE TABLE IF NOT EXISTS a.b.c (first STRING NOT NULL, second STRING) USING DELTA",
+        "CREATE TABLE IF NOT EXISTS a.b.c_overwrite_01234567 (first STRING NOT NULL, second STRING) USING DELTA",
+        "INSERT INTO a.b.c_overwrite_01234567 (first, second) VALUES ('aaa', NULL)",
+        "INSERT INTO a.b.c_overwrite_01234567 (first, second) VALUES ('bbb', NULL)",
+        "INSERT OVERWRITE a.b.c (first, second) SELECT first, second FROM a.b.c_overwrite_01234567",
+        "DROP TABLE IF EXISTS a.b.c_overwrite_01234567",
+    ] == [c[1][1] for c in execute_sql.mock_calls]
+
+
+def test_statement_execution_backend_save_table_upsert_single_statement(mocker):
+    execute_sql = mocker.patch("databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute")
+
+    seb = StatementExecutionBackend(mocker.Mock(), "abc")
+
+    seb.save_table(
+        "a.b.c", [Foo("aaa", True), Foo("bbb", False), Foo("aaa", False)], Foo, mode="upsert", keys=["first"]
+    )
+
+    assert [
+        "CREATE TABLE IF NOT EXISTS a.b.c (first STRING NOT NULL, second BOOLEAN NOT NULL) USING DELTA",
+        "MERGE INTO a.b.c AS t USING (SELECT * FROM VALUES ('aaa', FALSE), ('bbb', FALSE) AS v(first, second)) AS s "
+        "ON t.first <=> s.first WHEN MATCHED THEN UPDATE SET * WHEN NOT MATCHED THEN INSERT *",
+    ] == [c[1][1] for c in execute_sql.mock_calls]
+
+
+def test_statement_execution_backend_save_table_upsert_from_staging_table(mocker):
+    execute_sql = mocker.patch("databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute")
+    mocker.patch("uuid.uuid4", return_value=mocker.Mock(hex="0123456789abcdef"))
+
+    seb = StatementExecutionBackend(mocker.Mock(), "abc", max_records_per_batch=1)
+
+    seb.save_table(
+        "a.b.c", [Bar("aaa", True, 1.0), Bar("bbb", False, 2.0)], Bar, mode="upsert", keys=["first", "second"]
+    )
+
+    assert [
+        "CREATE TABLE IF NOT EXISTS a.b.c (first STRING NOT NULL, second BOOLEAN NOT NULL, third FLOAT NOT NULL) "
+        "USING DELTA",
+        "CREATE TABLE IF NOT EXISTS a.b.c_upsert_01234567 (first STRING NOT NULL, second BOOLEAN NOT NULL, "
+        "third FLOAT NOT NULL) USING DELTA",
+        "INSERT INTO a.b.c_upsert_01234567 (first, second, third) VALUES ('aaa', TRUE, 1.0)",
+        "INSERT INTO a.b.c_upsert_01234567 (first, second, third) VALUES ('bbb', FALSE, 2.0)",
+        "MERGE INTO a.b.c AS t USING a.b.c_upsert_01234567 AS s ON t.first <=> s.first AND t.second <=> s.second "
+        "WHEN MATCHED THEN UPDATE SET * WHEN NOT MATCHED THEN INSERT *",
+        "DROP TABLE IF EXISTS a.b.c_upsert_01234567",
+    ] == [c[1][1] for c in execute_sql.mock_calls]
+
+
+def test_statement_execution_backend_save_table_upsert_requires_keys(mocker):
+    mocker.patch("databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute")
+
+    seb = StatementExecutionBackend(mocker.Mock(), "abc")
+
+    with pytest.raises(ValueError):
+        seb.save_table("a.b.c", [Foo("aaa", True)], Foo, mode="upsert")
+    with pytest.raises(ValueError):
+        seb.save_table("a.b.c", [Foo("aaa", True)], Foo, mode="upsert", keys=["third"])
+
+
+def test_statement_execution_backend_save_table_overwrite_drops_staging_table_on_failure(mocker):
+    def execute(_, statement):
+        if statement.startswith("INSERT OVERWRITE"):
+            msg = "overwrite failed"
+            raise ValueError(msg)
+
+    execute_sql = mocker.patch("databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute", side_effect=execute)
+    seb = StatementExecutionBackend(mocker.Mock(), "abc", max_records_per_batch=1)
+
+    with pytest.raises(ValueError):
+        seb.save_table("a.b.c", [Baz("aaa"), Baz("bbb")], Baz, mode="overwrite")
+
+    assert execute_sql.mock_calls[-1][1][1].startswith("DROP TABLE IF EXISTS a.b.c_overwrite_")
+
+
+def test_statement_execution_backend_save_table_overwrite_empty(mocker):
+    execute_sql = mocker.patch("databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute")
+
+    seb = StatementExecutionBackend(mocker.Mock(), "abc")
+
+    seb.save_table("a.b.c", [], Baz, mode="overwrite")
+
+    assert "TRUNCATE TABLE a.b.c" == execute_sql.mock_calls[-1][1][1]
 
 
 def test_statement_execution_backend_save_table_empty_records(mocker):
@@ -162,6 +611,84 @@ def test_statement_execution_backend_save_table_in_batches_of_two(mocker):
     ] == execute_sql.mock_calls
 
 
+def test_statement_execution_backend_save_table_batches_by_size(mocker):
+    execute_sql = mocker.patch("databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute")
+
+    seb = StatementExecutionBackend(mocker.Mock(), "abc", max_bytes_per_batch=110)
+
+    seb.save_table("a.b.c", [Baz("a" * 40), Baz("b" * 40), Baz("c")], Baz)
+
+    assert [
+        "INSERT INTO a.b.c (first, second) VALUES ('aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa', NULL)",
+        "INSERT INTO a.b.c (first, second) VALUES ('bbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb', NULL), ('c', NULL)",
+    ] == [c[1][1] for c in execute_sql.mock_calls[1:]]
+
+
+def test_statement_execution_backend_save_table_reports_failed_batches_in_order(mocker):
+    def execute(_, statement):
+        if "'b'" in statement or "'d'" in statement:
+            raise ValueError(statement[-11:])
+
+    execute_sql = mocker.patch("databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute", side_effect=execute)
+    seb = StatementExecutionBackend(mocker.Mock(), "abc", max_records_per_batch=1, max_concurrent_batches=3)
+
+    with pytest.raises(RuntimeError) as info:
+        seb.save_table("a.b.c", [Baz(x) for x in "abcde"], Baz)
+
+    assert "failed to insert 2 batches into a.b.c, first failed at rows 1..1: ('b', NULL)" == str(info.value)
+    assert 6 == execute_sql.call_count
+
+
+def test_statement_execution_backend_save_table_bulk_load(mocker, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    loaded = []
+
+    def execute(_, statement):
+        if statement.startswith("COPY INTO"):
+            location = statement.split("'")[1]
+            loaded.append(pq.read_table(location.removeprefix("file://")).to_pylist())
+
+    mocker.patch("databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute", side_effect=execute)
+    seb = StatementExecutionBackend(
+        mocker.Mock(), "abc", staging=LocalStagingArea(tmp_path / "staging"), bulk_load_min_rows=2
+    )
+
+    seb.save_table("a.b.c", [Baz("aaa", "it's"), Baz("bbb")], Baz)
+
+    assert [[{"first": "aaa", "second": "it's"}, {"first": "bbb", "second": None}]] == loaded
+    assert [] == list((tmp_path / "staging").iterdir())
+
+
+def test_statement_execution_backend_save_table_overwrite_from_staged_file(mocker, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    loaded = []
+
+    def execute(_, statement):
+        if statement.startswith("INSERT OVERWRITE"):
+            location = statement.split("`")[1]
+            loaded.append(pq.read_table(location.removeprefix("file://")).to_pylist())
+
+    execute_sql = mocker.patch("databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute", side_effect=execute)
+    seb = StatementExecutionBackend(mocker.Mock(), "abc", staging=LocalStagingArea(tmp_path), bulk_load_min_rows=2)
+
+    seb.save_table("a.b.c", [Baz("aaa"), Baz("bbb")], Baz, mode="overwrite")
+
+    statements = [call[1][1] for call in execute_sql.mock_calls]
+    assert statements[-1].startswith("INSERT OVERWRITE a.b.c (first, second) SELECT first, second FROM parquet.`")
+    assert not any("_overwrite_" in statement for statement in statements)
+    assert [[{"first": "aaa", "second": None}, {"first": "bbb", "second": None}]] == loaded
+    assert [] == list(tmp_path.iterdir())
+
+
+def test_statement_execution_backend_save_table_small_batches_are_inserted(mocker, tmp_path):
+    execute_sql = mocker.patch("databricks.labs.ucx.mixins.sql.StatementExecutionExt.execute")
+    seb = StatementExecutionBackend(mocker.Mock(), "abc", staging=LocalStagingArea(tmp_path), bulk_load_min_rows=3)
+
+    seb.save_table("a.b.c", [Foo("aaa", True), Foo("bbb", False)], Foo)
+
+    assert "INSERT INTO a.b.c (first, second) VALUES ('aaa', TRUE), ('bbb', FALSE)" == execute_sql.call_args[0][1]
+
+
 def test_runtime_backend_execute(mocker):
     from unittest import mock
 
@@ -205,7 +732,7 @@ def test_runtime_backend_save_table(mocker):
         rb.save_table("a.b.c", [Foo("aaa", True), Foo("bbb", False)], Bar)
 
         rb._spark.createDataFrame.assert_called_with(
-            [Foo(first="aaa", second=True), Foo(first="bbb", second=False)],
+            [("aaa", True), ("bbb", False)],
             "first STRING NOT NULL, second BOOLEAN NOT NULL",
         )
         rb._spark.createDataFrame().write.saveAsTable.assert_called_with("a.b.c", mode="append")
@@ -223,7 +750,7 @@ def test_runtime_backend_save_table_with_row_containing_none(mocker):
         rb.save_table("a.b.c", [Foo("aaa", True), Foo("bbb", False), Foo("ccc", None)], Bar)
 
         rb._spark.createDataFrame.assert_called_with(
-            [Foo(first="aaa", second=True), Foo(first="bbb", second=False)],
+            [("aaa", True), ("bbb", False)],
             "first STRING NOT NULL, second BOOLEAN NOT NULL",
         )
         rb._spark.createDataFrame().write.saveAsTable.assert_called_with("a.b.c", mode="append")
@@ -241,7 +768,108 @@ def test_runtime_backend_save_table_with_row_containing_none_with_nullable_class
         rb.save_table("a.b.c", [Baz("aaa", "ccc"), Baz("bbb", None)], Bar)
 
         rb._spark.createDataFrame.assert_called_with(
-            [Baz(first="aaa", second="ccc"), Baz(first="bbb", second=None)],
+            [("aaa", "ccc"), ("bbb", None)],
             "first STRING NOT NULL, second STRING",
         )
         rb._spark.createDataFrame().write.saveAsTable.assert_called_with("a.b.c", mode="append")
+
+
+def test_runtime_backend_save_table_upsert(mocker):
+    from unittest import mock
+
+    with mock.patch.dict(os.environ, {"DATABRICKS_RUNTIME_VERSION": "14.0"}):
+        pyspark_sql_session = mocker.Mock()
+        sys.modules["pyspark.sql.session"] = pyspark_sql_session
+        mocker.patch("uuid.uuid4", return_value=mocker.Mock(hex="abc"))
+
+        rb = RuntimeBackend()
+
+        rb.save_table("a.b.c", [Foo("aaa", True), Foo("bbb", False)], Foo, mode="upsert", keys=["first"])
+
+        rb._spark.createDataFrame().createOrReplaceTempView.assert_called_with("ucx_upsert_abc")
+        rb._spark.sql.assert_called_with(
+            "MERGE INTO a.b.c AS t USING ucx_upsert_abc AS s ON t.first <=> s.first "
+            "WHEN MATCHED THEN UPDATE SET * WHEN NOT MATCHED THEN INSERT *"
+        )
+        rb._spark.catalog.dropTempView.assert_called_with("ucx_upsert_abc")
+        rb._spark.createDataFrame().write.saveAsTable.assert_not_called()
+
+
+class SlowBackend(MockBackend):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def fetch(self, sql):
+        rows = super().fetch(sql)
+        self.started.set()
+        self.release.wait(5)
+        return rows
+
+
+def test_single_flight_collapses_concurrent_fetches():
+    backend = SlowBackend(rows={"SELECT": [("x",)]})
+    single_flight = SingleFlightBackend(backend)
+
+    with ThreadPoolExecutor(4) as pool:
+        first = pool.submit(lambda: list(single_flight.fetch("SELECT * FROM a.b.c")))
+        backend.started.wait(5)
+        others = [pool.submit(lambda: list(single_flight.fetch("SELECT * FROM a.b.c"))) for _ in range(3)]
+        time.sleep(0.1)
+        backend.release.set()
+        results = [f.result() for f in [first, *others]]
+
+    assert [[("x",)]] * 4 == results
+    assert ["SELECT * FROM a.b.c"] == backend.queries
+
+
+def test_single_flight_cache_is_invalidated_by_writes():
+    backend = MockBackend(rows={"SELECT": [("x",)]})
+    single_flight = SingleFlightBackend(backend, cache_ttl=dt.timedelta(minutes=1))
+
+    list(single_flight.fetch("SELECT * FROM hive_metastore.b.c"))
+    list(single_flight.fetch("SELECT * FROM hive_metastore.b.c"))
+    list(single_flight.fetch("SELECT * FROM b.d"))
+    single_flight.save_table("b.c", [Foo("x", True)], Foo)
+    list(single_flight.fetch("SELECT * FROM b.d"))
+    list(single_flight.fetch("SELECT * FROM hive_metastore.b.c"))
+    single_flight.execute("DELETE FROM `b`.`d` WHERE first = 'x'")
+    list(single_flight.fetch("SELECT * FROM b.d"))
+    list(single_flight.fetch("SELECT * FROM hive_metastore.b.c"))
+    single_flight.execute("VACUUM b.c")
+    list(single_flight.fetch("SELECT * FROM hive_metastore.b.c"))
+
+    assert [
+        "SELECT * FROM hive_metastore.b.c",
+        "SELECT * FROM b.d",
+        "SELECT * FROM hive_metastore.b.c",
+        "DELETE FROM `b`.`d` WHERE first = 'x'",
+        "SELECT * FROM b.d",
+        "VACUUM b.c",
+        "SELECT * FROM hive_metastore.b.c",
+    ] == backend.queries
+
+
+def test_single_flight_reads_tables_through_wrapped_backend(mocker):
+    backend = MockBackend(rows={"SELECT": [("x", "y")]})
+    backend.fetch_as = mocker.Mock(side_effect=lambda *_, **__: iter([Baz("x", "y")]))
+    single_flight = SingleFlightBackend(backend, cache_ttl=dt.timedelta(minutes=1))
+
+    assert [Baz("x", "y")] == list(single_flight.fetch_as(Baz, "a.b.c"))
+    assert [Baz("x", "y")] == list(single_flight.fetch_as(Baz, "a.b.c"))
+    assert [("x", "y")] == list(single_flight.fetch("SELECT * FROM a.b.c"))
+    single_flight.save_table("a.b.c", [Baz("z")], Baz)
+    assert [Baz("x", "y")] == list(single_flight.fetch_as(Baz, "a.b.c"))
+
+    assert 2 == backend.fetch_as.call_count
+    assert "SELECT * FROM a.b.c" in backend.queries
+
+
+def test_single_flight_shares_errors():
+    backend = MockBackend(fails_on_first={"FROM a.b.c": "TABLE_OR_VIEW_NOT_FOUND"})
+    single_flight = SingleFlightBackend(backend, cache_ttl=dt.timedelta(minutes=1))
+
+    with pytest.raises(RuntimeError):
+        list(single_flight.fetch("SELECT * FROM a.b.c"))
+    assert [] == list(single_flight.fetch("SELECT * FROM a.b.c"))
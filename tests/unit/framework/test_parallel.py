@@ -1,8 +1,30 @@
+import asyncio
+import datetime
+import functools
 import logging
+import threading
+from unittest.mock import MagicMock
 
+import pytest
+import requests
+from databricks.sdk import WorkspaceClient
 from databricks.sdk.core import DatabricksError
+from databricks.sdk.service import iam, sql
 
-from databricks.labs.ucx.framework.parallel import Threads
+from databricks.labs.ucx.framework.parallel import (
+    AdaptiveConcurrency,
+    AsyncTasks,
+    LongestFirst,
+    TaskStats,
+    Threads,
+    task_key,
+    task_label,
+)
+from databricks.labs.ucx.workspace_access.generic import GenericPermissionsSupport
+from databricks.labs.ucx.workspace_access.redash import SqlPermissionsSupport
+from databricks.labs.ucx.workspace_access.scim import ScimSupport
+
+from .mocks import FakeApiServer
 
 
 def _predictable_messages(caplog):
@@ -99,3 +121,332 @@ def test_all_failed(caplog):
         "testing task failed: failed",
         "testing task failed: failed",
     ] == _predictable_messages(caplog)
+
+
+def test_stream_yields_non_empty_results(caplog):
+    def works():
+        return True
+
+    def nothing():
+        return None
+
+    def fails():
+        msg = "failed"
+        raise DatabricksError(msg)
+
+    tasks = (t for t in [works, nothing, fails, works])
+    results = list(Threads.stream("testing", tasks))
+
+    assert [True, True] == results
+    assert [
+        "Some 'testing' tasks failed: 25% (1/4)",
+        "testing task failed: failed",
+    ] == _predictable_messages(caplog)
+
+
+def test_stream_keeps_bounded_number_of_tasks_in_flight():
+    lock = threading.Lock()
+    submitted = 0
+
+    def tasks():
+        nonlocal submitted
+        for i in range(100):
+            with lock:
+                submitted += 1
+            yield functools.partial(lambda x: x, i)
+
+    consumed = 0
+    max_ahead = 0
+    for _ in Threads.stream("testing", tasks(), max_in_flight=3):
+        consumed += 1
+        with lock:
+            max_ahead = max(max_ahead, submitted - consumed)
+
+    assert 100 == consumed
+    assert max_ahead <= 3
+
+
+def test_gather_into_sink():
+    def works():
+        return True
+
+    def fails():
+        msg = "failed"
+        raise DatabricksError(msg)
+
+    collected = []
+    errors = Threads.gather_into("testing", iter([works, fails, works]), collected.append)
+
+    assert [True, True] == collected
+    assert 1 == len(errors)
+
+
+def test_stream_empty():
+    assert [] == list(Threads.stream("testing", iter([])))
+
+
+def test_adaptive_concurrency_increases_while_healthy():
+    concurrency = AdaptiveConcurrency(initial=2, max_limit=5)
+    for _ in range(100):
+        concurrency.record(0.1)
+    assert 5 == concurrency.limit
+
+
+def test_adaptive_concurrency_backs_off_on_throttling():
+    concurrency = AdaptiveConcurrency(initial=16)
+    for _ in range(16):
+        concurrency.record(0.1)
+    concurrency.record(0.1, DatabricksError("slow down", error_code="TOO_MANY_REQUESTS"))
+    assert 8 == concurrency.limit
+    # burst of throttled requests from the same window is counted only once
+    concurrency.record(0.1, DatabricksError("slow down", error_code="TOO_MANY_REQUESTS"))
+    assert 8 == concurrency.limit
+
+
+def test_adaptive_concurrency_backs_off_on_degraded_latency():
+    concurrency = AdaptiveConcurrency(initial=10, max_limit=10)
+    for _ in range(10):
+        concurrency.record(0.1)
+    for _ in range(10):
+        concurrency.record(1.0)
+    assert 5 == concurrency.limit
+
+
+def test_adaptive_concurrency_detects_throttling_in_causes():
+    err = TimeoutError("timed out")
+    err.__cause__ = DatabricksError("unavailable", retry_after_secs=1)
+    assert AdaptiveConcurrency.is_throttling(err)
+    assert not AdaptiveConcurrency.is_throttling(DatabricksError("failed", error_code="PERMISSION_DENIED"))
+
+
+def test_adaptive_concurrency_detects_throttling_by_status_and_not_by_message():
+    response = requests.Response()
+    response.status_code = 429
+    assert AdaptiveConcurrency.is_throttling(requests.HTTPError("slow down", response=response))
+    assert not AdaptiveConcurrency.is_throttling(DatabricksError("job 4290 not found", error_code="NOT_FOUND"))
+    assert not AdaptiveConcurrency.is_throttling(DatabricksError("cluster 1503-abc is terminated"))
+
+
+def test_adaptive_concurrency_backs_off_on_first_throttle():
+    concurrency = AdaptiveConcurrency(initial=16)
+    concurrency.throttled()
+    assert 8 == concurrency.limit
+    # throttles of tasks submitted before the decrease are not counted again
+    concurrency.record(0.1, DatabricksError("slow down", error_code="TOO_MANY_REQUESTS"))
+    assert 8 == concurrency.limit
+
+
+def test_adaptive_concurrency_watches_retried_requests():
+    routes = {
+        "/api/2.0/clusters/list": [
+            (429, {"error_code": "TOO_MANY_REQUESTS", "message": "slow down"}, {"Retry-After": "0"}),
+            (200, {"clusters": []}, {}),
+        ]
+    }
+    with FakeApiServer(routes) as server:
+        ws = WorkspaceClient(config=server.config)
+        do, authenticate = ws.api_client.do, ws.config.authenticate
+        concurrency = AdaptiveConcurrency(initial=16)
+
+        with concurrency.watch(ws):
+            assert [] == list(ws.clusters.list())
+            assert 8 == concurrency.limit
+            for _ in range(8):
+                concurrency.record(0.1)
+            assert [] == list(ws.clusters.list())
+            assert 8 == concurrency.limit
+
+    assert (do, authenticate) == (ws.api_client.do, ws.config.authenticate)
+    assert 3 == len(server.requests)
+
+
+def test_gather_with_adaptive_concurrency(caplog):
+    caplog.set_level(logging.INFO)
+
+    tasks = [functools.partial(lambda x: x, i) for i in range(50)]
+    results, errors = Threads.gather("testing", tasks, concurrency=AdaptiveConcurrency(initial=1))
+
+    assert list(range(50)) == sorted(results)
+    assert [] == errors
+    assert any("'testing' settled on concurrency of" in msg for msg in caplog.messages)
+
+
+def test_task_key_and_label():
+    def _crawler_task(object_type, object_id):
+        return object_type, object_id
+
+    task = functools.partial(_crawler_task, "notebooks", "123")
+    assert "_crawler_task(notebooks, 123)" == task_key(task)
+    assert "_crawler_task:notebooks" == task_label(task)
+    assert "_crawler_task:1" == task_label(functools.partial(_crawler_task, object_type=1, object_id=2))
+    assert "_crawler_task" == task_label(functools.partial(_crawler_task, object_id="notebooks"))
+
+
+def test_task_label_ignores_object_ids():
+    ws = MagicMock()
+    redash = SqlPermissionsSupport(ws, [])
+    generic = GenericPermissionsSupport(ws, [])
+    scim = ScimSupport(ws)
+
+    redash_task = functools.partial(redash._crawler_task, "abc-123", sql.ObjectTypePlural.DASHBOARDS)
+    assert "_crawler_task:dashboards" == task_label(redash_task)
+    assert "_crawler_task:clusters" == task_label(functools.partial(generic._crawler_task, "clusters", "abc-123"))
+    assert "_crawler_task:roles" == task_label(functools.partial(scim._crawler_task, iam.Group(id="abc"), "roles"))
+    assert "_applier_task:roles" == task_label(
+        functools.partial(scim._applier_task, group_id="abc-123", value=[], property_name="roles")
+    )
+
+
+def test_task_key_hashes_large_arguments():
+    def _applier_task(object_type, object_id, acl):
+        return object_type, object_id, acl
+
+    acl = [
+        iam.AccessControlRequest(group_name=f"group_{i}", permission_level=iam.PermissionLevel.CAN_USE)
+        for i in range(100)
+    ]
+    key = task_key(functools.partial(_applier_task, "clusters", "123", acl))
+
+    assert key.startswith("_applier_task(clusters, 123, #")
+    assert len(key) < 64
+    assert key == task_key(functools.partial(_applier_task, "clusters", "123", list(acl)))
+    assert key != task_key(functools.partial(_applier_task, "clusters", "123", acl[1:]))
+    assert task_key(functools.partial(_applier_task, "x" * 100, "1", object())).startswith("_applier_task(#")
+    assert task_key(functools.partial(_applier_task, "a", "1", object())) == task_key(
+        functools.partial(_applier_task, "a", "1", object())
+    )
+
+
+def test_task_stats_percentiles_and_slowest():
+    stats = TaskStats(top_n=2)
+
+    def slow(object_type, object_id):
+        return object_type, object_id
+
+    for i in range(1, 101):
+        stats.record(functools.partial(slow, "a", i), i / 100)
+    stats.record(functools.partial(slow, "b", 0), 5.0, failed=True)
+    stats.report("testing")
+
+    latency_a, latency_b = stats.latencies()
+    assert ("testing", "slow:a", 100, 0) == (latency_a.gather, latency_a.label, latency_a.count, latency_a.failed)
+    assert 0.5 == pytest.approx(latency_a.p50, rel=0.05)
+    assert 0.95 == pytest.approx(latency_a.p95, rel=0.05)
+    assert 0.99 == pytest.approx(latency_a.p99, rel=0.05)
+    assert 1.0 == latency_a.slowest
+    assert (1, 1, 5.0) == (latency_b.count, latency_b.failed, latency_b.slowest)
+    assert ["slow(b, 0)", "slow(a, 100)"] == [slow.key for slow in stats.slowest()]
+    assert 101 / 60 == stats.throughput()[0][1]
+
+
+def test_gather_records_task_stats(caplog):
+    caplog.set_level(logging.INFO)
+
+    def works(object_type):
+        return object_type
+
+    stats = TaskStats()
+    results, _ = Threads.gather("testing", [functools.partial(works, "x") for _ in range(3)], stats=stats)
+
+    assert 3 == len(results)
+    assert [("works:x", 3)] == [(latency.label, latency.count) for latency in stats.latencies()]
+    assert any("'testing' latency for works:x: 3 tasks" in msg for msg in caplog.messages)
+
+
+def test_async_tasks_mix_coroutines_and_blocking_calls():
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fetch(i):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if i == 3:
+            msg = "failed"
+            raise OSError(msg)
+        return i
+
+    def blocking():
+        return "blocking"
+
+    tasks = (functools.partial(fetch, i) for i in range(50))
+    collected, errors = AsyncTasks.gather("testing", [*tasks, blocking, lambda: None], max_in_flight=20)
+
+    assert 1 == len(errors)
+    assert sorted(collected, key=str) == sorted([*(i for i in range(50) if i != 3), "blocking"], key=str)
+    assert 20 == max_in_flight
+
+
+def test_async_tasks_skip_completed_checkpoints(tmp_path):
+    from databricks.labs.ucx.framework.checkpoints import FileCheckpoint
+
+    async def fetch(i):
+        return i
+
+    checkpoint = FileCheckpoint(tmp_path / "checkpoints.jsonl")
+    checkpoint.record("testing", "fetch(1)")
+    checkpoint.flush()
+    stats = TaskStats()
+
+    collected, _ = AsyncTasks.gather(
+        "testing", [functools.partial(fetch, i) for i in range(3)], stats=stats, checkpoint=checkpoint
+    )
+
+    assert [0, 2] == sorted(collected)
+    assert {"fetch(0)", "fetch(1)", "fetch(2)"} == checkpoint.completed("testing")
+    assert 2 == stats.latencies()[0].count
+
+
+def test_longest_first_starts_largest_tasks_first():
+    started = []
+
+    def task(cost):
+        started.append(cost)
+        return cost
+
+    tasks = [(cost, functools.partial(task, cost)) for cost in [3, 10, 1, 7, 5]]
+
+    results, errors = LongestFirst("costs", tasks, num_threads=1, large_cost=100)._run()
+
+    assert [10, 7, 5, 3, 1] == started
+    assert [10, 7, 5, 3, 1] == results
+    assert [] == errors
+
+
+def test_longest_first_caps_concurrent_large_tasks():
+    lock = threading.Lock()
+    running = {"large": 0, "max": 0}
+    small_done = threading.Event()
+
+    def large():
+        with lock:
+            running["large"] += 1
+            running["max"] = max(running["max"], running["large"])
+        small_done.wait(5)
+        with lock:
+            running["large"] -= 1
+
+    def small():
+        small_done.set()
+
+    def fails():
+        msg = "boom"
+        raise ValueError(msg)
+
+    tasks = [(1000, large), (900, large), (800, large), (1, small), (0, fails)]
+
+    _, errors = LongestFirst("caps", tasks, num_threads=3, max_large=2, large_cost=500)._run()
+
+    assert 2 == running["max"]
+    assert 1 == len(errors)
+
+
+def test_longest_first_reports_eta(caplog):
+    tasks = [(3, lambda: 1), (1, lambda: 1)]
+
+    with caplog.at_level(logging.INFO):
+        LongestFirst("eta", tasks, num_threads=1, log_every=datetime.timedelta(0))._run()
+
+    assert "eta 1/2, 75% of estimated cost, ETA: 0:00:00" in caplog.messages
@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+from databricks.labs.ucx.assessment.crawlers import (
+    AzureServicePrincipalInfo,
+    ClusterInfo,
+    GlobalInitScriptInfo,
+    JobInfo,
+    PipelineInfo,
+)
+from databricks.labs.ucx.framework.sqlite import SqliteBackend
+from databricks.labs.ucx.hive_metastore.data_objects import ExternalLocation
+from databricks.labs.ucx.hive_metastore.mounts import Mount
+from databricks.labs.ucx.hive_metastore.tables import Table, TablesCrawler
+
+QUERIES = Path(__file__).parent / "../../../src/databricks/labs/ucx/assessment/queries"
+
+
+@dataclass
+class Foo:
+    first: str
+    second: bool
+
+
+def test_save_table_and_fetch():
+    backend = SqliteBackend()
+
+    backend.save_table("a.b.c", [Foo("123", True), Foo("aaa", False)], Foo)
+    backend.save_table("a.b.c", [Foo("bbb", True)], Foo)
+
+    assert [Foo("123", True), Foo("aaa", False), Foo("bbb", True)] == list(backend.fetch_as(Foo, "a.b.c"))
+    assert [("aaa",)] == list(backend.fetch("SELECT first FROM `a`.`b`.`c` WHERE second = FALSE"))
+
+
+def test_save_table_overwrite():
+    backend = SqliteBackend()
+
+    backend.save_table("b.c", [Foo("aaa", True)], Foo)
+    backend.save_table("hive_metastore.b.c", [Foo("bbb", False)], Foo, mode="overwrite")
+    backend.execute('INSERT OVERWRITE b.c VALUES ("ccc", TRUE)')
+
+    assert [Foo("ccc", True)] == list(backend.fetch_as(Foo, "b.c"))
+
+
+def test_save_table_upsert():
+    backend = SqliteBackend()
+
+    backend.save_table("b.c", [Foo("aaa", True), Foo("bbb", True)], Foo)
+    backend.save_table("b.c", [Foo("bbb", False), Foo("ccc", False)], Foo, mode="upsert", keys=["first"])
+
+    assert [Foo("aaa", True), Foo("bbb", False), Foo("ccc", False)] == list(backend.fetch_as(Foo, "b.c"))
+
+
+def test_missing_table():
+    backend = SqliteBackend()
+
+    with pytest.raises(RuntimeError, match="TABLE_OR_VIEW_NOT_FOUND"):
+        backend.fetch("SELECT * FROM a.b.c")
+
+
+def test_crawler_snapshot_is_persisted(tmp_path):
+    tables = [Table("hive_metastore", "db", "t", "MANAGED", "DELTA", "dbfs:/a")]
+    crawler = TablesCrawler(SqliteBackend(tmp_path / "inventory.db"), "ucx")
+    crawler._crawl_stream = lambda _=None: iter(tables)
+
+    assert tables == crawler.snapshot()
+
+    backend = SqliteBackend(tmp_path / "inventory.db")
+    assert tables == list(backend.fetch_as(Table, "ucx.tables"))
+    assert [("ucx",)] == list(backend.fetch("SHOW DATABASES"))
+    assert ("ucx", "tables", False) in list(backend.fetch("SHOW TABLES FROM hive_metastore.ucx"))
+
+
+def test_assessment_queries():
+    backend = SqliteBackend()
+    backend.save_table(
+        "ucx.tables",
+        [
+            Table("hive_metastore", "db", "a", "MANAGED", "DELTA", "dbfs:/user/hive/warehouse/a"),
+            Table("hive_metastore", "db", "b", "EXTERNAL", "PARQUET", "wasbs://c@a.blob.core.windows.net/b"),
+            Table("hive_metastore", "db", "c", "VIEW", "", None, "SELECT 1"),
+        ],
+        Table,
+    )
+    backend.save_table(
+        "ucx.clusters", [ClusterInfo("1", "job-1", "me", 1, "[]"), ClusterInfo("2", "x", "me", 0, "")], ClusterInfo
+    )
+    backend.save_table(
+        "ucx.jobs", [JobInfo("1", "[UCX] install", "me", 1, "[]"), JobInfo("2", "etl", "me", 1, "")], JobInfo
+    )
+    backend.save_table("ucx.mounts", [Mount("/mnt/a", "s3://a")], Mount)
+    backend.execute("CREATE TABLE ucx.table_failures (catalog STRING, database STRING, name STRING, error STRING)")
+    backend.create_table("hive_metastore.ucx.pipelines", PipelineInfo)
+    backend.create_table("hive_metastore.ucx.global_init_scripts", GlobalInitScriptInfo)
+    backend.create_table("hive_metastore.ucx.azure_service_principals", AzureServicePrincipalInfo)
+    backend.create_table("hive_metastore.ucx.external_locations", ExternalLocation)
+
+    results = {}
+    for query in sorted(QUERIES.glob("*.sql")):
+        results[query.stem] = list(backend.fetch(query.read_text().replace("$inventory", "hive_metastore.ucx")))
+
+    assert [("2", "x", "me", "Incompatible", "")] == results["clusters"]
+    assert [("2", "etl", "me", "Compatible", "")] == results["jobs"]
+    assert [(3,)] == results["count_total_tables"]
+    assert [(0,)] == results["count_table_failures"]
+    assert [(1,)] == results["count_total_databases"]
+    assert [("db", 2, 1, 1, 1, 1, "Asset Replication Required")] == results["database_summary"]
+    assert ["DBFS ROOT", "UNSUPPORTED", "EXTERNAL"] == [r.storage for r in results["all_tables"]]
+    assert ["TABLE", "TABLE", "VIEW"] == [r.table_view for r in results["all_tables"]]
@@ -0,0 +1,31 @@
+from databricks.labs.ucx.framework.staging import (
+    DbfsStagingArea,
+    StagingArea,
+    VolumeStagingArea,
+)
+
+
+def test_staging_area_for_volume_folder(mocker):
+    ws = mocker.Mock()
+    staging = StagingArea.for_folder(ws, "/Volumes/main/ucx/staging")
+
+    location = staging.upload("a.parquet", b"")
+
+    assert isinstance(staging, VolumeStagingArea)
+    assert "/Volumes/main/ucx/staging/a.parquet" == location
+    ws.files.upload.assert_called_with(location, b"", overwrite=True)
+
+
+def test_staging_area_for_dbfs_folder(mocker):
+    ws = mocker.Mock()
+    staging = StagingArea.for_folder(ws, "dbfs:/FileStore/ucx/")
+
+    location = staging.upload("a.parquet", b"")
+
+    assert isinstance(staging, DbfsStagingArea)
+    assert "dbfs:/FileStore/ucx/a.parquet" == location
+    ws.dbfs.upload.assert_called_with("/FileStore/ucx/a.parquet", b"", overwrite=True)
+
+
+def test_no_staging_area_without_folder(mocker):
+    assert StagingArea.for_folder(mocker.Mock(), None) is None
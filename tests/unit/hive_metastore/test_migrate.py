@@ -3,6 +3,7 @@ from unittest.mock import MagicMock
 
 from databricks.sdk.service.catalog import CatalogInfo, SchemaInfo, TableInfo
 
+from databricks.labs.ucx.hive_metastore.table_size import TableSize
 from databricks.labs.ucx.hive_metastore.tables import TablesCrawler, TablesMigrate
 
 from ..framework.mocks import MockBackend
@@ -13,7 +14,7 @@ logger = logging.getLogger(__name__)
 def test_migrate_managed_tables_should_produce_proper_queries():
     errors = {}
     rows = {
-        "SELECT": [
+        "SELECT \\* FROM": [
             (
                 "hive_metastore",
                 "db1",
@@ -32,6 +33,7 @@ def test_migrate_managed_tables_should_produce_proper_queries():
     tm.migrate_tables()
 
     assert (list(backend.queries)) == [
+        "SELECT table_name FROM hive_metastore.inventory_database.snapshot_progress WHERE table_name = 'tables'",
         "SELECT * FROM hive_metastore.inventory_database.tables",
         "CREATE TABLE IF NOT EXISTS ucx_default.db1.managed DEEP CLONE hive_metastore.db1.managed;",
         "ALTER TABLE hive_metastore.db1.managed SET TBLPROPERTIES ('upgraded_to' = 'ucx_default.db1.managed');",
@@ -42,7 +44,7 @@ def test_migrate_managed_tables_should_produce_proper_queries():
 def test_migrate_managed_tables_should_do_nothing_if_upgrade_tag_is_present():
     errors = {}
     rows = {
-        "SELECT": [
+        "SELECT \\* FROM": [
             ("hive_metastore", "db1", "managed", "MANAGED", "DELTA", None, None),
         ]
     }
@@ -57,13 +59,16 @@ def test_migrate_managed_tables_should_do_nothing_if_upgrade_tag_is_present():
     tm = TablesMigrate(tc, client, backend, default_catalog="catalog_1")
     tm.migrate_tables()
 
-    assert (list(backend.queries)) == ["SELECT * FROM hive_metastore.inventory_database.tables"]
+    assert (list(backend.queries)) == [
+        "SELECT table_name FROM hive_metastore.inventory_database.snapshot_progress WHERE table_name = 'tables'",
+        "SELECT * FROM hive_metastore.inventory_database.tables",
+    ]
 
 
 def test_migrate_tables_should_migrate_tables_to_default_catalog_if_not_found_in_mapping():
     errors = {}
     rows = {
-        "SELECT": [
+        "SELECT \\* FROM": [
             ("hive_metastore", "db1", "managed", "MANAGED", "DELTA", None, None),
         ]
     }
@@ -75,6 +80,7 @@ def test_migrate_tables_should_migrate_tables_to_default_catalog_if_not_found_in
     tm.migrate_tables()
 
     assert (list(backend.queries)) == [
+        "SELECT table_name FROM hive_metastore.inventory_database.snapshot_progress WHERE table_name = 'tables'",
         "SELECT * FROM hive_metastore.inventory_database.tables",
         "CREATE TABLE IF NOT EXISTS catalog_1.db1.managed DEEP CLONE hive_metastore.db1.managed;",
         "ALTER TABLE hive_metastore.db1.managed SET TBLPROPERTIES ('upgraded_to' = 'catalog_1.db1.managed');",
@@ -85,7 +91,7 @@ def test_migrate_tables_should_migrate_tables_to_default_catalog_if_not_found_in
 def test_migrate_tables_should_migrate_tables_to_default_catalog_if_specified():
     errors = {}
     rows = {
-        "SELECT": [
+        "SELECT \\* FROM": [
             ("hive_metastore", "db1", "managed", "MANAGED", "DELTA", None, None),
         ]
     }
@@ -96,6 +102,7 @@ def test_migrate_tables_should_migrate_tables_to_default_catalog_if_specified():
     tm.migrate_tables()
 
     assert (list(backend.queries)) == [
+        "SELECT table_name FROM hive_metastore.inventory_database.snapshot_progress WHERE table_name = 'tables'",
         "SELECT * FROM hive_metastore.inventory_database.tables",
         "CREATE TABLE IF NOT EXISTS test_catalog.db1.managed DEEP CLONE hive_metastore.db1.managed;",
         "ALTER TABLE hive_metastore.db1.managed SET TBLPROPERTIES ('upgraded_to' = 'test_catalog.db1.managed');",
@@ -106,7 +113,7 @@ def test_migrate_tables_should_migrate_tables_to_default_catalog_if_specified():
 def test_migrate_tables_should_add_table_to_cache_when_migrated():
     errors = {}
     rows = {
-        "SELECT": [
+        "SELECT \\* FROM": [
             ("hive_metastore", "db1", "managed", "MANAGED", "DELTA", None, None),
         ]
     }
@@ -117,3 +124,30 @@ def test_migrate_tables_should_add_table_to_cache_when_migrated():
     tm.migrate_tables()
 
     assert tm._seen_tables == {"test_catalog.db1.managed": "hive_metastore.db1.managed"}
+
+
+def test_migrate_tables_clones_largest_tables_first(mocker):
+    rows = {
+        "SELECT \\* FROM": [
+            ("hive_metastore", "db1", "small", "MANAGED", "DELTA", None, None),
+            ("hive_metastore", "db1", "external", "EXTERNAL", "DELTA", None, None),
+            ("hive_metastore", "db1", "huge", "MANAGED", "DELTA", None, None),
+            ("hive_metastore", "db1", "files", "MANAGED", "DELTA", None, None),
+        ]
+    }
+    backend = MockBackend(rows=rows)
+    tc = TablesCrawler(backend, "inventory_database")
+    sizes = MagicMock()
+    sizes.snapshot.return_value = [
+        TableSize("hive_metastore", "db1", "small", 10),
+        TableSize("hive_metastore", "db1", "huge", 10 * 1024**4),
+        TableSize("hive_metastore", "db1", "files", num_files=100),
+    ]
+    gather = mocker.patch("databricks.labs.ucx.hive_metastore.tables.LongestFirst.gather", return_value=([], []))
+    tm = TablesMigrate(tc, MagicMock(), backend, table_sizes=sizes, max_large_clones=2)
+    tm.migrate_tables()
+
+    tasks = gather.call_args.args[1]
+    assert [10, 0, 10 * 1024**4, 100 * 128 * 1024**2] == [cost for cost, _ in tasks]
+    assert ["small", "external", "huge", "files"] == [task.args[1].name for _, task in tasks]
+    assert 2 == gather.call_args.kwargs["max_large"]
@@ -0,0 +1,61 @@
+import datetime
+
+import pytest
+
+from databricks.labs.ucx.framework.crawlers import StatementExecutionBackend
+from databricks.labs.ucx.framework.sqlite import SqliteBackend
+from databricks.labs.ucx.hive_metastore.table_size import TableSize, TableSizeCrawler
+from databricks.labs.ucx.hive_metastore.tables import TablesCrawler
+from databricks.labs.ucx.mixins.sql import Row
+
+from ..framework.mocks import MockBackend
+
+DETAIL = Row.factory(["format", "name", "location", "lastModified", "partitionColumns", "numFiles", "sizeInBytes"])
+
+
+def test_table_size_crawls_delta_tables():
+    backend = MockBackend(
+        rows={
+            "SELECT \\* FROM hive_metastore.inventory.tables": [
+                ("hive_metastore", "db", "a", "MANAGED", "DELTA", "dbfs:/a", None, None),
+                ("hive_metastore", "db", "b", "EXTERNAL", "PARQUET", "s3://b", None, None),
+                ("hive_metastore", "db", "c", "VIEW", "", None, "SELECT 1", None),
+            ],
+            "DESCRIBE DETAIL hive_metastore.db.a": [
+                DETAIL(("delta", "db.a", "dbfs:/a", datetime.datetime(2023, 10, 1, 12, 30), ["day"], 7, 1024))
+            ],
+        }
+    )
+    crawler = TableSizeCrawler(TablesCrawler(backend, "inventory"))
+
+    sizes = crawler.snapshot()
+
+    assert [TableSize("hive_metastore", "db", "a", 1024, 7, "day", "2023-10-01T12:30:00")] == sizes
+    assert 1 == len([q for q in backend.queries if q.startswith("DESCRIBE DETAIL")])
+    assert sizes == backend.rows_written_for("hive_metastore.inventory.table_size", "append")
+
+
+def test_table_size_skips_failed_tables():
+    backend = MockBackend(
+        fails_on_first={"DESCRIBE DETAIL hive_metastore.db.a": "[DELTA_TABLE_NOT_FOUND] gone"},
+        rows={
+            "SELECT \\* FROM hive_metastore.inventory.tables": [
+                ("hive_metastore", "db", "a", "MANAGED", "DELTA", "dbfs:/a", None, None),
+            ],
+        },
+    )
+
+    assert [] == TableSizeCrawler(TablesCrawler(backend, "inventory")).snapshot()
+
+
+def test_table_size_round_trips_sizes_above_32_bits():
+    pq = pytest.importorskip("pyarrow.parquet")
+    size = TableSize("hive_metastore", "db", "huge", 5 * 1024**4, 2**31 + 1, "", None)
+    backend = SqliteBackend()
+
+    backend.save_table("ucx.table_size", [size], TableSize)
+
+    assert [size] == list(backend.fetch_as(TableSize, "ucx.table_size"))
+    parquet = pq.read_table(StatementExecutionBackend._rows_to_parquet([size], TableSize))
+    assert [5 * 1024**4] == parquet.column("size_in_bytes").to_pylist()
+    assert "int64" == str(parquet.schema.field("num_files").type)
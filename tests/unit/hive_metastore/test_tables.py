@@ -1,6 +1,14 @@
+import datetime as dt
+
 import pytest
 
-from databricks.labs.ucx.hive_metastore.tables import Table, TablesCrawler
+from databricks.labs.ucx.framework.sqlite import SqliteBackend
+from databricks.labs.ucx.hive_metastore.tables import (
+    Table,
+    TableCheck,
+    TableError,
+    TablesCrawler,
+)
 
 from ..framework.mocks import MockBackend
 
@@ -107,3 +115,159 @@ def test_tables_returning_error_when_describing():
     tc = TablesCrawler(backend, "default")
     results = tc._crawl()
     assert len(results) == 1
+
+
+VIEW_INFORMATION = """Catalog: spark_catalog
+Database: db
+Table: v
+Type: VIEW
+View Text: SELECT a,
+  b
+FROM db.t
+View Original Text: SELECT a, b FROM db.t
+View Catalog and Namespace: spark_catalog.db
+Table Properties: [transient_lastDdlTime=1690000000]
+Schema: root
+ |-- a: integer (nullable = true)
+"""
+
+
+def test_tables_bulk_crawl_describes_databases_with_one_statement():
+    table_information = (
+        "Catalog: spark_catalog\nDatabase: db\nTable: t\nType: EXTERNAL\nProvider: delta\n"
+        "Table Properties: [delta.minReaderVersion=1, upgraded_to=main.db.t]\nLocation: s3://bucket/t\n"
+    )
+    rows = {
+        "SHOW DATABASES": [("db",), ("other",)],
+        "SHOW TABLE EXTENDED IN hive_metastore.db": [
+            ("db", "t", False, table_information),
+            ("db", "v", False, VIEW_INFORMATION),
+            ("", "tmp", True, "Table: tmp\nType: VIEW\n"),
+        ],
+        "SHOW TABLE EXTENDED IN hive_metastore.other": [],
+    }
+    backend = MockBackend(rows=rows)
+
+    results = TablesCrawler(backend, "default", bulk=True)._crawl()
+
+    assert [
+        Table("hive_metastore", "db", "t", "EXTERNAL", "DELTA", "s3://bucket/t", upgraded_to="main.db.t"),
+        Table("hive_metastore", "db", "v", "VIEW", "", view_text="SELECT a,\n  b\nFROM db.t"),
+    ] == results
+    assert 3 == len(backend.queries)
+
+
+def test_tables_bulk_crawl_falls_back_to_describing_tables():
+    errors = {"SHOW TABLE EXTENDED IN hive_metastore.db": "corrupt table"}
+    rows = {
+        "SHOW DATABASES": [("db",)],
+        "SHOW TABLES FROM hive_metastore.db": [("db", "t", False)],
+        "DESCRIBE TABLE EXTENDED hive_metastore.db.t": [("Catalog", "hive_metastore", ""), ("Type", "MANAGED", "")],
+    }
+    backend = MockBackend(fails_on_first=errors, rows=rows)
+
+    results = TablesCrawler(backend, "default", bulk=True)._crawl()
+
+    assert [Table("hive_metastore", "db", "t", "MANAGED", "")] == results
+
+
+class MetastoreBackend(SqliteBackend):
+    """Keeps the inventory in SQLite and answers metastore statements from `tables`"""
+
+    def __init__(self, tables: dict[str, dict[str, str]]):
+        super().__init__()
+        self.tables = tables
+        self.metastore_queries = []
+
+    def fetch(self, sql):
+        if not sql.startswith(("SHOW DATABASES", "SHOW TABLES", "SHOW TBLPROPERTIES", "DESCRIBE")):
+            return super().fetch(sql)
+        self.metastore_queries.append(sql)
+        if sql == "SHOW DATABASES":
+            return iter(sorted({(k.split(".")[1],) for k in self.tables}))
+        if sql.startswith("SHOW TABLES FROM "):
+            database = sql.split(".")[-1]
+            return iter([(database, k.split(".")[2], False) for k in self.tables if k.split(".")[1] == database])
+        full_name = sql.split(" ")[-1]
+        props = self.tables[full_name]
+        if "error" in props:
+            raise RuntimeError(props["error"])
+        if sql.startswith("SHOW TBLPROPERTIES"):
+            return iter(props.items())
+        describe = {"Catalog": "hive_metastore", "Type": "MANAGED", "Provider": "delta"}
+        if "upgraded_to" in props:
+            describe["Table Properties"] = f"[upgraded_to={props['upgraded_to']}]"
+        return iter([(k, v, "") for k, v in describe.items()])
+
+
+def test_tables_refresh_describes_only_changed_tables():
+    backend = MetastoreBackend({"hive_metastore.db.a": {}, "hive_metastore.db.b": {}, "hive_metastore.old.c": {}})
+    TablesCrawler(backend, "ucx").refresh()
+    backend.tables = {
+        "hive_metastore.db.a": {"upgraded_to": "main.db.a"},
+        "hive_metastore.db.b": {},
+        "hive_metastore.db.d": {},
+    }
+    backend.metastore_queries = []
+
+    tables = TablesCrawler(backend, "ucx", recheck_max_age=dt.timedelta(0)).refresh()
+
+    assert ["DESCRIBE TABLE EXTENDED hive_metastore.db.d"] == [
+        q for q in backend.metastore_queries if q.startswith("DESCRIBE")
+    ]
+    expected = [
+        Table("hive_metastore", "db", "a", "MANAGED", "DELTA", upgraded_to="main.db.a"),
+        Table("hive_metastore", "db", "b", "MANAGED", "DELTA"),
+        Table("hive_metastore", "db", "d", "MANAGED", "DELTA"),
+    ]
+    assert expected == sorted(tables, key=lambda t: t.key)
+    assert expected == sorted(backend.fetch_as(Table, "ucx.tables"), key=lambda t: t.key)
+
+
+def test_tables_refresh_skips_recently_checked_tables():
+    backend = MetastoreBackend({"hive_metastore.db.a": {}, "hive_metastore.db.b": {}})
+    TablesCrawler(backend, "ucx").refresh()
+    long_ago = (dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=30)).isoformat()
+    backend.save_table(
+        "ucx.table_checks",
+        [TableCheck("hive_metastore", "db", "b", long_ago)],
+        TableCheck,
+        "upsert",
+        keys=["catalog", "database", "name"],
+    )
+    backend.tables["hive_metastore.db.a"]["upgraded_to"] = "main.db.a"
+    backend.tables["hive_metastore.db.b"]["upgraded_to"] = "main.db.b"
+    backend.metastore_queries = []
+
+    tables = TablesCrawler(backend, "ucx").refresh()
+
+    assert ["SHOW TBLPROPERTIES hive_metastore.db.b"] == [
+        q for q in backend.metastore_queries if q.startswith(("DESCRIBE", "SHOW TBLPROPERTIES"))
+    ]
+    assert [None, "main.db.b"] == [t.upgraded_to for t in sorted(tables, key=lambda t: t.key)]
+    checks = {c.name: c.checked_at for c in backend.fetch_as(TableCheck, "ucx.table_checks")}
+    assert ["a", "b"] == sorted(checks)
+    assert long_ago < checks["b"]
+
+
+def test_tables_refresh_retries_previous_failures():
+    backend = MetastoreBackend({"hive_metastore.db.a": {}, "hive_metastore.db.b": {}, "hive_metastore.db.c": {}})
+    backend.save_table(
+        "ucx.tables",
+        [
+            Table("hive_metastore", "db", "a", "MANAGED", "DELTA", upgraded_to="x"),
+            Table("hive_metastore", "db", "c", "MANAGED", "DELTA"),
+        ],
+        Table,
+    )
+    backend.tables["hive_metastore.db.c"]["error"] = "PERMISSION_DENIED"
+    backend.save_table("ucx.table_failures", [TableError("hive_metastore", "db", "b", "timeout")], TableError)
+
+    tables = TablesCrawler(backend, "ucx").refresh()
+
+    assert ["DESCRIBE TABLE EXTENDED hive_metastore.db.b", "SHOW TBLPROPERTIES hive_metastore.db.c"] == sorted(
+        q for q in backend.metastore_queries if q.startswith(("DESCRIBE", "SHOW TBLPROPERTIES"))
+    )
+    assert 3 == len(tables)
+    failures = list(backend.fetch_as(TableError, "ucx.table_failures"))
+    assert [("c", "ignoring table because of PERMISSION_DENIED")] == [(f.name, f.error) for f in failures]
@@ -0,0 +1,197 @@
+import asyncio
+import threading
+
+import pytest
+from databricks.sdk.core import Config, DatabricksError
+from databricks.sdk.service import sql, workspace
+
+from databricks.labs.ucx.mixins.aio import AsyncApiClient
+
+from ..framework.mocks import FakeApiServer
+
+
+def test_permissions_get_with_bounded_connections():
+    routes = {
+        f"/api/2.0/permissions/clusters/{i}": {"object_id": f"/clusters/{i}", "object_type": "cluster"}
+        for i in range(50)
+    }
+    with FakeApiServer(routes) as server:
+        client = AsyncApiClient(server.config, max_connections=5)
+
+        async def crawl():
+            async with client:
+                return await asyncio.gather(*[client.permissions_get("clusters", str(i)) for i in range(50)])
+
+        results = asyncio.run(crawl())
+
+    assert [r.object_id for r in results] == [f"/clusters/{i}" for i in range(50)]
+    assert len(server.requests) == 50
+
+
+def test_typed_endpoints():
+    routes = {
+        "/api/2.0/workspace/list?path=/Users": {"objects": [{"path": "/Users/foo", "object_type": "DIRECTORY"}]},
+        "/api/2.0/preview/sql/permissions/queries/abc": {"object_id": "queries/abc", "object_type": "query"},
+        "/api/2.0/secrets/acls/list?scope=foo": {"items": [{"principal": "users", "permission": "READ"}]},
+    }
+    with FakeApiServer(routes) as server:
+        client = AsyncApiClient(server.config)
+
+        async def crawl():
+            async with client:
+                return (
+                    await client.workspace_list("/Users"),
+                    await client.dbsql_permissions_get(sql.ObjectTypePlural.QUERIES, "abc"),
+                    await client.secrets_list_acls("foo"),
+                )
+
+        objects, query, acls = asyncio.run(crawl())
+
+    assert objects == [workspace.ObjectInfo(path="/Users/foo", object_type=workspace.ObjectType.DIRECTORY)]
+    assert query.object_id == "queries/abc"
+    assert acls == [workspace.AclItem(principal="users", permission=workspace.AclPermission.READ)]
+
+
+def test_errors_are_raised():
+    with FakeApiServer({}) as server:
+        client = AsyncApiClient(server.config)
+        with pytest.raises(DatabricksError) as info:
+            asyncio.run(client.permissions_get("clusters", "missing"))
+
+    assert info.value.error_code == "RESOURCE_DOES_NOT_EXIST"
+
+
+def test_throttled_requests_are_retried():
+    routes = {
+        "/api/2.0/secrets/acls/list?scope=foo": [
+            (429, {"error_code": "TOO_MANY_REQUESTS", "message": "slow down"}, {"Retry-After": "0"}),
+            (200, {"items": [{"principal": "users", "permission": "READ"}]}, {}),
+        ]
+    }
+    with FakeApiServer(routes) as server:
+        client = AsyncApiClient(server.config)
+        acls = asyncio.run(client.secrets_list_acls("foo"))
+
+    assert len(acls) == 1
+    assert len(server.requests) == 2
+
+
+def test_throttling_gives_up_after_max_retries():
+    routes = {
+        "/api/2.0/secrets/acls/list?scope=foo": [
+            (503, {"error_code": "TEMPORARILY_UNAVAILABLE", "message": "busy"}, {"Retry-After": "0"}),
+        ]
+    }
+    with FakeApiServer(routes) as server:
+        client = AsyncApiClient(server.config, max_retries=2)
+        with pytest.raises(DatabricksError) as info:
+            asyncio.run(client.secrets_list_acls("foo"))
+
+    assert info.value.error_code == "TEMPORARILY_UNAVAILABLE"
+    assert len(server.requests) == 3
+
+
+def test_chunked_responses_are_decoded():
+    routes = {
+        "/api/2.0/secrets/acls/list?scope=foo": [
+            (200, {"items": [{"principal": "users", "permission": "READ"}]}, {"Transfer-Encoding": "chunked"}),
+        ]
+    }
+    with FakeApiServer(routes) as server:
+        client = AsyncApiClient(server.config)
+
+        async def crawl():
+            async with client:
+                # the second request reuses the connection, so the first body must be read to its end
+                return await client.secrets_list_acls("foo"), await client.secrets_list_acls("foo")
+
+        first, second = asyncio.run(crawl())
+
+    assert first == second == [workspace.AclItem(principal="users", permission=workspace.AclPermission.READ)]
+
+
+def test_requests_go_through_http_proxy(monkeypatch):
+    routes = {"/api/2.0/secrets/acls/list?scope=foo": {"items": []}}
+    with FakeApiServer(routes) as server:
+        monkeypatch.setenv("HTTP_PROXY", server.config.host)
+        monkeypatch.delenv("NO_PROXY", raising=False)
+        monkeypatch.delenv("no_proxy", raising=False)
+        client = AsyncApiClient(Config(host="http://workspace.invalid", token="fake"))
+
+        acls = asyncio.run(client.secrets_list_acls("foo"))
+
+    assert acls == []
+    assert server.requests == ["/api/2.0/secrets/acls/list?scope=foo"]
+
+
+def test_authentication_runs_off_the_event_loop(mocker):
+    with FakeApiServer({"/api/2.0/secrets/acls/list?scope=foo": {"items": []}}) as server:
+        cfg = server.config
+        threads = []
+
+        def authenticate():
+            threads.append(threading.current_thread())
+            return {"Authorization": "Bearer fake"}
+
+        mocker.patch.object(cfg, "authenticate", side_effect=authenticate)
+        client = AsyncApiClient(cfg)
+
+        asyncio.run(client.secrets_list_acls("foo"))
+
+    assert [threading.main_thread()] != threads
+    assert 1 == len(threads)
+
+
+def test_authentication_headers_are_reused(mocker):
+    routes = {f"/api/2.0/permissions/clusters/{i}": {"object_id": f"/clusters/{i}"} for i in range(20)}
+    with FakeApiServer(routes) as server:
+        cfg = server.config
+        authenticate = mocker.patch.object(cfg, "authenticate", return_value={"Authorization": "Bearer fake"})
+        client = AsyncApiClient(cfg, max_connections=5)
+
+        async def crawl():
+            async with client:
+                return await asyncio.gather(*[client.permissions_get("clusters", str(i)) for i in range(20)])
+
+        asyncio.run(crawl())
+
+    assert 1 == authenticate.call_count
+
+
+def test_unauthorized_requests_are_retried_with_fresh_headers(mocker):
+    routes = {
+        "/api/2.0/secrets/acls/list?scope=foo": [
+            (401, {"error_code": "UNAUTHENTICATED", "message": "token expired"}, {}),
+            (200, {"items": []}, {}),
+        ]
+    }
+    with FakeApiServer(routes) as server:
+        cfg = server.config
+        authenticate = mocker.patch.object(cfg, "authenticate", return_value={"Authorization": "Bearer fake"})
+        client = AsyncApiClient(cfg)
+
+        assert [] == asyncio.run(client.secrets_list_acls("foo"))
+
+    assert 2 == authenticate.call_count
+
+
+def test_timeout_does_not_count_waiting_for_a_connection():
+    routes = {f"/api/2.0/permissions/clusters/{i}": {"object_id": f"/clusters/{i}"} for i in range(4)}
+    with FakeApiServer(routes, delay=0.2) as server:
+        client = AsyncApiClient(server.config, max_connections=1, timeout=0.5)
+
+        async def crawl():
+            async with client:
+                return await asyncio.gather(*[client.permissions_get("clusters", str(i)) for i in range(4)])
+
+        results = asyncio.run(crawl())
+
+    assert [f"/clusters/{i}" for i in range(4)] == [r.object_id for r in results]
+
+
+def test_slow_responses_time_out():
+    with FakeApiServer({"/api/2.0/secrets/acls/list?scope=foo": {"items": []}}, delay=0.5) as server:
+        client = AsyncApiClient(server.config, timeout=0.1)
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(client.secrets_list_acls("foo"))
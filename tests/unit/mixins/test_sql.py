@@ -0,0 +1,290 @@
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import Mock
+
+import pytest
+import requests
+from databricks.sdk.service.sql import (
+    ColumnInfo,
+    ColumnInfoTypeName,
+    ExecuteStatementResponse,
+    ExternalLink,
+    GetStatementResponse,
+    ResultData,
+    ResultManifest,
+    ResultSchema,
+    ServiceError,
+    ServiceErrorCode,
+    StatementState,
+    StatementStatus,
+)
+
+from databricks.labs.ucx.mixins.sql import Row, StatementExecutionExt
+
+from ..framework.mocks import FakeApiServer
+
+
+class FakeStatements(StatementExecutionExt):
+    """Statements finish after `polls` status checks"""
+
+    def __init__(self, polls: int, state=StatementState.SUCCEEDED, error: ServiceError | None = None):
+        super().__init__(Mock())
+        self._polls = polls
+        self._state = state
+        self._error = error
+        self._lock = threading.Lock()
+        self.remaining: dict[str, int] = {}
+        self.poller_threads = set()
+        self.cancelled = []
+
+    def execute_statement(self, *, statement: str, wait_timeout: str, **_):
+        assert "0s" == wait_timeout
+        with self._lock:
+            self.remaining[statement] = self._polls
+        return ExecuteStatementResponse(statement_id=statement, status=StatementStatus(state=StatementState.PENDING))
+
+    def get_statement(self, statement_id: str):
+        with self._lock:
+            self.poller_threads.add(threading.current_thread().name)
+            self.remaining[statement_id] -= 1
+            if self.remaining[statement_id] > 0:
+                return GetStatementResponse(
+                    statement_id=statement_id, status=StatementStatus(state=StatementState.RUNNING)
+                )
+        return GetStatementResponse(
+            statement_id=statement_id,
+            status=StatementStatus(state=self._state, error=self._error),
+            manifest=ResultManifest(
+                schema=ResultSchema(columns=[ColumnInfo(name="id", type_name=ColumnInfoTypeName.INT)])
+            ),
+            result=ResultData(data_array=[[statement_id]]),
+        )
+
+    def cancel_execution(self, statement_id: str):
+        self.cancelled.append(statement_id)
+
+
+def test_submit_keeps_many_statements_in_flight():
+    api = FakeStatements(polls=2)
+
+    futures = [api.submit("abc", str(i)) for i in range(200)]
+
+    rows = [list(api.iterate_rows(f.result(timeout=10))) for f in futures]
+    assert [[(i,)] for i in range(200)] == rows
+    assert all(name.startswith("statement-poll") for name in api.poller_threads)
+
+
+def test_submit_reports_failed_statements():
+    error = ServiceError(error_code=ServiceErrorCode.BAD_REQUEST, message="[TABLE_OR_VIEW_NOT_FOUND] a.b.c")
+    api = FakeStatements(polls=1, state=StatementState.FAILED, error=error)
+
+    future = api.submit("abc", "SELECT * FROM a.b.c")
+
+    with pytest.raises(RuntimeError, match="TABLE_OR_VIEW_NOT_FOUND"):
+        future.result(timeout=10)
+
+
+def test_submit_cancels_timed_out_statements():
+    api = FakeStatements(polls=1_000_000)
+
+    future = api.submit("abc", "SELECT 1", timeout=timedelta(seconds=0.5))
+
+    with pytest.raises(TimeoutError):
+        future.result(timeout=10)
+    assert ["SELECT 1"] == api.cancelled
+
+
+def test_submit_survives_failed_status_checks():
+    api = FakeStatements(polls=2)
+    get_statement = api.get_statement
+    failures = iter([RuntimeError("temporarily unavailable")])
+
+    def flaky(statement_id):
+        for err in failures:
+            raise err
+        return get_statement(statement_id)
+
+    api.get_statement = flaky
+
+    with pytest.raises(RuntimeError, match="temporarily unavailable"):
+        api.submit("abc", "SELECT 1").result(timeout=10)
+    assert [(2,)] == list(api.iterate_rows(api.submit("abc", "2").result(timeout=10)))
+
+
+def test_submit_survives_failed_cancellation():
+    api = FakeStatements(polls=1_000_000)
+    api.cancel_execution = Mock(side_effect=RuntimeError("cannot cancel"))
+
+    future = api.submit("abc", "SELECT 1")
+    assert future.cancel()
+    time.sleep(0.3)
+
+    api._polls = 1
+    assert [(3,)] == list(api.iterate_rows(api.submit("abc", "3").result(timeout=10)))
+    assert 1 == api.cancel_execution.call_count
+
+
+def _arrow_chunk(ids: list[int]) -> bytes:
+    import pyarrow as pa
+
+    table = pa.table({"id": pa.array(ids, pa.int32())})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def test_execute_fetch_arrow_downloads_chunks_in_parallel(mocker):
+    pytest.importorskip("pyarrow")
+    chunks = {f"/chunk/{i}": _arrow_chunk([i * 2, i * 2 + 1]) for i in range(5)}
+    with FakeApiServer(chunks) as server:
+        links = [ExternalLink(chunk_index=i, external_link=f"{server.config.host}/chunk/{i}") for i in range(5)]
+        api = StatementExecutionExt(Mock())
+        api.execute_statement = mocker.Mock(
+            return_value=ExecuteStatementResponse(
+                statement_id="s",
+                status=StatementStatus(state=StatementState.SUCCEEDED),
+                manifest=ResultManifest(total_chunk_count=5),
+                result=ResultData(external_links=links[:1]),
+            )
+        )
+        api.get_statement_result_chunk_n = mocker.Mock(side_effect=lambda _, i: ResultData(external_links=[links[i]]))
+
+        tables = list(api.execute_fetch_arrow("abc", "SELECT id FROM range(10)", max_downloads=2))
+
+    assert list(range(10)) == [v for t in tables for v in t.column("id").to_pylist()]
+    assert [1, 2, 3, 4] == [c.args[1] for c in api.get_statement_result_chunk_n.mock_calls]
+    assert sorted(chunks) == sorted(server.requests)
+    assert "EXTERNAL_LINKS" == api.execute_statement.call_args.kwargs["disposition"].value
+    assert "ARROW_STREAM" == api.execute_statement.call_args.kwargs["format"].value
+
+
+def test_execute_fetch_arrow_downloads_chunks_through_http_proxy(mocker, monkeypatch):
+    pytest.importorskip("pyarrow")
+    with FakeApiServer({"/chunk/0": _arrow_chunk([1, 2])}) as server:
+        monkeypatch.setenv("HTTP_PROXY", server.config.host)
+        monkeypatch.delenv("NO_PROXY", raising=False)
+        monkeypatch.delenv("no_proxy", raising=False)
+        link = ExternalLink(chunk_index=0, external_link="http://storage.invalid/chunk/0")
+        api = StatementExecutionExt(Mock(), config=server.config)
+        api.execute_statement = mocker.Mock(
+            return_value=ExecuteStatementResponse(
+                statement_id="s",
+                status=StatementStatus(state=StatementState.SUCCEEDED),
+                manifest=ResultManifest(total_chunk_count=1),
+                result=ResultData(external_links=[link]),
+            )
+        )
+
+        tables = list(api.execute_fetch_arrow("abc", "SELECT id FROM range(2)"))
+
+    assert [1, 2] == tables[0].column("id").to_pylist()
+    assert ["/chunk/0"] == server.requests
+
+
+def test_execute_fetch_arrow_fails_on_expired_links(mocker):
+    pytest.importorskip("pyarrow")
+    with FakeApiServer({"/chunk/0": [(403, {"message": "expired"}, {})]}) as server:
+        api = StatementExecutionExt(Mock())
+        api.execute_statement = mocker.Mock(
+            return_value=ExecuteStatementResponse(
+                statement_id="s",
+                status=StatementStatus(state=StatementState.SUCCEEDED),
+                manifest=ResultManifest(total_chunk_count=1),
+                result=ResultData(
+                    external_links=[ExternalLink(chunk_index=0, external_link=f"{server.config.host}/chunk/0")]
+                ),
+            )
+        )
+
+        with pytest.raises(requests.HTTPError):
+            list(api.execute_fetch_arrow("abc", "SELECT id FROM range(2)"))
+
+
+def _chunked_response(chunks: int) -> tuple[ExecuteStatementResponse, Mock]:
+    def do(_, link):
+        i = int(link.split("/")[-1])
+        return ResultData(
+            chunk_index=i,
+            data_array=[[str(i)]],
+            byte_count=10,
+            next_chunk_index=i + 1 if i + 1 < chunks else None,
+            next_chunk_internal_link=f"/chunks/{i + 1}" if i + 1 < chunks else None,
+        ).as_dict()
+
+    response = ExecuteStatementResponse(
+        manifest=ResultManifest(schema=ResultSchema(columns=[ColumnInfo(name="id", type_name=ColumnInfoTypeName.INT)])),
+        result=ResultData(data_array=[["0"]], next_chunk_index=1, next_chunk_internal_link="/chunks/1"),
+    )
+    return response, Mock(do=Mock(side_effect=do))
+
+
+@pytest.mark.parametrize("read_ahead", [0, 1, 3])
+def test_iterate_rows_reads_chunks_ahead(read_ahead):
+    response, api_client = _chunked_response(6)
+    api = StatementExecutionExt(api_client, read_ahead=read_ahead)
+
+    rows = api.iterate_rows(response)
+    assert (0,) == next(rows)
+    time.sleep(0.2)
+
+    assert read_ahead == api_client.do.call_count
+    assert [(i,) for i in range(1, 6)] == list(rows)
+
+
+def test_iterate_rows_read_ahead_is_bounded_by_bytes():
+    response, api_client = _chunked_response(6)
+    api = StatementExecutionExt(api_client, read_ahead=5, max_read_ahead_bytes=20)
+
+    rows = api.iterate_rows(response)
+    next(rows)
+    time.sleep(0.2)
+
+    assert 2 == api_client.do.call_count
+    assert 5 == len(list(rows))
+
+
+def test_iterate_rows_reports_read_ahead_errors_after_fetched_rows():
+    response, api_client = _chunked_response(6)
+    api_client.do.side_effect = [
+        ResultData(data_array=[["1"]], next_chunk_index=2, next_chunk_internal_link="/chunks/2").as_dict(),
+        RuntimeError("chunk has expired"),
+    ]
+    api = StatementExecutionExt(api_client)
+
+    rows = api.iterate_rows(response)
+
+    assert [(0,), (1,)] == [next(rows), next(rows)]
+    with pytest.raises(RuntimeError, match="expired"):
+        next(rows)
+
+
+def test_row_looks_up_columns_by_name():
+    row = Row.factory(["a", "b"])((1, "x"))
+
+    assert "x" == row.b
+    assert "x" == row["b"]
+    assert "a" in row
+    assert "c" not in row
+    assert {"a": 1, "b": "x"} == row.as_dict()
+    with pytest.raises(AttributeError):
+        _ = row.c
+
+
+def test_result_columns_converts_whole_columns():
+    api = StatementExecutionExt(Mock())
+    response = ExecuteStatementResponse(
+        manifest=ResultManifest(
+            schema=ResultSchema(
+                columns=[
+                    ColumnInfo(name="id", type_name=ColumnInfoTypeName.INT),
+                    ColumnInfo(name="name", type_name=ColumnInfoTypeName.STRING),
+                ]
+            )
+        ),
+        result=ResultData(data_array=[["1", "a"], [None, "b"], ["3", None]]),
+    )
+
+    assert {"id": [1, None, 3], "name": ["a", "b", None]} == api.result_columns(response)
+    assert [(1, "a"), (None, "b"), (3, None)] == list(api.iterate_rows(response))
@@ -55,3 +55,12 @@ def test_reader(tmp_path: Path):
 
         loaded = WorkspaceConfig.from_file(config_file)
         assert loaded == config
+
+
+def test_staging_folder_is_read_from_file():
+    config = WorkspaceConfig.from_dict(
+        {"version": 1, "inventory_database": "abc", "groups": {"auto": True}, "staging_folder": "/Volumes/a/b/c"}
+    )
+
+    assert "/Volumes/a/b/c" == config.staging_folder
+    assert "/Volumes/a/b/c" == config.as_dict()["staging_folder"]
@@ -4,6 +4,8 @@ from unittest.mock import MagicMock
 from databricks.sdk.core import DatabricksError
 from databricks.sdk.service import compute, iam, ml
 
+from databricks.labs.ucx.framework.parallel import AsyncTasks
+from databricks.labs.ucx.mixins.aio import AsyncApiClient
 from databricks.labs.ucx.workspace_access.generic import (
     GenericPermissionsSupport,
     Permissions,
@@ -13,6 +15,8 @@ from databricks.labs.ucx.workspace_access.generic import (
     models_listing,
 )
 
+from ..framework.mocks import FakeApiServer
+
 
 def test_crawler():
     ws = MagicMock()
@@ -205,3 +209,24 @@ def test_experiment_listing():
     for res in results:
         assert res.request_type == "experiments"
         assert res.object_id in ["test", "test2"]
+
+
+def test_async_crawler_ignores_missing_objects():
+    routes = {
+        "/api/2.0/permissions/clusters/test": {"object_id": "/clusters/test", "object_type": "cluster"},
+        "/api/2.0/permissions/clusters/denied": [
+            (403, {"error_code": "PERMISSION_DENIED", "message": "no access"}, {}),
+        ],
+    }
+    listing = listing_wrapper(
+        lambda: [compute.ClusterDetails(cluster_id=c) for c in ["test", "missing", "denied"]],
+        "cluster_id",
+        "clusters",
+    )
+    with FakeApiServer(routes) as server:
+        sup = GenericPermissionsSupport(MagicMock(), [listing], async_client=AsyncApiClient(server.config))
+        collected, errors = AsyncTasks.gather("crawl", sup.get_async_crawler_tasks())
+
+    assert [] == errors
+    assert ["test"] == [p.object_id for p in collected]
+    assert "clusters" == collected[0].object_type
@@ -4,9 +4,12 @@ from unittest.mock import MagicMock, Mock, patch
 from databricks.sdk.service import workspace
 from databricks.sdk.service.workspace import ObjectInfo, ObjectType
 
+from databricks.labs.ucx.mixins.aio import AsyncApiClient
 from databricks.labs.ucx.workspace_access.generic import workspace_listing
 from databricks.labs.ucx.workspace_access.listing import WorkspaceListing
 
+from ..framework.mocks import FakeApiServer
+
 
 def test_logging_calls():
     ws = MagicMock()
@@ -154,3 +157,32 @@ def test_walk_with_three_level_nested_folders_returns_three_levels():
     assert compare(
         listing.results, [rootobj, file, nested_folder, nested_notebook, second_nested_folder, second_nested_notebook]
     )
+
+
+def test_walk_with_asyncio():
+    routes = {
+        "/api/2.0/workspace/list?path=/": {
+            "objects": [
+                {"path": "/Users", "object_type": "DIRECTORY", "object_id": 2},
+                {"path": "/notebook", "object_type": "NOTEBOOK", "object_id": 3},
+            ]
+        },
+        "/api/2.0/workspace/list?path=/Users": {
+            "objects": [
+                {"path": "/Users/foo", "object_type": "DIRECTORY", "object_id": 4},
+                {"path": "/Users/bar", "object_type": "DIRECTORY", "object_id": 5},
+            ]
+        },
+        "/api/2.0/workspace/list?path=/Users/foo": {
+            "objects": [{"path": "/Users/foo/file", "object_type": "FILE", "object_id": 6}]
+        },
+        # /Users/bar is deleted during the listing
+    }
+    ws = MagicMock()
+    ws.workspace.get_status.return_value = ObjectInfo(path="/", object_type=ObjectType.DIRECTORY, object_id=1)
+    with FakeApiServer(routes) as server:
+        listing = WorkspaceListing(ws, num_threads=1, async_client=AsyncApiClient(server.config))
+        results = listing.walk("/")
+
+    assert [1, 2, 3, 4, 5, 6] == sorted(r.object_id for r in results)
+    ws.workspace.list.assert_not_called()
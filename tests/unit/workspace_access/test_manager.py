@@ -1,10 +1,14 @@
 import json
+from functools import partial
 from unittest.mock import MagicMock
 
 import pytest
+from databricks.sdk.core import Config
 from databricks.sdk.service import iam
 from databricks.sdk.service.iam import Group, ResourceMeta
 
+from databricks.labs.ucx.framework.crawlers import SingleFlightBackend
+from databricks.labs.ucx.mixins.aio import AsyncApiClient
 from databricks.labs.ucx.mixins.sql import Row
 from databricks.labs.ucx.workspace_access.groups import (
     GroupMigrationState,
@@ -176,3 +180,78 @@ def test_factory(mocker):
     ws = mocker.Mock()
     b = MockBackend()
     PermissionManager.factory(ws, b, "test")
+
+
+def test_factory_shares_single_flight_backend(mocker):
+    b = MockBackend()
+    pm = PermissionManager.factory(mocker.Mock(), b, "test")
+
+    tacl = pm._appliers["TABLE"]
+    assert isinstance(pm._backend, SingleFlightBackend)
+    assert pm._backend is tacl._grants_crawler._backend
+    assert pm._backend is tacl._grants_crawler._tc._backend
+
+
+def test_manager_inventorize_saves_in_batches(b, mocker):
+    some_crawler = mocker.Mock()
+    some_crawler.get_crawler_tasks = lambda: (partial(Permissions, str(i), "b", "c") for i in range(5))
+    pm = PermissionManager(b, "test_database", [some_crawler], {"b": mocker.Mock()})
+    pm._save_every = 2
+
+    pm.inventorize_permissions()
+
+    batches = [rows for full_name, rows, _ in b._save_table if full_name == "hive_metastore.test_database.permissions"]
+    assert [2, 2, 1] == [len(rows) for rows in batches]
+    assert {"0", "1", "2", "3", "4"} == {
+        p.object_id for p in b.rows_written_for("hive_metastore.test_database.permissions", "append")
+    }
+
+
+def test_manager_inventorize_flushes_checkpoint_after_save(b, mocker):
+    some_crawler = mocker.Mock()
+    some_crawler.get_crawler_tasks = lambda: (partial(Permissions, str(i), "b", "c") for i in range(3))
+    pm = PermissionManager(b, "test_database", [some_crawler], {"b": mocker.Mock()})
+    checkpoint = mocker.Mock()
+    checkpoint.completed.return_value = {"Permissions(1, b, c)"}
+
+    pm.inventorize_permissions(checkpoint=checkpoint)
+
+    assert {"0", "2"} == {p.object_id for p in b.rows_written_for("hive_metastore.test_database.permissions", "upsert")}
+    checkpoint.flush.assert_called_once()
+    assert 2 == checkpoint.record.call_count
+
+
+def test_manager_inventorize_appends_on_fresh_checkpoint(b, mocker):
+    some_crawler = mocker.Mock()
+    some_crawler.get_crawler_tasks = lambda: (partial(Permissions, str(i), "b", "c") for i in range(3))
+    pm = PermissionManager(b, "test_database", [some_crawler], {"b": mocker.Mock()})
+    checkpoint = mocker.Mock()
+    checkpoint.completed.return_value = set()
+
+    pm.inventorize_permissions(checkpoint=checkpoint)
+
+    assert 3 == len(b.rows_written_for("hive_metastore.test_database.permissions", "append"))
+    assert [] == b.rows_written_for("hive_metastore.test_database.permissions", "upsert")
+
+
+def test_manager_inventorize_with_asyncio(b, mocker):
+    async def fetch(i):
+        return Permissions(str(i), "b", "c")
+
+    some_crawler = mocker.Mock()
+    some_crawler.get_async_crawler_tasks = lambda: [partial(fetch, i) for i in range(3)]
+    other_crawler = mocker.Mock()
+    other_crawler.get_async_crawler_tasks = lambda: [lambda: Permissions("blocking", "b", "c")]
+    pm = PermissionManager(
+        b,
+        "test_database",
+        [some_crawler, other_crawler],
+        {"b": mocker.Mock()},
+        async_client=AsyncApiClient(Config(host="http://localhost", token="fake")),
+    )
+
+    pm.inventorize_permissions()
+
+    assert {"0", "1", "2", "blocking"} == {
+        p.object_id for p in b.rows_written_for("hive_metastore.test_database.permissions", "append")
+    }